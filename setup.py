@@ -44,6 +44,7 @@ setuptools.setup(
         },
     install_requires=[
     "requests",                 # Used in various modules for http connections and header parsing
+    "cryptography>=43",         # Used to verify the signatures of OCSP responses
     "pytube",                   # Used for youtube downloading
     "docopt",                   # Used for argument parsing in CLI
     "pystall",                  # Used to install ad-hoc binaries
@@ -29,6 +29,9 @@ A module for dealing with getting domain information such as:
 - Who a domain is registered with
 - Other domain details such as, creation_date, name_servers etc.
 
+### concurrency
+Helpers for running network probes concurrently, shared by the bulk functions in sws
+
 ### dns_utilities
 A module for getting DNS configurations on a domain
 
@@ -58,7 +61,7 @@ Provides functionality for working with YouTube videos such as:
 
 Notes
 -----
-- When using the domain module if ```whois``` is not installed, the package/executable will be installed
+- The domain module queries WHOIS servers directly, so the ```whois``` binary isn't needed; it's only run (if it's installed) when ```fallback=True``` is passed and a server can't be reached
 - You should use an FQDN for any ```ssl_utilties``` or ```domains``` functions, so something like https://www.google.ca becomes google.ca
 - All functions include logging and can be attached to for debugging assitance
 """
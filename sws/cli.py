@@ -11,7 +11,9 @@ usage : str
 
 # Python Standard library
 import sys                        # Used to check number of arguments
+import json                       # Used to print bulk results as NDJSON
 from pprint import pprint         # Used to pretty-print to command line
+from typing import Generator      # Used to provide useful typehints in functions
 
 # External Dependencies
 from docopt import docopt         # Used to parse CLI arguments
@@ -28,11 +30,15 @@ usage = """Super Web Scripts; A command line interface, API, and set of scripts
 
 Usage:
     sws [-h] [-v]
-    sws dns <domain>
+    sws dns <domain> [--profile=<profile>] [--nameservers=<ips>] [--tcp] [--no-cache] [--format=<format>] [--watch] [--stats]
+    sws dns --input=<file> [--profile=<profile>] [--nameservers=<ips>] [--tcp] [--no-cache] [--format=<format>] [--watch] [--stats]
+    sws dns --reverse=<cidr> [--nameservers=<ips>] [--tcp] [--no-cache] [--format=<format>] [--stats]
     sws youtube <url> [<path>]
-    sws ssl <hostname> [-e] [-c]
+    sws ssl <hostname> [-e] [-c] [--endpoints] [--ports=<ports>] [--ocsp] [--no-cache]
+    sws ssl --input=<file> [--strict] [--ocsp] [--no-cache]
     sws redirects <url> [<ignored>]
-    sws domains <domain> [-e] [-r] [-d] [-a]
+    sws domains <domain> [-e] [-r] [-d] [-a] [--rdap] [--no-cache]
+    sws domains --input=<file> -a [--prefilter] [--nameservers=<ips>] [--rdap] [--no-cache]
     
 
 Options:
@@ -43,17 +49,54 @@ Options:
     -r --registrar          Tells you who the domain is registered through
     -d --details            If specified will show full domain details
     -a --available          Gives information on whether a specific domain is available
+    -i --input=<file>       A file with one domain/hostname per line to process in bulk (- for stdin), results are printed as NDJSON
+    --reverse=<cidr>        Resolve the PTR records of every address in an IPv4/IPv6 range (i.e. 192.0.2.0/24), results are printed as NDJSON
+    --endpoints             Handshake with every A/AAAA address of the hostname and flag any that serve a different cert
+    --ports=<ports>         Check the certs on a comma separated list of ports (i.e. 465,587,993 or 2525/smtp), or common for 25,110,143,443,465,587,993,995,8443; STARTTLS is used on 25/587 (smtp), 143 (imap) and 110 (pop3)
+    --ocsp                  Check whether the cert(s) have been revoked with their issuer's OCSP responder
+    --strict                Do a handshake for every hostname in --input, instead of reusing the cert of another hostname on the same IP that covers it
+    --prefilter             Only query WHOIS for domains in --input that don't have NS/SOA records in DNS
+    --rdap                  Look domains up with RDAP (structured JSON over HTTPS) instead of WHOIS
+    --no-cache              Ignore (and don't update) the on-disk cache of DNS answers/SSL certs/OCSP statuses/WHOIS results
+    --profile=<profile>     Which DNS records to query; web, mail, dnssec, all or a comma separated list of record types (defaults to all, or web with --watch)
+    --nameservers=<ips>     A comma separated list of nameserver IP's to query instead of the system's nameservers
+    --tcp                   Send DNS queries over (persistent) TCP connections instead of UDP
+    --format=<format>       How to print DNS records; markdown, plain or ndjson (defaults to markdown for one domain, ndjson for --input and --reverse)
+    --stats                 Print the latency and outcome (success, nxdomain, noanswer, timeout, error) of DNS queries per record type and nameserver when finished
+    --watch                 Keep re-querying DNS records as their TTL's expire and print only the changes (ctrl+c to stop)
 """
 
 command_list = [  # Used for autocompletion generation
-    command("dns", []),
+    command("dns", ["-i", "--input", "--reverse", "--no-cache", "--profile", "--nameservers", "--tcp", "--format", "--watch", "--stats"]),
     command("youtube", []),
-    command("ssl", ["-e", "--expiry", "-c", "--cert"]),
+    command("ssl", ["-e", "--expiry", "-c", "--cert", "--endpoints", "--ports", "-i", "--input", "--strict", "--ocsp", "--no-cache"]),
     command("redirects", []),
-    command("domains", ["-e", "--expiry", "-r", "--registrar", "-d", "--details", "-a", "--available"]),
+    command("domains", ["-e", "--expiry", "-r", "--registrar", "-d", "--details", "-a", "--available", "-i", "--input", "--prefilter", "--nameservers", "--rdap", "--no-cache"]),
 ]
 
 
+def _read_targets(path: str) -> Generator[str, None, None]:
+    """Lazily reads the domains/hostnames out of a file for bulk commands
+
+    Parameters
+    ----------
+    path : str
+        The path to a file with one domain/hostname per line, or - to read from stdin;
+        blank lines and lines starting with # are skipped
+
+    Yields
+    ------
+    str
+        Each domain/hostname in the file
+    """
+    target_file = sys.stdin if path == "-" else open(path, "r")
+    with target_file:
+        for line in target_file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
 def main():
     """Primary entrypoint for the sws script."""
     args = docopt(usage, version="sws V0.2.0")  # Grab arguments for parsing
@@ -71,17 +114,106 @@ def main():
         sys.exit()
 
     if args["dns"]:
-        dns_dict = get_dns_records(args['<domain>'], as_dict=True)
-        print(dns_result_table(args['<domain>'], dns_dict))
+        cache = None if args["--no-cache"] else DNSCache(path=DNS_CACHE_PATH)
+        nameservers = args["--nameservers"].split(",") if args["--nameservers"] else None
+        stats = DNSStats() if args["--stats"] else None
+        resolver = DNSResolver(nameservers=nameservers, tcp=args["--tcp"], hooks=[stats] if stats is not None else None)
+        profile = args["--profile"] or ("web" if args["--watch"] else "all")  # Watching every record type would re-query ~70 types per domain
+        try:
+            if args["--watch"]:  # Print changes as records expire until interrupted
+                domains = list(_read_targets(args["--input"])) if args["--input"] else [args['<domain>']]
+                with DNSWatcher(domains, profile=profile, resolver=resolver) as watcher:
+                    print(f"Watching {len(domains)} domain(s) for DNS changes, press ctrl+c to stop...", file=sys.stderr)
+                    for change in watcher.watch():
+                        print(json.dumps(change.as_dict()) if args["--format"] == "ndjson" else change, flush=True)
+            elif args["--reverse"]:  # Stream the PTR records of a range as they're answered
+                output_format = args["--format"] or "ndjson"
+                results = reverse_dns_sweep(args["--reverse"], resolver=resolver, cache=cache)
+                if output_format == "ndjson":
+                    for result in results:
+                        print(json.dumps(result), flush=True)
+                else:
+                    rows = ((result["address"], [RecordSet("PTR", 0, result["names"])] if result["names"] else [RecordSet("ERROR", 0, [result["error"]])]) for result in results)
+                    write_dns_table(rows, style=output_format, widths=(39, 11, DNS_TABLE_MAX_WIDTH))
+            elif args["--input"]:  # If -i or --input is specified
+                output_format = args["--format"] or "ndjson"
+                results = bulk_dns_records(_read_targets(args["--input"]), profile=profile, cache=cache, resolver=resolver, as_record_sets=output_format != "ndjson")
+                if output_format == "ndjson":
+                    for result in results:
+                        print(json.dumps(result), flush=True)
+                else:  # Stream a combined table with fixed widths so rows print as domains finish
+                    rows = ((result["domain"], result["records"] or [RecordSet("ERROR", 0, [result["error"]])]) for result in results)
+                    write_dns_table(rows, style=output_format, widths=(40, 11, DNS_TABLE_MAX_WIDTH))
+            else:
+                dns_dict = get_dns_records(args['<domain>'], as_dict=True, profile=profile, cache=cache, resolver=resolver)
+                if args["--format"] == "ndjson":
+                    print(json.dumps({"domain": args['<domain>'], "records": dns_dict, "error": None}))
+                else:
+                    print(dns_result_table(args['<domain>'], dns_dict, style=args["--format"] or "markdown"))
+        except ValueError as e:
+            print(e)
+        except KeyboardInterrupt:
+            ...  # Stopping a --watch
+        finally:
+            if stats is not None:  # Printed to stderr so NDJSON output stays parsable
+                print(f"\n{stats.summary()}", file=sys.stderr)
+            resolver.close()
+            if cache is not None:
+                cache.close()
 
     elif args["ssl"]:  # Begin parsing for ssl subcommand
-        if args["--expiry"]:  # If -e or --expiry is specified
-            print(f"SSL cert on domain {args['<hostname>']} Expires on: {check_ssl_expiry(args['<hostname>'])}")
-        if args["--cert"]:  # If -c or --cert is specified
-            pprint(get_ssl_cert(args['<hostname>']))
-        if not (args["--expiry"] or args["--cert"]):
+        if not (args["--input"] or args["--expiry"] or args["--cert"] or args["--endpoints"] or args["--ports"] or args["--ocsp"]):
             print(usage)
             sys.exit()
+        cache = None if args["--no-cache"] else SSLCache(path=SSL_CACHE_PATH)
+        ocsp_cache = None if args["--no-cache"] or not args["--ocsp"] else OCSPCache(path=OCSP_CACHE_PATH)
+        ocsp = OCSPChecker(cache=ocsp_cache) if args["--ocsp"] else None
+        try:
+            if args["--input"]:  # If -i or --input is specified
+                for result in bulk_ssl_certs(_read_targets(args["--input"]), cache=cache, strict=args["--strict"], ocsp=ocsp):
+                    print(json.dumps(result), flush=True)
+            else:
+                if args["--endpoints"]:  # Compare the cert served by every address
+                    report = check_ssl_consistency(args['<hostname>'])
+                    for endpoint in report["endpoints"]:
+                        flag = "MISMATCH" if endpoint["address"] in report["mismatched"] else ""
+                        print(f"{endpoint['address']:<39}  {endpoint['fingerprint'] or endpoint['error']}  {endpoint['expiry'] or ''}  {flag}".rstrip())
+                    if report["consistent"]:
+                        print(f"All {len(report['endpoints'])} addresses of {args['<hostname>']} serve the same cert")
+                    elif report["mismatched"]:
+                        print(f"The addresses of {args['<hostname>']} serve {len(report['fingerprints'])} different certs")
+                    else:
+                        print(f"Not every address of {args['<hostname>']} could be probed")
+                if args["--ports"]:  # Check every port at once
+                    ports = SSL_SCAN_PORTS if args["--ports"] == "common" else args["--ports"].split(",")
+                    report = scan_tls_ports(args['<hostname>'], ports, cache=cache)
+                    for result in report["ports"]:
+                        print(f"{result['port']:<6}  {result['starttls'] or 'tls':<5}  {result['expiry'] or result['error']}")
+                    if report["expiry"]:
+                        print(f"First cert on {args['<hostname>']} expires on: {report['expiry']} ({report['days_remaining']} days)")
+                    else:
+                        print(f"No port on {args['<hostname>']} could be checked")
+                if args["--expiry"] or args["--cert"] or args["--ocsp"]:
+                    profile = probe_tls(args['<hostname>'], cache=cache)  # One handshake for every flag
+                    if args["--expiry"]:  # If -e or --expiry is specified
+                        print(f"SSL cert on domain {args['<hostname>']} Expires on: {profile.cert['notAfter']} ({profile.days_remaining} days)")
+                    if args["--cert"]:  # If -c or --cert is specified
+                        pprint(profile.cert)
+                    if args["--ocsp"]:  # Check the cert hasn't been revoked
+                        status = ocsp.check([profile])[0]
+                        if status.status == "revoked":
+                            print(f"SSL cert on domain {args['<hostname>']} was revoked on: {status.revoked_at} ({status.reason or 'no reason given'})")
+                        elif status.status == "error":
+                            print(f"Unable to check the revocation status of {args['<hostname>']}: {status.error}")
+                        else:
+                            print(f"OCSP status of the SSL cert on domain {args['<hostname>']}: {status.status} (next update {status.next_update})")
+        except ValueError as e:
+            print(e)
+        finally:
+            if cache is not None:
+                cache.close()
+            if ocsp_cache is not None:
+                ocsp_cache.close()
 
     elif args["redirects"]:  # Begin parsing for redirects subcommand
         if args["<ignored>"]:
@@ -96,7 +228,25 @@ def main():
         download(args["<url>"], args["<path>"])
 
     elif args["domains"]:  # Begin parsing for ssl subcommand
-        domain_details = get_domain_info(args["<domain>"])
+        cache = None if args["--no-cache"] else WHOISCache(path=WHOIS_CACHE_PATH)
+        client = RDAPClient() if args["--rdap"] else None
+        if args["--input"]:  # Check every domain in the file, printing NDJSON as each finishes
+            try:
+                resolver = DNSResolver(nameservers=args["--nameservers"].split(",")) if args["--nameservers"] else None
+                for result in bulk_domain_availability(_read_targets(args["--input"]), cache=cache, client=client, fallback=True, prefilter=args["--prefilter"], resolver=resolver):
+                    print(json.dumps(result), flush=True)
+            finally:
+                if cache is not None:
+                    cache.close()
+            sys.exit()
+        try:
+            domain_details = get_domain_info(args["<domain>"], client=client, fallback=True, cache=cache)  # Only runs the whois binary if the WHOIS server can't be reached
+        except (ValueError, OSError) as e:
+            print(e)
+            sys.exit(1)
+        finally:
+            if cache is not None:
+                cache.close()
 
         if args["--expiry"]:  # If -e or --expiry is specified
             expiry_date = domain_details["expiration_date"]
@@ -0,0 +1,128 @@
+"""Helpers for running network probes concurrently, shared by the bulk functions in sws
+
+Examples
+--------
+### Fetching a lot of pages with at most 8 requests in flight
+```
+import requests
+
+from sws.concurrency import imap_unordered
+
+for url, future in imap_unordered(requests.get, ["https://kieranwood.ca", "https://google.ca"], max_workers=8):
+    print(url, future.result().status_code) # https://kieranwood.ca 200
+```
+
+### Sending at most 2 requests a second (with bursts of up to 5) from any number of threads
+```
+import requests
+
+from sws.concurrency import TokenBucket
+
+bucket = TokenBucket(rate=2, burst=5)
+for url in ["https://kieranwood.ca"] * 10:
+    bucket.acquire()
+    print(requests.get(url).status_code) # 200
+```
+"""
+# Standard Library Dependencies
+import time                                 # Used to refill token buckets
+import threading                            # Used to share token buckets between threads
+from itertools import islice                # Used to lazily pull items as slots free up
+from typing import Any, Callable, Generator, Iterable, Tuple # Used to provide useful typehints in functions
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait # Used to run calls concurrently
+
+
+def imap_unordered(function:Callable[[Any], Any], items:Iterable[Any], max_workers:int) -> Generator[Tuple[Any, Future], None, None]:
+    """Runs function over items on a thread pool, keeping at most max_workers calls in flight
+
+    Notes
+    -----
+    - items is consumed lazily, so memory stays flat for huge (or endless) inputs
+    - Exceptions raised by function are left in the futures, so one failed item doesn't stop the rest
+
+    Parameters
+    ----------
+    function : Callable[[Any], Any]
+        The function to call with each item
+
+    items : Iterable[Any]
+        The items to pass to function, only pulled from as slots in the pool free up
+
+    max_workers : int
+        The maximum number of calls in flight at once
+
+    Yields
+    ------
+    Tuple[Any, Future]
+        The item and the finished future of its call, in the order calls finish
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {executor.submit(function, item): item for item in islice(items, max_workers)}
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                for next_item in islice(items, 1): # Refill the freed slot
+                    in_flight[executor.submit(function, next_item)] = next_item
+                yield item, future
+
+
+class TokenBucket:
+    """Limits how often something happens (i.e. queries to one server) to rate times a second, allowing bursts of up to burst at once
+
+    Attributes
+    ----------
+    rate : float
+        How many tokens are added each second
+
+    burst : int
+        The most tokens the bucket holds, so the most acquire() calls that can happen at once after a quiet period
+
+    Notes
+    -----
+    - A bucket can safely be shared between threads, acquire() blocks until it's thread's token is available
+    - pause() empties the bucket and stops it refilling for a while, i.e. to back off from a server that's throttling
+    """
+    def __init__(self, rate:float, burst:int=1):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"A token bucket needs a positive rate and a burst of at least 1, got rate={rate} and burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"TokenBucket(rate={self.rate}, burst={self.burst})"
+
+    def acquire(self) -> float:
+        """Takes a token, waiting for one to be added if the bucket is empty (or paused)
+
+        Returns
+        -------
+        float
+            How long (in seconds) the call waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.burst, self._tokens + (now - max(self._updated, self._paused_until)) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+                else:
+                    delay = self._paused_until - now
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds:float):
+        """Empties the bucket and stops it refilling for seconds (or longer if it's already paused for longer)"""
+        with self._lock:
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
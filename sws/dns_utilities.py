@@ -14,14 +14,77 @@ print(get_dns_records("kieranwood.ca", as_dict=True)) # {'A': ['104.21.47.45', '
 ```
 """
 # Standard Library Dependencies
+import os                                   # Used to find the default cache location
+import socket                               # Used to open persistent TCP connections to nameservers
+import json                                 # Used to serialize cached answers
+import sys                                  # Used to write tables to stdout by default
 import logging                              # Used for logging
-from math import floor, ceil                # Used to normalize padding
-from typing import Dict, List, Tuple, Union # Used to provide useful typehints in functions
+import sqlite3                              # Used to persist cached answers
+import bisect                               # Used to bucket query latencies
+import heapq                                # Used to schedule record refreshes in watch mode
+import ipaddress                            # Used to expand CIDR ranges for reverse sweeps
+import threading                            # Used to share caches between threads
+import time                                 # Used to enforce sweep deadlines and TTLs
+from collections import OrderedDict         # Used to evict cached answers in LRU order
+from typing import Any, Callable, Dict, FrozenSet, Generator, Iterable, List, Optional, TextIO, Tuple, Union # Used to provide useful typehints in functions
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait # Used to query record types concurrently
 
 # Third Party Library Dependencies
+import dns.name         # Used to build queries
+import dns.query        # Used to send queries to nameservers
+import dns.rcode        # Used to interpret responses
+import dns.message      # Used to build queries and read negative answers
 import dns.resolver     # Used to get domain information
+import dns.reversename  # Used to build PTR names for reverse sweeps
+import dns.exception    # Used to catch failed queries
+import dns.rdataclass   # Used to build answers
 import dns.rdatatype    # Used to determine record types
 
+# Internal Dependencies
+from sws.concurrency import imap_unordered # Used to run bulk sweeps on a bounded pool
+
+# How long (in seconds) a single record type query can take before it's given up on
+DNS_QUERY_LIFETIME:float = 4.5
+
+# The upper bounds (in seconds) of the latency histogram buckets kept by DNSStats
+DNS_LATENCY_BUCKETS:Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# How long (in seconds) a DNSResolver waits on a single nameserver by default before trying the next one
+DNS_QUERY_TIMEOUT:float = 2.0
+
+# How many extra passes over the nameservers a DNSResolver makes by default
+DNS_QUERY_RETRIES:int = 1
+
+# The EDNS UDP buffer size a DNSResolver advertises by default (the DNS flag day 2020 recommendation)
+DNS_EDNS_PAYLOAD:int = 1232
+
+# How many record types are queried at the same time by default
+DNS_MAX_WORKERS:int = 32
+
+# How long (in seconds) a full sweep of a domain can take by default
+DNS_SWEEP_TIMEOUT:float = 15
+
+# How many domains are swept at the same time by default in bulk_dns_records()
+DNS_MAX_DOMAINS:int = 8
+
+# How many answers a DNSCache holds in memory by default
+DNS_CACHE_SIZE:int = 10_000
+
+# The widest a cell in a DNS table can be by default before it's truncated
+DNS_TABLE_MAX_WIDTH:int = 80
+
+# The maximum number of PTR queries a reverse_dns_sweep() has in flight at once by default
+DNS_REVERSE_MAX_WORKERS:int = 128
+
+# The soonest (in seconds) a DNSWatcher re-queries a record by default, even if it's TTL is shorter
+DNS_WATCH_MIN_INTERVAL:float = 30
+
+# The longest (in seconds) a DNSWatcher goes without re-querying a record by default, even if it's TTL is longer
+DNS_WATCH_MAX_INTERVAL:float = 3600
+
+# Where the sws cli persists its DNS answers between runs
+DNS_CACHE_PATH:str = os.path.join(os.path.expanduser("~"), ".sws", "dns_cache.sqlite")
+
 # Includes deprecated record types (more canonical)
 RECORD_TYPES = dns.rdatatype.RdataType
 
@@ -91,24 +154,919 @@ RECORD_TYPES_TUPLE:Tuple[str] = (
     'DLV',
 )
 
+# Record types that can't be answered by a normal query; meta types (OPT, AXFR, IXFR, MAILA, etc.), the reserved TYPE0 and MD/MF (obsoleted by RFC 973)
+_UNQUERYABLE_RECORD_TYPES:Tuple[str] = tuple(record_type.name for record_type in RECORD_TYPES if dns.rdatatype.is_metatype(record_type)) + ('TYPE0', 'MD', 'MF')
+
+# Named sets of record types that can be passed as the profile of a sweep, so callers only pay for the types they need
+RECORD_PROFILES:Dict[str, Tuple[str]] = {
+    "web": ('A', 'AAAA', 'CNAME', 'DNAME', 'HTTPS', 'SVCB', 'CAA', 'NS', 'SOA', 'TXT'),
+    "mail": ('MX', 'TXT', 'SPF', 'SRV', 'TLSA'),
+    "dnssec": ('DNSKEY', 'CDNSKEY', 'DS', 'CDS', 'RRSIG', 'NSEC', 'NSEC3', 'NSEC3PARAM'),
+    "all": tuple(record_type.name for record_type in RECORD_TYPES if record_type.name not in _UNQUERYABLE_RECORD_TYPES),
+}
+
+
+class RecordSet:
+    """A compact, read-only set of records of one type on a domain (an RRset)
+
+    Attributes
+    ----------
+    rdtype : str
+        The name of the record type (i.e. 'A')
+
+    ttl : int
+        How long (in seconds) the records are valid for
+
+    values : Tuple[str, ...]
+        The text of each record
+
+    Notes
+    -----
+    - Uses `__slots__` so bulk scans holding millions of record sets don't pay for a `__dict__` per instance
+    - `value` and `as_lines()` give the same shapes `get_dns_records()` returns, for callers that expect those
+
+    Examples
+    --------
+    ### Getting the A records of a domain
+    ```
+    from sws.dns_utilities import get_record_sets
+
+    for record_set in get_record_sets("kieranwood.ca", profile="A,NS"):
+        print(record_set.rdtype, record_set.ttl, record_set.values) # A 300 ('104.21.47.45', '172.67.144.116')
+    ```
+    """
+    __slots__ = ("rdtype", "ttl", "values")
+
+    def __init__(self, rdtype:str, ttl:int, values:Iterable[str]):
+        self.rdtype = rdtype
+        self.ttl = ttl
+        self.values = tuple(values)
+
+    def __repr__(self) -> str:
+        return f"RecordSet(rdtype={self.rdtype!r}, ttl={self.ttl}, values={self.values})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RecordSet):
+            return NotImplemented
+        return (self.rdtype, self.ttl, self.values) == (other.rdtype, other.ttl, other.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    @classmethod
+    def from_value(cls, rdtype:str, value:Union[str, List[str]], ttl:int=0) -> "RecordSet":
+        """Creates a RecordSet from a value in a get_dns_records(as_dict=True) dictionary
+
+        Parameters
+        ----------
+        rdtype : str
+            The name of the record type (i.e. 'A')
+
+        value : Union[str, List[str]]
+            The record value, or list of values
+
+        ttl : int, optional
+            How long (in seconds) the records are valid for, by default 0 since the dictionaries don't include it
+
+        Returns
+        -------
+        RecordSet
+            The record set holding the value(s)
+        """
+        return cls(rdtype, ttl, (value,) if isinstance(value, str) else value)
+
+    @property
+    def value(self) -> Union[str, List[str]]:
+        """The records in the shape of a get_dns_records(as_dict=True) value; a string for one record, or a list for several"""
+        if self.rdtype == "HTTPS":
+            return self.values[-1].split(" ")[2:] # Remove 1 . from entries
+        if len(self.values) == 1:
+            return self.values[0]
+        return list(self.values)
+
+    def as_lines(self) -> List[str]:
+        """The records in the shape of get_dns_records(as_dict=False) entries (i.e. ['A: 127.0.0.1'])"""
+        return [f"{self.rdtype}: {value}" for value in self.values]
+
+
+class DNSCache:
+    """A TTL-aware cache of DNS answers keyed on (domain, record type)
+
+    Attributes
+    ----------
+    max_size : int
+        The maximum number of answers held in memory, the least recently used answer is evicted past this
+
+    path : Optional[str]
+        The path to a SQLite file that answers are persisted to, or None to only cache in memory
+
+    hits : int
+        How many lookups were answered from the cache
+
+    misses : int
+        How many lookups were not in the cache (or had expired)
+
+    Notes
+    -----
+    - Answers are only reused until their RRset's TTL runs out
+    - Negative answers (NXDOMAIN and NoAnswer) are cached using the SOA minimum from the response (RFC 2308),
+    if the response had no SOA the negative answer is not cached
+    - A single cache can safely be shared between threads, and between sweeps/bulk jobs
+    - When a path is provided, answers survive between processes (i.e. repeated `sws dns` calls)
+
+    Examples
+    --------
+    ### Reusing answers between sweeps
+    ```
+    from sws.dns_utilities import DNSCache, get_dns_records
+
+    cache = DNSCache()
+    get_dns_records("kieranwood.ca", cache=cache) # Queries every record type
+    get_dns_records("kieranwood.ca", cache=cache) # Answered from the cache until the TTLs expire
+    print(cache.hits, cache.misses)
+    ```
+
+    ### Persisting answers between processes
+    ```
+    from sws.dns_utilities import DNSCache, get_dns_records
+
+    with DNSCache(path="dns_cache.sqlite") as cache:
+        get_dns_records("kieranwood.ca", cache=cache)
+    ```
+    """
+    def __init__(self, max_size:int=DNS_CACHE_SIZE, path:Optional[str]=None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._answers = OrderedDict() # (domain, record_type) -> (expires, values, nxdomain)
+        self._lock = threading.Lock()
+        self._database = None
+        if path:
+            logging.info(f"Opening DNS cache database at {path}")
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._database = sqlite3.connect(path, check_same_thread=False)
+            self._database.execute("CREATE TABLE IF NOT EXISTS answers (domain TEXT, record_type TEXT, expires REAL, record_values TEXT, nxdomain INTEGER, PRIMARY KEY (domain, record_type))")
+            self._database.execute("DELETE FROM answers WHERE expires <= ?", (time.time(),))
+            self._database.commit()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_details):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DNSCache(max_size={self.max_size}, path={self.path}) with {len(self)} answers, {self.hits} hits and {self.misses} misses"
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that were answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, domain:str, record_type:str) -> Optional[Tuple[Tuple[str, ...], bool]]:
+        """Looks up an unexpired answer
+
+        Parameters
+        ----------
+        domain : str
+            The domain that was queried
+
+        record_type : str
+            The name of the record type that was queried (i.e. 'A')
+
+        Returns
+        -------
+        Optional[Tuple[Tuple[str, ...], bool]]
+            None if there is no unexpired answer, otherwise the text of each record
+            (empty for negative answers) and whether the answer was an NXDOMAIN
+        """
+        entry = self._lookup(domain, record_type)
+        if entry is None:
+            return None
+        return entry[1], entry[2]
+
+    def get_record_set(self, domain:str, record_type:str) -> Optional[Tuple[RecordSet, bool]]:
+        """Looks up an unexpired answer as a RecordSet, with it's TTL set to the time it has left in the cache
+
+        Parameters
+        ----------
+        domain : str
+            The domain that was queried
+
+        record_type : str
+            The name of the record type that was queried (i.e. 'A')
+
+        Returns
+        -------
+        Optional[Tuple[RecordSet, bool]]
+            None if there is no unexpired answer, otherwise the answer (with no values for negative answers)
+            and whether the answer was an NXDOMAIN
+        """
+        entry = self._lookup(domain, record_type)
+        if entry is None:
+            return None
+        return RecordSet(record_type, max(0, int(entry[0] - time.time())), entry[1]), entry[2]
+
+    def put(self, domain:str, record_type:str, values:Iterable[str], ttl:float, nxdomain:bool=False):
+        """Caches an answer for ttl seconds
+
+        Parameters
+        ----------
+        domain : str
+            The domain that was queried
+
+        record_type : str
+            The name of the record type that was queried (i.e. 'A')
+
+        values : Iterable[str]
+            The text of each record in the answer, empty for negative answers
+
+        ttl : float
+            How long (in seconds) the answer is valid for, answers with a ttl of 0 or less are not cached
+
+        nxdomain : bool, optional
+            Whether the answer was an NXDOMAIN, by default False
+        """
+        if ttl <= 0:
+            return
+        key = (domain.lower().rstrip("."), record_type)
+        entry = (time.time() + ttl, tuple(values), nxdomain)
+        with self._lock:
+            self._remember(key, entry)
+            if self._database is not None:
+                self._database.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)", (*key, entry[0], json.dumps(entry[1]), int(nxdomain)))
+                self._database.commit()
+
+    def clear(self):
+        """Removes every answer from the cache (including any persisted answers)"""
+        with self._lock:
+            self._answers.clear()
+            if self._database is not None:
+                self._database.execute("DELETE FROM answers")
+                self._database.commit()
+
+    def close(self):
+        """Closes the cache database if there is one, the in-memory answers are still usable"""
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
+    def _lookup(self, domain:str, record_type:str) -> Optional[Tuple[float, Tuple[str, ...], bool]]:
+        """Finds the unexpired (expires, values, nxdomain) entry for a query, and counts the hit or miss"""
+        key = (domain.lower().rstrip("."), record_type)
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is None and self._database is not None:
+                row = self._database.execute("SELECT expires, record_values, nxdomain FROM answers WHERE domain = ? AND record_type = ?", key).fetchone()
+                if row:
+                    entry = (row[0], tuple(json.loads(row[1])), bool(row[2]))
+                    self._remember(key, entry)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return None
+            self._answers.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _remember(self, key:Tuple[str, str], entry:Tuple[float, Tuple[str, ...], bool]):
+        """Stores an entry in memory and evicts the least recently used entries past max_size, must hold self._lock"""
+        self._answers[key] = entry
+        self._answers.move_to_end(key)
+        while len(self._answers) > self.max_size:
+            self._answers.popitem(last=False)
+
+
+class DNSResolver:
+    """A configurable resolver that is reused for every query in a sweep or bulk job
+
+    Attributes
+    ----------
+    nameservers : List[str]
+        The IP addresses of the nameservers to query, in order of preference
+
+    port : int
+        The port the nameservers listen on
+
+    tcp : bool
+        Whether to send every query over TCP instead of UDP (UDP answers that come back truncated are always retried over TCP)
+
+    timeout : float
+        How long (in seconds) to wait for a single nameserver to answer before trying the next one
+
+    retries : int
+        How many extra passes over the nameservers to make before giving up
+
+    edns_payload : int
+        The EDNS UDP buffer size to advertise, or 0 to not use EDNS
+
+    persistent : bool
+        Whether TCP connections to the nameservers are kept open and reused between queries
+
+    hooks : List[Callable[[QueryEvent], None]]
+        Functions called with a QueryEvent after every query (i.e. a DNSStats), see add_hook()
+
+    Notes
+    -----
+    - If no nameservers are provided the system's configured nameservers (i.e. /etc/resolv.conf) are used
+    - A single resolver can safely be shared between threads, each thread borrows its own TCP connection from the pool
+    - Raises the same exceptions as `dns.resolver.resolve()` (NXDOMAIN, NoAnswer, Timeout, NoNameservers)
+
+    Examples
+    --------
+    ### Sweeping a domain against specific nameservers over persistent TCP connections
+    ```
+    from sws.dns_utilities import DNSResolver, get_dns_records
+
+    with DNSResolver(nameservers=["1.1.1.1", "8.8.8.8"], tcp=True) as resolver:
+        print(get_dns_records("kieranwood.ca", as_dict=True, resolver=resolver)) # {'A': ['104.21.47.45', '172.67.144.116'], 'NS': ...}
+    ```
+
+    ### Timing every query in a sweep
+    ```
+    from sws.dns_utilities import DNSResolver, get_dns_records
+
+    with DNSResolver(hooks=[print]) as resolver:
+        get_dns_records("kieranwood.ca", resolver=resolver) # QueryEvent(domain='kieranwood.ca.', rdtype='A', outcome='success', latency=0.0123, nameserver='1.1.1.1', error=None) ...
+    ```
+    """
+    def __init__(self, nameservers:Optional[Iterable[str]]=None, port:Optional[int]=None, tcp:bool=False, timeout:float=DNS_QUERY_TIMEOUT, retries:int=DNS_QUERY_RETRIES, edns_payload:int=DNS_EDNS_PAYLOAD, persistent:bool=True, hooks:Optional[Iterable[Callable[["QueryEvent"], None]]]=None):
+        if nameservers is None: # Fall back to the system configuration
+            system_resolver = dns.resolver.get_default_resolver()
+            nameservers = [str(nameserver) for nameserver in system_resolver.nameservers]
+            port = port or system_resolver.port
+        self.nameservers = list(nameservers)
+        self.port = port or 53
+        self.tcp = tcp
+        self.timeout = timeout
+        self.retries = retries
+        self.edns_payload = edns_payload
+        self.persistent = persistent
+        self.hooks = list(hooks or [])
+        self._connections = {nameserver: [] for nameserver in self.nameservers} # Idle TCP connections to each nameserver
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_details):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DNSResolver(nameservers={self.nameservers}, port={self.port}, tcp={self.tcp}, timeout={self.timeout}, retries={self.retries}, edns_payload={self.edns_payload}, persistent={self.persistent})"
+
+    def resolve(self, domain:str, record_type:Union[str, dns.rdatatype.RdataType], lifetime:float=DNS_QUERY_LIFETIME) -> dns.resolver.Answer:
+        """Queries the nameservers for a record type on a domain
+
+        Parameters
+        ----------
+        domain : str
+            The domain to query
+
+        record_type : Union[str, dns.rdatatype.RdataType]
+            The record type to query
+
+        lifetime : float, optional
+            The total time (in seconds) the query can take across every nameserver and retry, by default DNS_QUERY_LIFETIME
+
+        Returns
+        -------
+        dns.resolver.Answer
+            The answer, with the nameserver that answered in it's nameserver attribute
+
+        Raises
+        ------
+        dns.resolver.NXDOMAIN
+            If the domain does not exist
+
+        dns.resolver.NoAnswer
+            If the domain exists but has no records of record_type
+
+        dns.exception.Timeout
+            If no nameserver answered within the lifetime
+
+        dns.resolver.NoNameservers
+            If every nameserver failed to answer (i.e. SERVFAIL or REFUSED)
+        """
+        qname = dns.name.from_text(domain)
+        record_type = dns.rdatatype.RdataType.make(record_type)
+        if not self.hooks:
+            return self._resolve(qname, record_type, lifetime, [])
+        attempted = [] # The nameservers tried, in order
+        start = time.monotonic()
+        try:
+            answer = self._resolve(qname, record_type, lifetime, attempted)
+        except Exception as e:
+            self._emit(QueryEvent(qname.to_text(), record_type.name, _query_outcome(e), time.monotonic() - start, attempted[-1] if attempted else None, repr(e)))
+            raise
+        self._emit(QueryEvent(qname.to_text(), record_type.name, "success", time.monotonic() - start, answer.nameserver))
+        return answer
+
+    def add_hook(self, hook:Callable[["QueryEvent"], None]):
+        """Registers a function to be called with a QueryEvent after every query
+
+        Parameters
+        ----------
+        hook : Callable[[QueryEvent], None]
+            The function to call, it's called on the thread that sent the query so it should be quick and thread safe
+        """
+        self.hooks.append(hook)
+
+    def close(self):
+        """Closes every idle TCP connection, connections in use are closed when their query finishes"""
+        with self._lock:
+            self._closed = True
+            for connections in self._connections.values():
+                for connection in connections:
+                    connection.close()
+                connections.clear()
+
+    def _resolve(self, qname:dns.name.Name, record_type:dns.rdatatype.RdataType, lifetime:float, attempted:List[str]) -> dns.resolver.Answer:
+        """Sends the query for resolve(), adding each nameserver to attempted as it's tried"""
+        query = dns.message.make_query(qname, record_type, use_edns=0 if self.edns_payload else False, payload=self.edns_payload or None)
+        deadline = time.monotonic() + lifetime
+        errors = []
+        for _ in range(self.retries + 1):
+            for nameserver in self.nameservers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise dns.exception.Timeout(timeout=lifetime)
+                attempted.append(nameserver)
+                tcp = self.tcp
+                try:
+                    if tcp:
+                        response = self._query_tcp(query, nameserver, min(self.timeout, remaining))
+                    else:
+                        try:
+                            response = dns.query.udp(query, nameserver, timeout=min(self.timeout, remaining), port=self.port, ignore_unexpected=True, raise_on_truncation=True)
+                        except dns.message.Truncated: # Answer too big for UDP
+                            tcp = True
+                            response = self._query_tcp(query, nameserver, max(0.0, min(self.timeout, deadline - time.monotonic())))
+                except (dns.exception.Timeout, dns.exception.DNSException, OSError, EOFError) as e:
+                    errors.append((nameserver, tcp, self.port, e, None))
+                    continue
+
+                rcode = response.rcode()
+                if rcode == dns.rcode.NXDOMAIN:
+                    raise dns.resolver.NXDOMAIN(qnames=[qname], responses={qname: response})
+                if rcode != dns.rcode.NOERROR: # SERVFAIL, REFUSED etc. so try the next nameserver
+                    errors.append((nameserver, tcp, self.port, dns.rcode.to_text(rcode), response))
+                    continue
+                answer = dns.resolver.Answer(qname, record_type, dns.rdataclass.IN, response, nameserver, self.port)
+                if answer.rrset is None:
+                    raise dns.resolver.NoAnswer(response=response)
+                return answer
+        if errors and all(isinstance(error[3], dns.exception.Timeout) for error in errors):
+            raise dns.exception.Timeout(timeout=lifetime)
+        raise dns.resolver.NoNameservers(request=query, errors=errors)
+
+    def _emit(self, event:"QueryEvent"):
+        """Passes an event to every hook, a failing hook is logged instead of failing the query"""
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logging.info(f"DNS query hook {hook} failed with {repr(e)}")
+
+    def _query_tcp(self, query:dns.message.Message, nameserver:str, timeout:float) -> dns.message.Message:
+        """Sends a query over TCP, reusing an idle connection to the nameserver when persistent is set
+
+        Parameters
+        ----------
+        query : dns.message.Message
+            The query to send
+
+        nameserver : str
+            The IP address of the nameserver to send the query to
+
+        timeout : float
+            How long (in seconds) to wait for the answer
+
+        Returns
+        -------
+        dns.message.Message
+            The nameserver's response
+        """
+        deadline = time.monotonic() + timeout
+        connection = None
+        if self.persistent:
+            with self._lock:
+                if self._connections[nameserver]:
+                    connection = self._connections[nameserver].pop()
+        if connection is not None:
+            try:
+                response = dns.query.tcp(query, nameserver, timeout=timeout, port=self.port, sock=connection)
+            except (EOFError, ConnectionError): # Nameserver closed the idle connection, so reconnect
+                connection.close()
+                connection = None
+            except BaseException: # i.e. a timeout from a slow nameserver, which reconnecting wouldn't fix
+                connection.close()
+                raise
+        remaining = deadline - time.monotonic() # A reconnect only gets what's left of the timeout
+        if connection is None:
+            if remaining <= 0:
+                raise dns.exception.Timeout(timeout=timeout)
+            connection = socket.create_connection((nameserver, self.port), timeout=remaining)
+            connection.setblocking(False) # dnspython enforces the timeout itself, and expects a nonblocking socket
+            try:
+                response = dns.query.tcp(query, nameserver, timeout=remaining, port=self.port, sock=connection)
+            except BaseException:
+                connection.close()
+                raise
+        with self._lock:
+            if self.persistent and not self._closed:
+                self._connections[nameserver].append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+        return response
+
+
+class QueryEvent:
+    """What happened to a single query sent by a DNSResolver, passed to each of it's hooks
+
+    Attributes
+    ----------
+    domain : str
+        The (fully qualified) domain that was queried
+
+    rdtype : str
+        The name of the record type that was queried (i.e. 'A')
+
+    outcome : str
+        One of 'success', 'nxdomain', 'noanswer', 'timeout' or 'error' (every nameserver failed, i.e. SERVFAIL/REFUSED)
+
+    latency : float
+        How long (in seconds) the query took, including retries and failing over to other nameservers
+
+    nameserver : Optional[str]
+        The nameserver that answered (or the last one tried if none answered), None if none were tried
+
+    error : Optional[str]
+        A description of the exception raised for anything other than a success, otherwise None
+    """
+    __slots__ = ("domain", "rdtype", "outcome", "latency", "nameserver", "error")
+
+    def __init__(self, domain:str, rdtype:str, outcome:str, latency:float, nameserver:Optional[str], error:Optional[str]=None):
+        self.domain = domain
+        self.rdtype = rdtype
+        self.outcome = outcome
+        self.latency = latency
+        self.nameserver = nameserver
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"QueryEvent(domain={self.domain!r}, rdtype={self.rdtype!r}, outcome={self.outcome!r}, latency={self.latency:.4f}, nameserver={self.nameserver!r}, error={self.error!r})"
+
+
+class DNSStats:
+    """A DNSResolver hook that keeps latency histograms and outcome counts for every query
+
+    Attributes
+    ----------
+    buckets : Tuple[float, ...]
+        The upper bounds (in seconds) of the latency histogram buckets, the last bucket counts anything slower
+
+    latencies : Dict[str, List[int]]
+        The latency histogram for each record type, with a count for each bucket (plus one for anything slower)
+
+    outcomes : Dict[str, Dict[str, int]]
+        The count of each outcome ('success', 'nxdomain', 'noanswer', 'timeout', 'error') for each record type
+
+    nameservers : Dict[str, Dict[str, int]]
+        The count of each outcome for each nameserver that answered (or was last tried)
+
+    Examples
+    --------
+    ### Finding which record types slow down a sweep
+    ```
+    from sws.dns_utilities import DNSResolver, DNSStats, get_dns_records
+
+    stats = DNSStats()
+    with DNSResolver(hooks=[stats]) as resolver:
+        get_dns_records("kieranwood.ca", resolver=resolver)
+    print(stats.summary())
+    ```
+    """
+    def __init__(self, buckets:Iterable[float]=DNS_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.latencies = {}
+        self.outcomes = {}
+        self.nameservers = {}
+        self._total_latency = {}
+        self._max_latency = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event:QueryEvent):
+        bucket = bisect.bisect_left(self.buckets, event.latency)
+        with self._lock:
+            self.latencies.setdefault(event.rdtype, [0] * (len(self.buckets) + 1))[bucket] += 1
+            outcomes = self.outcomes.setdefault(event.rdtype, {})
+            outcomes[event.outcome] = outcomes.get(event.outcome, 0) + 1
+            nameserver = self.nameservers.setdefault(event.nameserver or "none", {})
+            nameserver[event.outcome] = nameserver.get(event.outcome, 0) + 1
+            self._total_latency[event.rdtype] = self._total_latency.get(event.rdtype, 0.0) + event.latency
+            self._max_latency[event.rdtype] = max(self._max_latency.get(event.rdtype, 0.0), event.latency)
 
-def get_dns_records(domain:str, as_dict:bool=False) -> Union[List[str], Dict[str, Union[str, List[str]]]]:
+    def __len__(self) -> int:
+        return sum(sum(histogram) for histogram in self.latencies.values())
+
+    def __repr__(self) -> str:
+        return f"DNSStats(queries={len(self)}, record_types={len(self.latencies)}, nameservers={len(self.nameservers)})"
+
+    def percentile(self, rdtype:str, percent:float) -> float:
+        """Estimates a latency percentile for a record type from it's histogram
+
+        Parameters
+        ----------
+        rdtype : str
+            The name of the record type (i.e. 'A')
+
+        percent : float
+            The percentile to estimate, between 0 and 100
+
+        Returns
+        -------
+        float
+            The upper bound of the bucket the percentile falls in, capped at the slowest query seen
+        """
+        histogram = self.latencies.get(rdtype)
+        if not histogram:
+            return 0.0
+        target = sum(histogram) * percent / 100
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if count and seen >= target:
+                return min(self.buckets[bucket], self._max_latency[rdtype]) if bucket < len(self.buckets) else self._max_latency[rdtype]
+        return self._max_latency[rdtype]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The stats as a JSON serializable dictionary, with a 'record_types' entry per record type and a 'nameservers' entry per nameserver"""
+        with self._lock:
+            record_types = {
+                rdtype: {
+                    "queries": sum(histogram),
+                    "mean": self._total_latency[rdtype] / sum(histogram),
+                    "max": self._max_latency[rdtype],
+                    "histogram": dict(zip([str(bucket) for bucket in self.buckets] + ["inf"], histogram)),
+                    "outcomes": dict(self.outcomes[rdtype]),
+                }
+                for rdtype, histogram in self.latencies.items()
+            }
+            return {"record_types": record_types, "nameservers": {nameserver: dict(outcomes) for nameserver, outcomes in self.nameservers.items()}}
+
+    def summary(self) -> str:
+        """A human-readable table of the latency and outcomes of each record type and nameserver, slowest record types first"""
+        outcome_names = ("success", "nxdomain", "noanswer", "timeout", "error")
+        stats = self.as_dict()
+        lines = [f"{'Record Type':<11}  {'Queries':>7}  {'Mean ms':>8}  {'p95 ms':>8}  {'Max ms':>8}  " + "  ".join(f"{outcome:>8}" for outcome in outcome_names)]
+        for rdtype, record_stats in sorted(stats["record_types"].items(), key=lambda item: item[1]["mean"], reverse=True):
+            lines.append(f"{rdtype:<11}  {record_stats['queries']:>7}  {record_stats['mean'] * 1000:>8.1f}  {self.percentile(rdtype, 95) * 1000:>8.1f}  {record_stats['max'] * 1000:>8.1f}  " + "  ".join(f"{record_stats['outcomes'].get(outcome, 0):>8}" for outcome in outcome_names))
+        lines.append("")
+        lines.append(f"{'Nameserver':<39}  " + "  ".join(f"{outcome:>8}" for outcome in outcome_names))
+        for nameserver, outcomes in sorted(stats["nameservers"].items()):
+            lines.append(f"{nameserver:<39}  " + "  ".join(f"{outcomes.get(outcome, 0):>8}" for outcome in outcome_names))
+        return "\n".join(lines)
+
+
+def _query_outcome(error:Exception) -> str:
+    """Classifies the exception raised by a query into a QueryEvent outcome"""
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        return "nxdomain"
+    if isinstance(error, dns.resolver.NoAnswer):
+        return "noanswer"
+    if isinstance(error, dns.exception.Timeout):
+        return "timeout"
+    return "error"
+
+
+class RecordChange:
+    """A change to the records of one type on a domain, found by a DNSWatcher
+
+    Attributes
+    ----------
+    domain : str
+        The domain that changed
+
+    rdtype : str
+        The name of the record type that changed (i.e. 'A')
+
+    added : Tuple[str, ...]
+        The text of each record that appeared
+
+    removed : Tuple[str, ...]
+        The text of each record that disappeared
+    """
+    __slots__ = ("domain", "rdtype", "added", "removed")
+
+    def __init__(self, domain:str, rdtype:str, added:Iterable[str], removed:Iterable[str]):
+        self.domain = domain
+        self.rdtype = rdtype
+        self.added = tuple(sorted(added))
+        self.removed = tuple(sorted(removed))
+
+    def __repr__(self) -> str:
+        return f"RecordChange(domain={self.domain!r}, rdtype={self.rdtype!r}, added={self.added}, removed={self.removed})"
+
+    def __str__(self) -> str:
+        changes = [f"+{value}" for value in self.added] + [f"-{value}" for value in self.removed]
+        return f"{self.domain} {self.rdtype} {' '.join(changes)}"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RecordChange):
+            return NotImplemented
+        return (self.domain, self.rdtype, self.added, self.removed) == (other.domain, other.rdtype, other.added, other.removed)
+
+    def as_dict(self) -> Dict[str, Union[str, List[str]]]:
+        """The change as a JSON serializable dictionary"""
+        return {"domain": self.domain, "rdtype": self.rdtype, "added": list(self.added), "removed": list(self.removed)}
+
+
+class DNSWatcher:
+    """Keeps the last known records of a set of domains, and re-queries each record type only when its TTL runs out
+
+    Attributes
+    ----------
+    domains : Tuple[str, ...]
+        The domains being watched
+
+    record_types : Tuple[dns.rdatatype.RdataType]
+        The record types being watched on each domain
+
+    min_interval : float
+        The soonest (in seconds) a record type is re-queried, even if it's TTL is shorter
+
+    max_interval : float
+        The longest (in seconds) a record type goes without being re-queried, even if it's TTL is longer
+
+    records : Dict[Tuple[str, str], FrozenSet[str]]
+        The last known records for each (domain, record type)
+
+    Notes
+    -----
+    - Refreshes are scheduled on a priority queue of next-due times, so each poll only queries what has actually expired
+    - Only differences are reported, the first answer for each record type is the baseline (unless emit_initial is True)
+    - Queries that fail (timeouts, SERVFAIL etc.) keep the last known records and are retried after min_interval, 
+    so a flaky nameserver isn't reported as every record being removed
+    - Raises a ValueError if there are no domains to watch (i.e. an --input file that's empty or only comments)
+
+    Examples
+    --------
+    ### Printing changes to the web records of two domains as they happen
+    ```
+    from sws.dns_utilities import DNSWatcher
+
+    with DNSWatcher(["kieranwood.ca", "google.ca"], profile="web") as watcher:
+        for change in watcher.watch():
+            print(change) # kieranwood.ca A +104.21.47.46 -104.21.47.45
+    ```
+    """
+    def __init__(self, domains:Iterable[str], profile:Union[str, Iterable[str]]="web", resolver:Optional[DNSResolver]=None, max_workers:int=DNS_MAX_WORKERS, min_interval:float=DNS_WATCH_MIN_INTERVAL, max_interval:float=DNS_WATCH_MAX_INTERVAL, emit_initial:bool=False):
+        self.domains = tuple(_strip_protocol(domain) for domain in domains)
+        if not self.domains: # Nothing would ever be due, so watch() would wait forever
+            raise ValueError("DNSWatcher needs at least one domain to watch")
+        self.record_types = _profile_record_types(profile)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.emit_initial = emit_initial
+        self.max_workers = max_workers
+        self.records = {}
+        self._owns_resolver = resolver is None
+        self.resolver = DNSResolver() if resolver is None else resolver
+        now = time.monotonic()
+        self._schedule = [(now, domain, record_type) for domain in self.domains for record_type in self.record_types]
+        heapq.heapify(self._schedule)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_details):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DNSWatcher(domains={self.domains}, record_types={[record_type.name for record_type in self.record_types]}, min_interval={self.min_interval}, max_interval={self.max_interval})"
+
+    def seconds_until_due(self) -> float:
+        """How long (in seconds) until the next record type needs to be re-queried"""
+        return max(0.0, self._schedule[0][0] - time.monotonic()) if self._schedule else float("inf")
+
+    def poll(self) -> List[RecordChange]:
+        """Re-queries every record type whose TTL has run out, and reschedules it
+
+        Returns
+        -------
+        List[RecordChange]
+            The changes found since the last time each due record type was queried
+        """
+        now = time.monotonic()
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            _, domain, record_type = heapq.heappop(self._schedule)
+            due.append((domain, record_type))
+        if not due:
+            return []
+        logging.info(f"Refreshing {len(due)} due records")
+
+        changes = []
+        for (domain, record_type), future in imap_unordered(lambda item: self._refresh(*item), due, self.max_workers):
+            values, ttl = future.result()
+            heapq.heappush(self._schedule, (time.monotonic() + min(max(ttl, self.min_interval), self.max_interval), domain, record_type))
+            if values is None: # Query failed, so keep the last known records
+                continue
+            key = (domain, record_type.name)
+            previous = self.records.get(key)
+            self.records[key] = values
+            if previous is None:
+                previous = frozenset() if self.emit_initial else values
+            if values != previous:
+                changes.append(RecordChange(domain, record_type.name, values - previous, previous - values))
+        return changes
+
+    def watch(self, stop:Optional[threading.Event]=None) -> Generator[RecordChange, None, None]:
+        """Polls forever (or until stop is set), sleeping until the next record type is due
+
+        Parameters
+        ----------
+        stop : Optional[threading.Event], optional
+            An event that ends the watch when set, by default None
+
+        Yields
+        ------
+        RecordChange
+            Each change as it's found
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            for change in self.poll():
+                yield change
+            stop.wait(min(self.seconds_until_due(), self.max_interval))
+
+    def close(self):
+        """Closes the resolver if the watcher created it"""
+        if self._owns_resolver:
+            self.resolver.close()
+
+    def _refresh(self, domain:str, record_type:dns.rdatatype.RdataType) -> Tuple[Optional[FrozenSet[str]], float]:
+        """Queries a record type, returning its records (None if the query failed) and how long they're valid for"""
+        try:
+            answer = self.resolver.resolve(domain, record_type)
+        except dns.resolver.NXDOMAIN as e:
+            return frozenset(), _negative_ttl(*e.kwargs["responses"].values())
+        except dns.resolver.NoAnswer as e:
+            return frozenset(), _negative_ttl(e.response())
+        except Exception as e:
+            logging.info(f"Refreshing {record_type.name} on {domain} failed with {repr(e)}")
+            return None, self.min_interval
+        return frozenset(record_data.to_text() for record_data in answer), answer.rrset.ttl
+
+
+def get_dns_records(domain:str, as_dict:bool=False, profile:Union[str, Iterable[str]]="all", max_workers:int=DNS_MAX_WORKERS, timeout:float=DNS_SWEEP_TIMEOUT, cache:Optional[DNSCache]=None, resolver:Optional[DNSResolver]=None) -> Union[List[str], Dict[str, Union[str, List[str]]]]:
     """Takes in a domain and returns either a list or dictionary of the records of the domain
 
     Notes
     -----
     - A list of supported record types can be found by importing `sws.dns.RECORD_TYPES` or `sws.dns.RECORD_TYPES_TUPLE` (a tuple not an enum so you can do index lookups)
-    - Records are returned asynchronously, this means the ordering can be off for records. For example if you have two NS records 
-    `ns1.example.com` and `ns2.example.com` they could be put into the returned dict/list in either order 
+    - Each record type is queried concurrently on a pool of up to max_workers threads, so a full sweep takes roughly as long as the slowest
+    single query instead of the sum of all of them
+    - Records are returned in the order of `RECORD_TYPES`, but values within a record type are in the order the server sent them. For example if you 
+    have two NS records `ns1.example.com` and `ns2.example.com` they could be put into the returned dict/list in either order 
+    - The sweep stops as soon as any query comes back NXDOMAIN, since that means the domain has no records of any type
 
     Parameters
     ----------
     domain : str
-        [description]
+        The domain to get the records for
 
     as_dict : bool, optional
         Whether to return a list of strings (False) or dictionary (True), by default False
 
+    profile : Union[str, Iterable[str]], optional
+        Which record types to query; the name of a profile in `RECORD_PROFILES` ('web', 'mail', 'dnssec' or 'all'), 
+        a comma separated string of record types (i.e. 'A,MX'), or an iterable of record types (i.e. ['A', 'MX']), by default "all"
+
+    max_workers : int, optional
+        The maximum number of record types to query at the same time, by default DNS_MAX_WORKERS
+
+    timeout : float, optional
+        The overall deadline (in seconds) for the whole sweep, any record type that has not answered by then is skipped, by default DNS_SWEEP_TIMEOUT
+
+    cache : Optional[DNSCache], optional
+        A cache to reuse unexpired answers from (and store new answers in), by default None
+
+    resolver : Optional[DNSResolver], optional
+        The resolver to send every query through, by default None which uses a DNSResolver with the system's nameservers
+
     Returns
     -------
     Union[List[str], Dict[str, str]]
@@ -118,7 +1076,7 @@ def get_dns_records(domain:str, as_dict:bool=False) -> Union[List[str], Dict[str
     Raises
     ------
     ValueError
-        If the domain has no valid records
+        If the domain has no valid records, or the profile is not a valid profile/list of record types
 
     Examples
     --------
@@ -135,188 +1093,635 @@ def get_dns_records(domain:str, as_dict:bool=False) -> Union[List[str], Dict[str
 
     print(get_dns_records("kieranwood.ca", as_dict=True)) # {'A': ['104.21.47.45', '172.67.144.116'], 'SOA': 'kevin.ns.cloudflare.com. dns.cloudflare.com. 2036568886 10000 2400 604800 3600'}
     ```
-    """
-    logging.info(f"Entering get_dns_records(domain={domain}, as_dict={as_dict}) ")
 
-    if domain.startswith("https://"):
-        logging.info(f"Stripping https:// protocol from {domain}")
-        domain = domain.replace("https://", "")
-    elif domain.startswith("http://"):
-        logging.info(f"Stripping http:// protocol from {domain}")
-        domain = domain.replace("http://", "")
+    ### Only getting the mail records of 'kieranwood.ca'
+    ```
+    from sws.dns_utilities import get_dns_records
 
-    print(f"Beginning dns query to {domain} this may take up to 5 mins depending on connection speed")
-    if as_dict:
-        logging.debug("Beginning itteration of record types, and setting up result dictionary")
-        result = {}
-        for record_type in RECORD_TYPES:
-            logging.info(f"Parsing record: {record_type}")
-            try:
-                try:
-                    response = dns.resolver.resolve(domain, rdtype=record_type, lifetime=4.5)
-                except dns.exception.Timeout:
-                    ... # Record doesn't exist
-                for record_data in response:
-                    logging.info(f"Parsing record response {record_type}: {record_data.to_text()}")
-                    if record_type == dns.rdatatype.RdataType.HTTPS:
-                        result[record_type.name] = record_data.to_text().split(" ")[2:] # Remove 1 . from entries
-                        continue
-                    if result.get(record_type.name, False): # If multiple values of same record_type (i.e. 2+ A records on a domain)
-                        logging.info(f"Found existing record data for {record_type}: {result.get(record_type.name, False)}")
-                        if type(result.get(record_type.name, False)) == str: # If this is the second of same record_type
-                            result[record_type.name] = [result[record_type.name], record_data.to_text()] # Convert string to list, and append new record data
-
-                        elif type(result.get(record_type.name, False)) == list: # If 3+ of same record_type
-                            logging.info(f"Found existing record data for {record_type}: {result.get(record_type.name, False)}")
-                            result[record_type.name].append(record_data.to_text())
-
-                    else: # If new record without existing value
-                        logging.info(f"Writing data; {record_type}: {record_data.to_text()}")
-                        result[record_type.name] = record_data.to_text()
-            except Exception:
-                ... # Record doesn't exist
+    print(get_dns_records("kieranwood.ca", as_dict=True, profile="mail")) # {'MX': '10 mx.kieranwood.ca.', 'TXT': '"v=spf1 -all"'}
+    ```
+    """
+    logging.info(f"Entering get_dns_records(domain={domain}, as_dict={as_dict}, profile={profile}, max_workers={max_workers}, timeout={timeout}, cache={cache}, resolver={resolver}) ")
+    domain = _strip_protocol(domain)
+    record_types = _profile_record_types(profile)
+
+    print(f"Beginning dns query to {domain} this may take up to {timeout} seconds depending on connection speed")
+    if resolver is None:
+        with DNSResolver() as resolver:
+            record_sets = _sweep_record_types(domain, record_types, max_workers, timeout, resolver, cache)
     else:
-        result = []
-        for record_type in RECORD_TYPES:
-            logging.info(f"Parsing record: {record_type}")
-            try:
-                try:
-                    response = dns.resolver.resolve(domain, rdtype=record_type, lifetime=4.5)
-                except dns.exception.Timeout:
-                    ... # Record doesn't exist
-                for record_data in response:
-                    logging.info(f"Parsing record response {record_type}: {record_data.to_text()}")
-                    result.append(f"{record_type.name}: {record_data.to_text()}")
-            except Exception:
-                ... # Record doesn't exist
-    if not result:
+        record_sets = _sweep_record_types(domain, record_types, max_workers, timeout, resolver, cache)
+    if not record_sets:
         raise ValueError(f"Domain {domain} did not have any configured records, please check spelling")
+    result = _format_records(record_sets, as_dict)
     logging.info(f"Exiting get_dns_records() and returning {result}")
     return result
 
 
-def dns_result_table(domain:str, dns_dict:dict) -> str:
-    """Takes in a dictionary of dns values and returns a human-readable table
+def get_record_sets(domain:str, profile:Union[str, Iterable[str]]="all", max_workers:int=DNS_MAX_WORKERS, timeout:float=DNS_SWEEP_TIMEOUT, cache:Optional[DNSCache]=None, resolver:Optional[DNSResolver]=None) -> List[RecordSet]:
+    """Takes in a domain and returns a RecordSet for each record type it has, the typed equivalent of get_dns_records()
+
+    Parameters
+    ----------
+    domain : str
+        The domain to get the records for
+
+    profile : Union[str, Iterable[str]], optional
+        Which record types to query, see get_dns_records(), by default "all"
+
+    max_workers : int, optional
+        The maximum number of record types to query at the same time, by default DNS_MAX_WORKERS
+
+    timeout : float, optional
+        The overall deadline (in seconds) for the whole sweep, by default DNS_SWEEP_TIMEOUT
+
+    cache : Optional[DNSCache], optional
+        A cache to reuse unexpired answers from (and store new answers in), by default None
+
+    resolver : Optional[DNSResolver], optional
+        The resolver to send every query through, by default None which uses a DNSResolver with the system's nameservers
+
+    Returns
+    -------
+    List[RecordSet]
+        The record sets of the domain, in RECORD_TYPES order
+
+    Raises
+    ------
+    ValueError
+        If the domain has no valid records, or the profile is not a valid profile/list of record types
+
+    Examples
+    --------
+    ### Printing the records of 'kieranwood.ca' with their TTLs
+    ```
+    from sws.dns_utilities import get_record_sets
+
+    for record_set in get_record_sets("kieranwood.ca"):
+        print(record_set.rdtype, record_set.ttl, record_set.values) # A 300 ('104.21.47.45', '172.67.144.116')
+    ```
+    """
+    logging.info(f"Entering get_record_sets(domain={domain}, profile={profile}, max_workers={max_workers}, timeout={timeout}, cache={cache}, resolver={resolver}) ")
+    domain = _strip_protocol(domain)
+    record_types = _profile_record_types(profile)
+    if resolver is None:
+        with DNSResolver() as resolver:
+            record_sets = _sweep_record_types(domain, record_types, max_workers, timeout, resolver, cache)
+    else:
+        record_sets = _sweep_record_types(domain, record_types, max_workers, timeout, resolver, cache)
+    if not record_sets:
+        raise ValueError(f"Domain {domain} did not have any configured records, please check spelling")
+    logging.info(f"Exiting get_record_sets() and returning {record_sets}")
+    return record_sets
+
+
+def bulk_dns_records(domains:Iterable[str], as_dict:bool=True, profile:Union[str, Iterable[str]]="all", max_domains:int=DNS_MAX_DOMAINS, max_workers:int=DNS_MAX_WORKERS, timeout:float=DNS_SWEEP_TIMEOUT, cache:Optional[DNSCache]=None, resolver:Optional[DNSResolver]=None, as_record_sets:bool=False) -> Generator[Dict[str, Union[str, list, dict, None]], None, None]:
+    """Sweeps the records of many domains at once, yielding each domain's result as soon as it finishes
+
+    Notes
+    -----
+    - domains is consumed lazily, only max_domains of them are in flight at any time so memory stays flat for huge (or endless) inputs
+    - Results are yielded in the order domains finish, not the order they were passed in
+    - Up to max_domains * max_workers queries can be in flight at once
+
+    Parameters
+    ----------
+    domains : Iterable[str]
+        The domains to get the records for, protocols are stripped
+
+    as_dict : bool, optional
+        Whether each result's records are a list of strings (False) or dictionary (True), by default True
+
+    profile : Union[str, Iterable[str]], optional
+        Which record types to query for each domain, see get_dns_records(), by default "all"
+
+    max_domains : int, optional
+        The maximum number of domains to sweep at the same time, by default DNS_MAX_DOMAINS
+
+    max_workers : int, optional
+        The maximum number of record types to query at the same time for each domain, by default DNS_MAX_WORKERS
+
+    timeout : float, optional
+        The deadline (in seconds) for each individual domain's sweep, by default DNS_SWEEP_TIMEOUT
+
+    cache : Optional[DNSCache], optional
+        A cache shared by every domain's sweep, by default None
+
+    resolver : Optional[DNSResolver], optional
+        The resolver shared by every domain's sweep, by default None which uses a DNSResolver with the system's nameservers
+
+    as_record_sets : bool, optional
+        Whether each result's records are a list of RecordSet's (which takes precedence over as_dict), by default False
+
+    Yields
+    ------
+    Dict[str, Union[str, list, dict, None]]
+        A dictionary per domain with the keys 'domain', 'records' (same shape as get_dns_records() or get_record_sets(), or None on failure)
+        and 'error' (None, or a description of why the domain failed)
+
+    Examples
+    --------
+    ### Printing the A records for a list of domains as they finish
+    ```
+    from sws.dns_utilities import bulk_dns_records
+
+    for result in bulk_dns_records(["kieranwood.ca", "google.ca"]):
+        print(result["domain"], result["records"].get("A")) # kieranwood.ca ['104.21.47.45', '172.67.144.116']
+    ```
+    """
+    logging.info(f"Entering bulk_dns_records(domains={domains}, as_dict={as_dict}, profile={profile}, max_domains={max_domains}, max_workers={max_workers}, timeout={timeout}, cache={cache}, resolver={resolver}, as_record_sets={as_record_sets})")
+    record_types = _profile_record_types(profile)
+    owned_resolver = resolver is None
+    if owned_resolver:
+        resolver = DNSResolver()
+    def sweep(domain:str) -> Union[list, dict]:
+        record_sets = _sweep_record_types(domain, record_types, max_workers, timeout, resolver, cache)
+        return record_sets if as_record_sets else _format_records(record_sets, as_dict)
+
+    try:
+        stripped_domains = (_strip_protocol(domain) for domain in domains)
+        for domain, future in imap_unordered(sweep, stripped_domains, max_domains):
+            try:
+                records = future.result()
+            except Exception as e:
+                logging.info(f"Sweep of {domain} failed with {repr(e)}")
+                yield {"domain": domain, "records": None, "error": repr(e)}
+                continue
+            if records:
+                yield {"domain": domain, "records": records, "error": None}
+            else:
+                yield {"domain": domain, "records": None, "error": f"Domain {domain} did not have any configured records, please check spelling"}
+    finally:
+        if owned_resolver:
+            resolver.close()
+
+
+def reverse_dns_sweep(cidr:str, max_workers:int=DNS_REVERSE_MAX_WORKERS, resolver:Optional[DNSResolver]=None, cache:Optional[DNSCache]=None, include_missing:bool=False) -> Generator[Dict[str, Union[str, List[str], None]], None, None]:
+    """Resolves the PTR records of every address in an IPv4/IPv6 range, yielding each address as soon as it's answered
+
+    Notes
+    -----
+    - Addresses are expanded lazily and only max_workers queries are in flight at once, so memory stays flat for huge ranges
+    - Results are yielded in the order queries finish, not address order
+    - Addresses without a PTR record (NXDOMAIN/no answer) are skipped unless include_missing is True, 
+    addresses that couldn't be looked up (timeouts, SERVFAIL etc.) are always yielded with an error
+
+    Parameters
+    ----------
+    cidr : str
+        The range to sweep (i.e. '192.0.2.0/24' or '2001:db8::/120'), a single address sweeps just that address
+
+    max_workers : int, optional
+        The maximum number of PTR queries in flight at once, by default DNS_REVERSE_MAX_WORKERS
+
+    resolver : Optional[DNSResolver], optional
+        The resolver to send every query through, by default None which uses a DNSResolver with the system's nameservers
+
+    cache : Optional[DNSCache], optional
+        A cache to reuse unexpired answers from, and store new answers in, by default None
+
+    include_missing : bool, optional
+        Whether to also yield addresses that have no PTR record, by default False
+
+    Yields
+    ------
+    Dict[str, Union[str, List[str], None]]
+        A dictionary per address with the keys 'address', 'names' (the PTR names, an empty list if there are none, 
+        or None on failure) and 'error' (None, or a description of why the lookup failed)
+
+    Raises
+    ------
+    ValueError
+        If cidr is not a valid IPv4/IPv6 address or range
+
+    Examples
+    --------
+    ### Printing the hostnames of a /24
+    ```
+    from sws.dns_utilities import reverse_dns_sweep
+
+    for result in reverse_dns_sweep("192.0.2.0/24"):
+        print(result["address"], result["names"]) # 192.0.2.10 ['www.example.com.']
+    ```
+    """
+    logging.info(f"Entering reverse_dns_sweep(cidr={cidr}, max_workers={max_workers}, resolver={resolver}, cache={cache}, include_missing={include_missing})")
+    try:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"{cidr} is not a valid IPv4/IPv6 address or CIDR range")
+    owned_resolver = resolver is None
+    if owned_resolver:
+        resolver = DNSResolver()
+    lookup = lambda address: _reverse_lookup(address, resolver, cache)
+
+    try:
+        for address, future in imap_unordered(lookup, network, max_workers):
+            try:
+                names = future.result()
+            except Exception as e:
+                logging.info(f"Reverse lookup of {address} failed with {repr(e)}")
+                yield {"address": str(address), "names": None, "error": repr(e)}
+                continue
+            if names or include_missing:
+                yield {"address": str(address), "names": names, "error": None}
+    finally:
+        if owned_resolver:
+            resolver.close()
+
+
+def _format_records(record_sets:List[RecordSet], as_dict:bool) -> Union[List[str], Dict[str, Union[str, List[str]]]]:
+    """Converts the record sets of a sweep into the list or dict shape returned by get_dns_records()
+
+    Parameters
+    ----------
+    record_sets : List[RecordSet]
+        The record sets returned by _sweep_record_types()
+
+    as_dict : bool
+        Whether to return a list of strings (False) or dictionary (True)
+
+    Returns
+    -------
+    Union[List[str], Dict[str, Union[str, List[str]]]]
+        The records in the same shape get_dns_records() returns them
+    """
+    if as_dict:
+        return {record_set.rdtype: record_set.value for record_set in record_sets}
+    return [line for record_set in record_sets for line in record_set.as_lines()]
+
+
+def _profile_record_types(profile:Union[str, Iterable[str]]) -> Tuple[dns.rdatatype.RdataType]:
+    """Converts a sweep profile into the record types it covers
+
+    Parameters
+    ----------
+    profile : Union[str, Iterable[str]]
+        The name of a profile in RECORD_PROFILES, a comma separated string of record types, or an iterable of record types
+
+    Returns
+    -------
+    Tuple[dns.rdatatype.RdataType]
+        The record types to query, in RECORD_TYPES order
+
+    Raises
+    ------
+    ValueError
+        If the profile is not a known profile, or contains an unknown record type
+    """
+    if isinstance(profile, str):
+        profile = RECORD_PROFILES.get(profile.lower(), profile.split(","))
+    record_types = set()
+    for record_type in profile:
+        try:
+            record_types.add(dns.rdatatype.RdataType[record_type.strip().upper()])
+        except KeyError:
+            raise ValueError(f"{record_type} is not a valid profile ({', '.join(RECORD_PROFILES)}) or record type")
+    return tuple(sorted(record_types))
+
+
+def _sweep_record_types(domain:str, record_types:Iterable[dns.rdatatype.RdataType], max_workers:int, timeout:float, resolver:DNSResolver, cache:Optional[DNSCache]=None) -> List[RecordSet]:
+    """Queries each record type for a domain concurrently, stopping early if the domain doesn't exist
+
+    Parameters
+    ----------
+    domain : str
+        The domain to query (without a protocol)
+
+    record_types : Iterable[dns.rdatatype.RdataType]
+        The record types to query
+
+    max_workers : int
+        The maximum number of queries in flight at once
+
+    timeout : float
+        The overall deadline (in seconds) for the sweep
+
+    resolver : DNSResolver
+        The resolver to send every query through
+
+    cache : Optional[DNSCache], optional
+        A cache to reuse unexpired answers from, by default None
+
+    Returns
+    -------
+    List[RecordSet]
+        A record set for each record type that answered, in the order of record_types
+        (empty if the domain came back NXDOMAIN)
+    """
+    logging.info(f"Entering _sweep_record_types(domain={domain}, record_types={record_types}, max_workers={max_workers}, timeout={timeout}, resolver={resolver}, cache={cache})")
+    deadline = time.monotonic() + timeout
+    nxdomain = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [(record_type, executor.submit(_query_record, domain, record_type, deadline, resolver, cache, nxdomain)) for record_type in record_types]
+    not_done = {future for _, future in futures}
+    while not_done and not nxdomain.is_set():
+        _, not_done = wait(not_done, timeout=deadline - time.monotonic(), return_when=FIRST_COMPLETED)
+        if time.monotonic() >= deadline:
+            break
+    for future in not_done: # Anything still queued when the deadline hits (or the domain turns out not to exist) is dropped
+        future.cancel()
+    executor.shutdown(wait=False)
+    if nxdomain.is_set():
+        logging.info(f"{domain} came back NXDOMAIN, skipped {len(not_done)} remaining record types")
+        return []
+    if not_done:
+        logging.info(f"{len(not_done)} record types for {domain} did not answer before the {timeout} second deadline")
+
+    record_sets = [future.result() for _, future in futures if future not in not_done and future.result() is not None]
+    logging.info(f"Exiting _sweep_record_types() and returning {record_sets}")
+    return record_sets
+
+
+def _query_record(domain:str, record_type:dns.rdatatype.RdataType, deadline:float, resolver:DNSResolver, cache:Optional[DNSCache]=None, nxdomain:Optional[threading.Event]=None) -> Optional[RecordSet]:
+    """Queries a single record type for a domain without running past the sweep deadline
+
+    Parameters
+    ----------
+    domain : str
+        The domain to query (without a protocol)
+
+    record_type : dns.rdatatype.RdataType
+        The record type to query
+
+    deadline : float
+        The time.monotonic() value the query has to be finished by
+
+    resolver : DNSResolver
+        The resolver to send the query through
+
+    cache : Optional[DNSCache], optional
+        A cache to reuse an unexpired answer from, and store the new answer in, by default None
+
+    nxdomain : Optional[threading.Event], optional
+        An event that is set when the domain comes back NXDOMAIN, the query is skipped if it's already set, by default None
+
+    Returns
+    -------
+    Optional[RecordSet]
+        The records returned, or None if the record doesn't exist
+    """
+    if nxdomain is not None and nxdomain.is_set(): # Another record type already found the domain doesn't exist
+        return None
+    if cache is not None:
+        cached = cache.get_record_set(domain, record_type.name)
+        if cached is not None:
+            if cached[1] and nxdomain is not None:
+                nxdomain.set()
+            return cached[0] or None
+    lifetime = min(DNS_QUERY_LIFETIME, deadline - time.monotonic())
+    if lifetime <= 0: # Was queued until after the deadline
+        return None
+    logging.info(f"Parsing record: {record_type}")
+    try:
+        response = resolver.resolve(domain, record_type, lifetime=lifetime)
+    except dns.resolver.NXDOMAIN as e:
+        if nxdomain is not None:
+            nxdomain.set()
+        if cache is not None:
+            cache.put(domain, record_type.name, (), _negative_ttl(*e.kwargs["responses"].values()), nxdomain=True)
+        return None # Domain doesn't exist
+    except dns.resolver.NoAnswer as e:
+        if cache is not None:
+            cache.put(domain, record_type.name, (), _negative_ttl(e.response()))
+        return None # Record doesn't exist
+    except Exception as e:
+        logging.info(f"Query for {record_type.name} on {domain} failed with {repr(e)}")
+        return None # Record couldn't be retrieved
+    record_set = RecordSet(record_type.name, response.rrset.ttl, [record_data.to_text() for record_data in response])
+    if cache is not None:
+        cache.put(domain, record_set.rdtype, record_set.values, record_set.ttl)
+    return record_set
+
+
+def _reverse_lookup(address:Union[ipaddress.IPv4Address, ipaddress.IPv6Address], resolver:DNSResolver, cache:Optional[DNSCache]=None) -> List[str]:
+    """Queries the PTR records of an address, returning an empty list if it has none (other failures are raised)"""
+    name = dns.reversename.from_address(str(address)).to_text()
+    if cache is not None:
+        cached = cache.get(name, "PTR")
+        if cached is not None:
+            return list(cached[0])
+    try:
+        answer = resolver.resolve(name, dns.rdatatype.PTR)
+    except dns.resolver.NXDOMAIN as e:
+        if cache is not None:
+            cache.put(name, "PTR", (), _negative_ttl(*e.kwargs["responses"].values()), nxdomain=True)
+        return []
+    except dns.resolver.NoAnswer as e:
+        if cache is not None:
+            cache.put(name, "PTR", (), _negative_ttl(e.response()))
+        return []
+    names = [record_data.to_text() for record_data in answer]
+    if cache is not None:
+        cache.put(name, "PTR", names, answer.rrset.ttl)
+    return names
+
+
+def _negative_ttl(*responses:dns.message.Message) -> int:
+    """Finds how long a negative answer can be cached for, using the SOA minimum in the authority section (RFC 2308)
+
+    Parameters
+    ----------
+    responses : dns.message.Message
+        The response(s) that contained the negative answer
+
+    Returns
+    -------
+    int
+        The number of seconds the negative answer is valid for, 0 if there was no SOA to go off of
+    """
+    for response in responses:
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA:
+                return min(rrset.ttl, rrset[0].minimum)
+    return 0
+
+
+def dns_result_table(domain:str, dns_dict:Union[Dict[str, Union[str, List[str]]], Iterable[RecordSet]], style:str="markdown", max_width:Optional[int]=DNS_TABLE_MAX_WIDTH) -> str:
+    """Takes in a dictionary of dns values (or RecordSet's) and returns a human-readable table
 
     Parameters
     ----------
     domain:str
         The domain used to generate the dns_dict
 
-    dns_dict : dict
-        A dictionary with all the dns records in a record_type(str)->record_value(str or list) mapping
+    dns_dict : Union[Dict[str, Union[str, List[str]]], Iterable[RecordSet]]
+        A dictionary with all the dns records in a record_type(str)->record_value(str or list) mapping, 
+        or the record sets returned by get_record_sets()
+
+    style : str, optional
+        Either 'markdown' for a markdown table, or 'plain' for space aligned columns, by default "markdown"
+
+    max_width : Optional[int], optional
+        The widest a record value can be before it's truncated with '...', or None to never truncate, by default DNS_TABLE_MAX_WIDTH
 
     Returns
     -------
     str
         A table of dns records and their values for the domain
+
+    Examples
+    --------
+    ### Printing a table of the records of 'kieranwood.ca'
+    ```
+    from sws.dns_utilities import get_dns_records, dns_result_table
+
+    print(dns_result_table("kieranwood.ca", get_dns_records("kieranwood.ca", as_dict=True)))
+    # Prints:
+    # DNS records for kieranwood.ca
+    #
+    # | Record Type | Record Value              |
+    # |-------------|---------------------------|
+    # | A           | 104.21.47.45              |
+    # |             | 172.67.144.116            |
+    # | NS          | kevin.ns.cloudflare.com.  |
+    # |             | sharon.ns.cloudflare.com. |
+    ```
     """    
-    logging.info(f"dns_result_table(domain={domain}, dns_dict={dns_dict}")
-    if domain.startswith("https://"):
-        logging.info(f"Stripping https:// protocol from {domain}")
-        domain = domain.replace("https://", "")
-    elif domain.startswith("http://"):
-        logging.info(f"Stripping http:// protocol from {domain}")
-        domain = domain.replace("http://", "")
-    # add header
-    result = f"""\nDNS records for {domain} \n
-| Record Type | Record Value |
-|-------------|--------------|\n"""
-    logging.info("Starting record parsing")
-    for record in dns_dict:
-        logging.debug(f"Parsing record {record}: {dns_dict[record]}")
-
-        # Add in Record Type column
-        logging.debug(f"Creating record type column for {record} record")
-        record_type = _even_padding(record, 13)
-        current_row = f"|{record_type}|"
-
-        # Add in Record Value column
-        logging.debug(f"Creating record value column for {record} record")
-        if type(dns_dict[record]) == list: # Need to render multiple result rows
-            logging.debug("Current record has multiple values, therefore needs multiple rows")
-            for index, record_value in enumerate(dns_dict[record]):
-                if index == 0: # The first row
-                    logging.debug(f"Creating first row for {record}:{record_value}")
-                    value = _even_padding(record_value, 14)
-                    current_row += f"{value}|\n"
-                elif index == len(dns_dict[record])-1: # Last row for current record
-                    logging.debug(f"Creating last row for {record}:{record_value}")
-                    value = _even_padding(record_value, 14)
-                    current_row += f"|{' '* 13}|{value}|\n|{'='* 13}|{'='* 14}|\n"
-
-                else: # Middle row(s) for current record
-                    logging.debug(f"Creating middle row for {record}:{record_value}")
-                    value = _even_padding(record_value, 14)
-                    current_row += f"|{' '* 13}|{value}|\n"
-
-        else: # Just a single string for the current record so only takes a single row
-            logging.debug("Current record has single value, generating column")
-            value = _even_padding(dns_dict[record], 14)
-            current_row += f"{value}|\n|{'='* 13}|{'='* 14}|\n"
-
-        logging.debug(f"Appending record row(s) for {record} record to result string")
-        result += current_row
-
-    logging.info(f"Exiting dns_result_table() and returning {result}")
-    return result
+    logging.info(f"dns_result_table(domain={domain}, dns_dict={dns_dict}, style={style}, max_width={max_width})")
+    domain = _strip_protocol(domain)
+    if isinstance(dns_dict, dict):
+        record_sets = [RecordSet.from_value(record_type, value) for record_type, value in dns_dict.items()]
+    else:
+        record_sets = dns_dict
+    table = "\n".join(iter_dns_table([(domain, record_sets)], style=style, max_width=max_width, show_domain=False))
+    return f"\nDNS records for {domain} \n\n{table}\n"
 
 
-def _even_padding(value:str, size:int, spacer:str= " ") -> str:
-    """Creates even padding for a string value within a set size
+def iter_dns_table(results:Iterable[Tuple[str, Iterable[RecordSet]]], style:str="markdown", max_width:Optional[int]=DNS_TABLE_MAX_WIDTH, widths:Optional[Tuple[int, ...]]=None, show_domain:bool=True) -> Generator[str, None, None]:
+    """Renders the record sets of one or many domains as a table, one line at a time
+
+    Notes
+    -----
+    - When widths is None the rows are read once to size the columns, and then rendered; pass widths 
+    to stream rows straight from results (i.e. a bulk_dns_records() generator) without holding them in memory
+    - Cells wider than their column (or max_width) are truncated with '...'
+    - Pipes in markdown cells are escaped so TXT records don't break the table
 
     Parameters
     ----------
-    value : str
-        The value to pad
+    results : Iterable[Tuple[str, Iterable[RecordSet]]]
+        Pairs of a domain and its record sets
 
-    size : int
-        The size (number of characters) total that are available
+    style : str, optional
+        Either 'markdown' for a markdown table, or 'plain' for space aligned columns, by default "markdown"
 
-    spacer : str, optional
-        What character to space with, by default " "
+    max_width : Optional[int], optional
+        The widest a cell can be before it's truncated, or None to never truncate, by default DNS_TABLE_MAX_WIDTH
 
-    Returns
-    -------
+    widths : Optional[Tuple[int, ...]], optional
+        Fixed widths for each column, by default None which sizes columns to fit the data
+
+    show_domain : bool, optional
+        Whether to include a Domain column, by default True
+
+    Yields
+    ------
     str
-        The value with padding to make it even spaced within size,
-        just returns original value if it's larger than size
+        Each line of the table (without a trailing newline)
+
+    Raises
+    ------
+    ValueError
+        If style is not 'markdown' or 'plain', or widths doesn't have a width for each column
 
     Examples
     --------
-    ### Passing a value that is shorter or equal to size
+    ### Streaming a combined table for many domains
     ```
-    # Value same length as size
-    value = '192.85.111.115'
-    padded_value = even_padding(value, 14)
-    print("|{padded_value}|") # Prints |192.85.111.115|
-    
-    # Value smaller than size
-    value = '192.33.22.55'
-    padded_value = even_padding(value, 14)
-    print("|{padded_value}|") # Prints | 192.33.22.55 |
+    from sws.dns_utilities import bulk_dns_records, iter_dns_table
+
+    results = bulk_dns_records(["kieranwood.ca", "google.ca"], as_record_sets=True)
+    for line in iter_dns_table(((result["domain"], result["records"] or []) for result in results), widths=(30, 11, 60)):
+        print(line)
     ```
+    """
+    if style not in ("markdown", "plain"):
+        raise ValueError(f"{style} is not a valid table style, use 'markdown' or 'plain'")
+    headers = ("Domain", "Record Type", "Record Value") if show_domain else ("Record Type", "Record Value")
+    rows = _table_rows(results, style, show_domain)
+    if widths is None:
+        widths = [len(header) for header in headers]
+        sized_rows = []
+        for row in rows: # Size the columns in the same pass that holds the rows for rendering
+            row = tuple(_truncate(cell, max_width) for cell in row)
+            sized_rows.append(row)
+            for column, cell in enumerate(row):
+                if len(cell) > widths[column]:
+                    widths[column] = len(cell)
+        rows = sized_rows
+    elif len(widths) != len(headers):
+        raise ValueError(f"widths needs a width for each of the {len(headers)} columns {headers}")
+
+    if style == "markdown":
+        yield "| " + " | ".join(header.ljust(width) for header, width in zip(headers, widths)) + " |"
+        yield "|" + "|".join("-" * (width + 2) for width in widths) + "|"
+        for row in rows:
+            yield "| " + " | ".join(_truncate(cell, width).ljust(width) for cell, width in zip(row, widths)) + " |"
+    else:
+        yield "  ".join(header.ljust(width) for header, width in zip(headers, widths)).rstrip()
+        yield "  ".join("-" * width for width in widths)
+        for row in rows:
+            yield "  ".join(_truncate(cell, width).ljust(width) for cell, width in zip(row, widths)).rstrip()
+
+
+def write_dns_table(results:Iterable[Tuple[str, Iterable[RecordSet]]], file:TextIO=sys.stdout, **table_options):
+    """Writes a table of the record sets of one or many domains to a file-like object as it's rendered
 
-    ### Passing a value that larger than size
+    Parameters
+    ----------
+    results : Iterable[Tuple[str, Iterable[RecordSet]]]
+        Pairs of a domain and its record sets
+
+    file : TextIO, optional
+        The file-like object to write to, by default sys.stdout
+
+    table_options
+        Any of the style, max_width, widths or show_domain arguments of iter_dns_table()
+
+    Examples
+    --------
+    ### Writing a plain text table for a file of domains
     ```
-    value = 'karen.ns.cloudflare.com'
-    padded_value = even_padding(value, 14)
-    
-    print("|{padded_value}|") # Never get's called cause value is too large
+    from sws.dns_utilities import bulk_dns_records, write_dns_table
+
+    with open("domains.txt") as domains, open("records.txt", "w") as table:
+        results = bulk_dns_records((domain.strip() for domain in domains), as_record_sets=True)
+        write_dns_table(((result["domain"], result["records"] or []) for result in results), table, style="plain", widths=(30, 11, 60))
     ```
     """
-    logging.debug(f"Entering _even_padding(value={value}, size={size}, spacer={spacer})")
-    if len(value) > size:
+    for line in iter_dns_table(results, **table_options):
+        file.write(line)
+        file.write("\n")
+
+
+def _table_rows(results:Iterable[Tuple[str, Iterable[RecordSet]]], style:str, show_domain:bool) -> Generator[Tuple[str, ...], None, None]:
+    """Flattens domains and their record sets into table rows, leaving repeated domain/record type cells blank"""
+    for domain, record_sets in results:
+        for record_set in record_sets:
+            record_type = record_set.rdtype
+            for record_value in record_set.values:
+                if style == "markdown":
+                    record_value = record_value.replace("|", "\\|")
+                yield (domain, record_type, record_value) if show_domain else (record_type, record_value)
+                domain = record_type = ""
+
+
+def _truncate(value:str, width:Optional[int]) -> str:
+    """Cuts value down to width characters, ending in '...' if anything was cut off"""
+    if width is None or len(value) <= width:
         return value
-    padding = abs(len(value) - size)/2
-    if not padding.is_integer():
-        padding_left = spacer * floor(padding)
-        padding_right = spacer * ceil(padding)
-    else:
-        padding_left = spacer * int(padding)
-        padding_right = spacer * int(padding)
-    logging.debug(f"Exiting _even_padding() and returning:\n{padding_left}{value}{padding_right}")
-    return f"{padding_left}{value}{padding_right}"
+    return value[:max(0, width - 3)] + "..."[:width]
+
+
+def _strip_protocol(domain:str) -> str:
+    """Strips a leading http:// or https:// from a domain"""
+    if domain.startswith("https://"):
+        logging.info(f"Stripping https:// protocol from {domain}")
+        domain = domain.replace("https://", "")
+    elif domain.startswith("http://"):
+        logging.info(f"Stripping http:// protocol from {domain}")
+        domain = domain.replace("http://", "")
+    return domain
 
 
 if __name__ == "__main__":
@@ -3,6 +3,9 @@
 - When the cert will expire
 - The issuer of the cert
 - A full dict of the details of the cert
+- Whether every address of a hostname serves the same cert
+- The certs of mail and other services, including over STARTTLS (SMTP, IMAP and POP3)
+- Whether a cert has been revoked (over OCSP)
 
 Notes
 -----
@@ -63,16 +66,1048 @@ from sws.ssl_utilities import get_ssl_issuer
 
 get_ssl_issuer("kieranwood.com") # Returns False
 ```
+
+### Get the expiry, issuer and negotiated protocol of kieranwood.ca with a single handshake
+```
+from sws.ssl_utilities import probe_tls
+
+profile = probe_tls("kieranwood.ca")
+print(profile.expiry, profile.days_remaining, profile.issuer["commonName"], profile.protocol) # 2022-06-24 23:59:59+00:00 241 Cloudflare Inc ECC CA-3 TLSv1.3
+```
+
+### Check the expiry of many hostnames at once
+```
+from sws.ssl_utilities import bulk_ssl_certs
+
+for result in bulk_ssl_certs(["kieranwood.ca", "google.ca"]):
+    print(result["hostname"], result["expiry"]) # kieranwood.ca Oct  9 12:00:00 2020 GMT
+```
+
+### Check every server behind kieranwood.ca serves the same cert
+```
+from sws.ssl_utilities import check_ssl_consistency
+
+report = check_ssl_consistency("kieranwood.ca")
+print(report["consistent"], report["mismatched"]) # True []
+```
+
+### Check the certs of a mail server on every port it serves
+```
+from sws.ssl_utilities import scan_tls_ports
+
+for result in scan_tls_ports("mail.example.com")["ports"]:
+    print(result["port"], result["starttls"], result["expiry"] or result["error"]) # 587 smtp Jun 24 23:59:59 2022 GMT
+```
+
+### Check whether kieranwood.ca's cert has been revoked
+```
+from sws.ssl_utilities import OCSPChecker, probe_tls
+
+print(OCSPChecker().check([probe_tls("kieranwood.ca")])[0].status) # good
+```
 """
 
 # Internal Dependencies
+import os                       # Used to find the default cache location
 import ssl                      # Used to get details about SSL certs
 import socket                   # Used to make a request to get SSL cert
+import json                     # Used to serialize cached certs
 import logging                  # Used in logging for debug and info messages
-from typing import Union        # Used to help provide more detailed type hints
+import sqlite3                  # Used to persist cached certs
+import time                     # Used to expire cached certs
+import hashlib                  # Used to fingerprint certs
+import ipaddress                # Used to sort the addresses of a hostname
+import threading                # Used to share cached TLS sessions between threads
+from functools import lru_cache # Used to build each SSL context only once
+from datetime import datetime, timezone # Used to convert cert expiries to datetimes
+from collections import OrderedDict # Used to evict cached TLS sessions in LRU order
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Union # Used to help provide more detailed type hints
+
+# Third party dependencies
+import requests                 # Used to ask OCSP responders about certs
+from cryptography import x509   # Used to parse OCSP responses, and check who signed them
+from cryptography.x509 import ocsp # Used to parse OCSP responses
+from cryptography.exceptions import InvalidSignature # Raised when an OCSP response (or issuer) signature doesn't verify
+from cryptography.hazmat.primitives import hashes # Used to check OCSP cert IDs are SHA-1
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, padding, rsa # Used to verify OCSP response signatures
+import dns.exception            # Used to catch failed lookups of a hostname's addresses
+
+from sws.concurrency import imap_unordered # Used to run bulk scans on a bounded pool
+from sws.dns_utilities import DNSResolver  # Used to look up a hostname's addresses with specific nameservers
+
+# The maximum number of handshakes a bulk scan has in flight at once by default
+SSL_MAX_WORKERS:int = 64
+
+# The overall deadline (in seconds) for a TLS probe to connect and handshake by default
+SSL_TIMEOUT:float = 10
+
+# How long (in seconds) a TLS probe waits for the TCP connection by default
+SSL_CONNECT_TIMEOUT:float = 5
+
+# How long (in seconds) a TLS probe waits for the handshake once connected by default
+SSL_HANDSHAKE_TIMEOUT:float = 5
+
+# The oldest TLS version the shared SSL contexts will negotiate by default
+SSL_MINIMUM_VERSION:ssl.TLSVersion = ssl.TLSVersion.TLSv1_2
+
+# The maximum number of (hostname, address, port) TLS sessions kept for resumption
+SSL_SESSION_CACHE_SIZE:int = 1024
+
+# How long (in seconds) to wait after a TLS 1.3 handshake for the server's session ticket, so the next probe with resume=True can resume
+SSL_SESSION_TICKET_WAIT:float = 0.05
+
+# The longest (in seconds) an SSLCache reuses a probe result by default
+SSL_CACHE_MAX_AGE:float = 6 * 60 * 60
+
+# How long (in seconds) before a cert's notAfter an SSLCache stops reusing it by default
+SSL_CACHE_EXPIRY_MARGIN:float = 24 * 60 * 60
+
+# The maximum number of probe results an SSLCache holds in memory by default
+SSL_CACHE_SIZE:int = 10_000
+
+# Where the sws cli persists it's probe results between runs
+SSL_CACHE_PATH:str = os.path.join(os.path.expanduser("~"), ".sws", "ssl_cache.sqlite")
+
+# The ports scan_tls_ports() checks by default
+SSL_SCAN_PORTS:Tuple[int, ...] = (25, 110, 143, 443, 465, 587, 993, 995, 8443)
+
+# The ports that start in plaintext and are upgraded with STARTTLS, and the protocol used to do it
+SSL_STARTTLS_PORTS:Dict[int, str] = {25: "smtp", 587: "smtp", 143: "imap", 110: "pop3"}
+
+# The protocols probe_tls() can negotiate STARTTLS over
+SSL_STARTTLS_PROTOCOLS:Tuple[str, ...] = ("smtp", "imap", "pop3")
+
+# The longest (in bytes) plaintext reply accepted from a server while negotiating STARTTLS
+SSL_STARTTLS_MAX_REPLY:int = 64 * 1024
+
+# How long (in seconds) to wait for an OCSP responder by default
+OCSP_TIMEOUT:float = 10
+
+# The most certs an OCSPChecker asks a responder about in one request by default
+OCSP_BATCH_SIZE:int = 20
+
+# The maximum number of OCSP requests an OCSPChecker has in flight at once by default
+OCSP_MAX_WORKERS:int = 8
+
+# The longest (in seconds) an OCSPCache keeps a status by default, even when the response's nextUpdate is later
+OCSP_CACHE_MAX_AGE:float = 60 * 60
+
+# The maximum number of statuses an OCSPCache holds in memory by default
+OCSP_CACHE_SIZE:int = 10_000
+
+# Where the sws cli persists it's OCSP statuses between runs
+OCSP_CACHE_PATH:str = os.path.join(os.path.expanduser("~"), ".sws", "ocsp_cache.sqlite")
+
+# The names of the OCSPResponseStatus values that aren't successful (0)
+OCSP_RESPONSE_STATUSES:Dict[int, str] = {1: "malformedRequest", 2: "internalError", 3: "tryLater", 5: "sigRequired", 6: "unauthorized"}
+
+# The AlgorithmIdentifier of SHA-1, which OCSP cert IDs are hashed with
+_OCSP_SHA1:bytes = bytes.fromhex("300906052b0e03021a0500")
+
+_sessions = OrderedDict() # The last TLS session for each (context, hostname, address, port), in LRU order
+_sessions_lock = threading.Lock()
+
+
+class Certificate:
+    """An X.509 cert kept in it's binary (DER) form, with each field only parsed when it's read
+
+    Attributes
+    ----------
+    der : bytes
+        The cert in binary (DER) form
+
+    not_before : datetime.datetime
+        When the cert becomes valid, in UTC
+
+    not_after : datetime.datetime
+        When the cert expires, in UTC
+
+    issuer : Dict[str, str]
+        The issuer's details (i.e. {'countryName': 'US', 'commonName': 'Cloudflare Inc ECC CA-3'})
+
+    subject : Dict[str, str]
+        The subject's details (i.e. {'commonName': 'sni.cloudflaressl.com'})
+
+    subject_alt_names : List[Tuple[str, str]]
+        The (type, value) of each name the cert is valid for, in the same form as getpeercert() (i.e. ('DNS', 'kieranwood.ca'))
+
+    serial_number : str
+        The serial number in hex
+
+    ocsp_urls : Tuple[str, ...]
+        The URL's of the issuer's OCSP responders
+
+    fingerprint : str
+        The SHA-256 fingerprint of the cert in hex
+
+    Notes
+    -----
+    - Only the outline of the cert is read when it's first used, each field is parsed every time it's read, 
+    so bulk scans only spend CPU on the fields they use and only hold the DER in memory
+    - Fields sws doesn't know about are skipped, and attribute names it doesn't know are given as dotted OID's
+
+    Examples
+    --------
+    ### Reading the expiry of a PEM cert on disk
+    ```
+    import ssl
+
+    from sws.ssl_utilities import Certificate
+
+    with open("cert.pem") as cert_file:
+        certificate = Certificate(ssl.PEM_cert_to_DER_cert(cert_file.read()))
+    print(certificate.not_after, certificate.issuer.get("commonName")) # 2022-06-24 23:59:59+00:00 Cloudflare Inc ECC CA-3
+    ```
+    """
+    __slots__ = ("der", "_tbs", "_extensions")
+
+    def __init__(self, der:bytes):
+        self.der = bytes(der)
+        self._tbs = None # The (tag, start, end) of each field of the tbsCertificate, once read
+        self._extensions = None # The OID -> (start, end) of each extension's value, once read
+
+    def __repr__(self) -> str:
+        return f"Certificate({len(self.der)} bytes)"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Certificate):
+            return NotImplemented
+        return self.der == other.der
+
+    def __hash__(self) -> int:
+        return hash(self.der)
+
+    @property
+    def version(self) -> int:
+        tag, start, _ = self._fields()[0]
+        if tag != 0xA0: # The version is optional, and left out of v1 certs
+            return 1
+        _, start, end = _der_element(self.der, start)
+        return _der_integer(self.der[start:end]) + 1
+
+    @property
+    def serial_number(self) -> str:
+        _, start, end = self._field(0)
+        magnitude = self.der[start:end].lstrip(b"\x00") or b"\x00"
+        return magnitude.hex().upper()
+
+    @property
+    def issuer(self) -> Dict[str, str]:
+        return {name: value for field in self._name(2) for name, value in field}
+
+    @property
+    def subject(self) -> Dict[str, str]:
+        return {name: value for field in self._name(4) for name, value in field}
+
+    @property
+    def not_before(self) -> datetime:
+        return self._validity()[0]
+
+    @property
+    def not_after(self) -> datetime:
+        return self._validity()[1]
+
+    @property
+    def subject_alt_names(self) -> List[Tuple[str, str]]:
+        extension = self._extension("2.5.29.17")
+        return [] if extension is None else [name for name in (_der_general_name(self.der, *element) for element in _der_children(self.der, *extension)) if name]
+
+    @property
+    def ocsp_urls(self) -> Tuple[str, ...]:
+        return self._access_urls("1.3.6.1.5.5.7.48.1")
+
+    @property
+    def ca_issuers(self) -> Tuple[str, ...]:
+        return self._access_urls("1.3.6.1.5.5.7.48.2")
+
+    @property
+    def crl_distribution_points(self) -> Tuple[str, ...]:
+        extension = self._extension("2.5.29.31")
+        return () if extension is None else tuple(_der_uris(self.der, *extension[:2]))
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha256(self.der).hexdigest()
+
+    def as_dict(self) -> dict:
+        """The cert's details in the same form as ssl.SSLSocket.getpeercert() (and get_ssl_cert())"""
+        cert = {
+            "subject": self._name(4),
+            "issuer": self._name(2),
+            "version": self.version,
+            "serialNumber": self.serial_number,
+            "notBefore": _cert_time(self.not_before),
+            "notAfter": _cert_time(self.not_after),
+        }
+        if self.subject_alt_names:
+            cert["subjectAltName"] = tuple(self.subject_alt_names)
+        for key, urls in (("OCSP", self.ocsp_urls), ("caIssuers", self.ca_issuers), ("crlDistributionPoints", self.crl_distribution_points)):
+            if urls:
+                cert[key] = urls
+        return cert
+
+    def _fields(self) -> List[Tuple[int, int, int]]:
+        """The (tag, start, end) of each field of the tbsCertificate"""
+        if self._tbs is None:
+            _, start, end = _der_element(self.der, 0)
+            tbs = _der_children(self.der, start, end)[0]
+            self._tbs = _der_children(self.der, tbs[1], tbs[2])
+        return self._tbs
+
+    def _field(self, index:int) -> Tuple[int, int, int]:
+        """The index'th field of the tbsCertificate, not counting the optional version"""
+        fields = self._fields()
+        return fields[index + 1] if fields[0][0] == 0xA0 else fields[index]
+
+    def _field_der(self, index:int) -> bytes:
+        """The whole element (header included) of the index'th field of the tbsCertificate, not counting the optional version"""
+        fields = self._fields()
+        position = fields.index(self._field(index))
+        if position:
+            start = fields[position - 1][2]
+        else:
+            _, start, _ = _der_element(self.der, 0)
+            _, start, _ = _der_element(self.der, start) # The start of the tbsCertificate's content
+        return self.der[start:fields[position][2]]
+
+    def _public_key_bits(self) -> bytes:
+        """The subjectPublicKey of the cert, without the BIT STRING's unused bits byte"""
+        _, start, end = self._field(5)
+        _, key_start, key_end = _der_children(self.der, start, end)[1]
+        return self.der[key_start + 1:key_end]
+
+    def _name(self, index:int) -> tuple:
+        """Reads the Name at field index"""
+        _, start, end = self._field(index)
+        return _der_name(self.der, start, end)
+
+    def _validity(self) -> Tuple[datetime, datetime]:
+        _, start, end = self._field(3)
+        (before_tag, before_start, before_end), (after_tag, after_start, after_end) = _der_children(self.der, start, end)
+        return _der_time(before_tag, self.der[before_start:before_end]), _der_time(after_tag, self.der[after_start:after_end])
+
+    def _extension(self, oid:str) -> Optional[Tuple[int, int]]:
+        """The (start, end) of an extension's value (inside it's OCTET STRING), or None if the cert doesn't have it"""
+        if self._extensions is None:
+            self._extensions = {}
+            for tag, start, end in self._fields():
+                if tag != 0xA3: # extensions are [3]
+                    continue
+                _, sequence_start, sequence_end = _der_element(self.der, start)
+                for _, extension_start, extension_end in _der_children(self.der, sequence_start, sequence_end):
+                    children = _der_children(self.der, extension_start, extension_end)
+                    _, value_start, value_end = children[-1] # Skips the optional critical flag
+                    self._extensions[_der_oid(self.der[children[0][1]:children[0][2]])] = (value_start, value_end)
+        extension = self._extensions.get(oid)
+        if extension is None:
+            return None
+        _, start, end = _der_element(self.der, extension[0]) # Unwrap the extension's own SEQUENCE
+        return start, end
+
+    def _access_urls(self, method:str) -> Tuple[str, ...]:
+        """The URL's for an access method (OCSP or caIssuers) in the authority information access extension"""
+        extension = self._extension("1.3.6.1.5.5.7.1.1")
+        if extension is None:
+            return ()
+        urls = []
+        for _, start, end in _der_children(self.der, *extension):
+            (_, oid_start, oid_end), location = _der_children(self.der, start, end)
+            if _der_oid(self.der[oid_start:oid_end]) == method and location[0] == 0x86:
+                urls.append(self.der[location[1]:location[2]].decode("ascii", "replace"))
+        return tuple(urls)
+
+
+class TLSProfile:
+    """The result of a single TLS handshake with a host, see probe_tls()
+
+    Attributes
+    ----------
+    hostname : str
+        The hostname that was probed
+
+    port : int
+        The port that was probed
+
+    cert : dict
+        The details of the peer's cert, in the same form as get_ssl_cert() (built from der when it's first read for lazy probes)
+
+    der : bytes
+        The peer's cert in binary (DER) form
+
+    certificate : Certificate
+        The peer's cert, parsed from der as it's fields are read
+
+    protocol : str
+        The negotiated TLS version (i.e. 'TLSv1.3')
+
+    cipher : str
+        The negotiated cipher suite (i.e. 'TLS_AES_256_GCM_SHA384')
+
+    address : Optional[str]
+        The IP address that was connected to
+
+    expiry : datetime.datetime
+        When the cert expires (notAfter), in UTC
+
+    days_remaining : int
+        How many whole days until the cert expires, negative if it already has
+
+    issuer : Dict[str, str]
+        The issuer's details (i.e. {'countryName': 'US', 'organizationName': 'Cloudflare, Inc.', 'commonName': 'Cloudflare Inc ECC CA-3'})
+
+    subject : Dict[str, str]
+        The subject's details (i.e. {'commonName': 'sni.cloudflaressl.com'})
+
+    subject_alt_names : List[str]
+        The DNS names and IP's the cert is valid for
+
+    Notes
+    -----
+    - expiry, issuer, subject and subject_alt_names are read straight from der, so they work for lazy probes without building cert
+    """
+    __slots__ = ("hostname", "port", "der", "protocol", "cipher", "address", "_cert", "_certificate")
+
+    def __init__(self, hostname:str, port:int, cert:Optional[dict], der:bytes, protocol:str, cipher:str, address:Optional[str]=None):
+        self.hostname = hostname
+        self.port = port
+        self.der = der
+        self.protocol = protocol
+        self.cipher = cipher
+        self.address = address
+        self._cert = cert or None # None until it's built from der
+        self._certificate = None
+
+    def __repr__(self) -> str:
+        return f"TLSProfile(hostname={self.hostname!r}, port={self.port}, address={self.address!r}, protocol={self.protocol!r}, cipher={self.cipher!r})"
+
+    @property
+    def cert(self) -> dict:
+        if self._cert is None:
+            self._cert = self.certificate.as_dict()
+        return self._cert
+
+    @property
+    def certificate(self) -> Certificate:
+        if self._certificate is None:
+            self._certificate = Certificate(self.der)
+        return self._certificate
+
+    @property
+    def expiry(self) -> datetime:
+        return self.certificate.not_after
+
+    @property
+    def days_remaining(self) -> int:
+        return (self.expiry - datetime.now(timezone.utc)).days
+
+    @property
+    def issuer(self) -> Dict[str, str]:
+        return self.certificate.issuer
+
+    @property
+    def subject(self) -> Dict[str, str]:
+        return self.certificate.subject
+
+    @property
+    def subject_alt_names(self) -> List[str]:
+        return [value for _, value in self.certificate.subject_alt_names]
+
+    def as_dict(self) -> Dict[str, Union[str, int, list, dict]]:
+        """The profile as a JSON serializable dictionary (without the cert's DER)"""
+        return {
+            "hostname": self.hostname,
+            "port": self.port,
+            "address": self.address,
+            "protocol": self.protocol,
+            "cipher": self.cipher,
+            "expiry": self.expiry.isoformat(),
+            "days_remaining": self.days_remaining,
+            "issuer": self.issuer,
+            "subject": self.subject,
+            "subject_alt_names": self.subject_alt_names,
+        }
+
+
+class SSLCache:
+    """A cache of TLS probe results keyed on how the host was probed, that stops reusing a cert before it expires
+
+    Attributes
+    ----------
+    max_age : float
+        The longest (in seconds) a probe result is reused for
+
+    expiry_margin : float
+        How long (in seconds) before a cert's notAfter to stop reusing it, so certs about to expire (or be renewed) are always re-probed
+
+    max_size : int
+        The maximum number of probe results held in memory, the least recently used result is evicted past this
+
+    path : Optional[str]
+        The path to a SQLite file that probe results are persisted to, or None to only cache in memory
+
+    hits : int
+        How many lookups were answered from the cache
+
+    misses : int
+        How many lookups were not in the cache (or had expired)
+
+    Notes
+    -----
+    - A probe result is reused until max_age has passed, or expiry_margin before the cert's notAfter, whichever comes first
+    - Results are keyed on the hostname, port, SNI name, STARTTLS protocol and whether the cert was verified, so a result from an 
+    unverified probe is never served to a probe that verifies (and i.e. 2525/smtp and 2525/tls are cached separately)
+    - A single cache can safely be shared between threads, and between bulk scans
+    - When a path is provided, results survive between processes (i.e. repeated `sws ssl` calls)
+    - Results from lazy probes are stored as only their DER, their cert dict is rebuilt from it if it's read
+
+    Examples
+    --------
+    ### Checking the same hosts every few minutes without reconnecting
+    ```
+    from sws.ssl_utilities import SSLCache, check_ssl_expiry
+
+    with SSLCache(path="ssl_cache.sqlite", max_age=3600) as cache:
+        print(check_ssl_expiry("kieranwood.ca", cache=cache)) # Only connects if the cached result is over an hour old
+        print(cache.age("kieranwood.ca"), cache.hit_rate)
+    ```
+    """
+    def __init__(self, max_age:float=SSL_CACHE_MAX_AGE, expiry_margin:float=SSL_CACHE_EXPIRY_MARGIN, max_size:int=SSL_CACHE_SIZE, path:Optional[str]=None):
+        self.max_age = max_age
+        self.expiry_margin = expiry_margin
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._profiles = OrderedDict() # (hostname, port, server_name, starttls, verified) -> (probed_at, expires, profile)
+        self._lock = threading.Lock()
+        self._database = None
+        if path:
+            logging.info(f"Opening SSL cache database at {path}")
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._database = sqlite3.connect(path, check_same_thread=False)
+            self._database.execute("CREATE TABLE IF NOT EXISTS tls_profiles (hostname TEXT, port INTEGER, server_name TEXT, starttls TEXT, verified INTEGER, probed_at REAL, expires REAL, cert TEXT, der BLOB, protocol TEXT, cipher TEXT, address TEXT, PRIMARY KEY (hostname, port, server_name, starttls, verified))")
+            if "address" not in [column[1] for column in self._database.execute("PRAGMA table_info(tls_profiles)")]: # Caches from before probes recorded the address
+                self._database.execute("ALTER TABLE tls_profiles ADD COLUMN address TEXT")
+            self._database.execute("DELETE FROM tls_profiles WHERE expires <= ?", (time.time(),))
+            self._database.commit()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_details):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"SSLCache(max_age={self.max_age}, expiry_margin={self.expiry_margin}, max_size={self.max_size}, path={self.path}) with {len(self)} results, {self.hits} hits and {self.misses} misses"
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that were answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, hostname:str, port:int=443, server_name:Optional[str]=None, starttls:Optional[str]=None, verified:bool=True) -> Optional[TLSProfile]:
+        """Looks up a probe result that can still be reused
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname that was probed
+
+        port : int, optional
+            The port that was probed, by default 443
+
+        server_name : Optional[str], optional
+            The name sent as SNI, by default None which means hostname
+
+        starttls : Optional[str], optional
+            The STARTTLS protocol the connection was upgraded over, by default None
+
+        verified : bool, optional
+            Whether the cert was verified, by default True
+
+        Returns
+        -------
+        Optional[TLSProfile]
+            The cached result, or None if there isn't one that can be reused
+        """
+        entry = self._lookup(_profile_key(hostname, port, server_name, starttls, verified))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[2]
+
+    def age(self, hostname:str, port:int=443, server_name:Optional[str]=None, starttls:Optional[str]=None, verified:bool=True) -> Optional[float]:
+        """How long ago (in seconds) the cached result for a host was probed, without counting as a hit or miss
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname that was probed
+
+        port : int, optional
+            The port that was probed, by default 443
+
+        server_name : Optional[str], optional
+            The name sent as SNI, by default None which means hostname
+
+        starttls : Optional[str], optional
+            The STARTTLS protocol the connection was upgraded over, by default None
+
+        verified : bool, optional
+            Whether the cert was verified, by default True
+
+        Returns
+        -------
+        Optional[float]
+            The age of the cached result, or None if there isn't one that can be reused
+        """
+        entry = self._lookup(_profile_key(hostname, port, server_name, starttls, verified))
+        return None if entry is None else time.time() - entry[0]
+
+    def put(self, profile:TLSProfile, server_name:Optional[str]=None, starttls:Optional[str]=None, verified:bool=True):
+        """Caches a probe result until max_age passes or it's cert is within expiry_margin of expiring
+
+        Parameters
+        ----------
+        profile : TLSProfile
+            The result of probe_tls(), results for certs that are already within expiry_margin of expiring are not cached
+
+        server_name : Optional[str], optional
+            The name sent as SNI, by default None which means the profile's hostname
+
+        starttls : Optional[str], optional
+            The STARTTLS protocol the connection was upgraded over, by default None
+
+        verified : bool, optional
+            Whether the cert was verified, by default True
+        """
+        probed_at = time.time()
+        expires = min(probed_at + self.max_age, profile.expiry.timestamp() - self.expiry_margin)
+        if expires <= probed_at:
+            return
+        key = _profile_key(profile.hostname, profile.port, server_name, starttls, verified)
+        with self._lock:
+            self._remember(key, (probed_at, expires, profile))
+            if self._database is not None:
+                self._database.execute("INSERT OR REPLACE INTO tls_profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (*key, probed_at, expires, None if profile._cert is None else json.dumps(profile._cert), profile.der, profile.protocol, profile.cipher, profile.address))
+                self._database.commit()
+
+    def clear(self):
+        """Removes every result from the cache (including any persisted results)"""
+        with self._lock:
+            self._profiles.clear()
+            if self._database is not None:
+                self._database.execute("DELETE FROM tls_profiles")
+                self._database.commit()
+
+    def close(self):
+        """Closes the cache database if there is one, the in-memory results are still usable"""
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
+    def _lookup(self, key:Tuple[str, int, str, str, bool]) -> Optional[Tuple[float, float, TLSProfile]]:
+        """Finds the reusable (probed_at, expires, profile) entry for a key from _profile_key()"""
+        with self._lock:
+            entry = self._profiles.get(key)
+            if entry is None and self._database is not None:
+                row = self._database.execute("SELECT probed_at, expires, cert, der, protocol, cipher, address FROM tls_profiles WHERE hostname = ? AND port = ? AND server_name = ? AND starttls = ? AND verified = ?", key).fetchone()
+                if row:
+                    entry = (row[0], row[1], TLSProfile(key[0], key[1], row[2] and _tuplify(json.loads(row[2])), row[3], row[4], row[5], row[6]))
+                    self._remember(key, entry)
+            if entry is None or entry[1] <= time.time():
+                return None
+            self._profiles.move_to_end(key)
+            return entry
+
+    def _remember(self, key:Tuple[str, int, str, str, bool], entry:Tuple[float, float, TLSProfile]):
+        """Stores an entry in memory and evicts the least recently used entries past max_size, must hold self._lock"""
+        self._profiles[key] = entry
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+
+class OCSPStatus:
+    """The revocation status of a cert, as reported by it's issuer's OCSP responder, see OCSPChecker
+
+    Attributes
+    ----------
+    status : str
+        'good', 'revoked', 'unknown' (the responder doesn't know the cert), or 'error' (the status couldn't be checked)
+
+    revoked_at : Optional[datetime.datetime]
+        When the cert was revoked, in UTC
+
+    reason : Optional[str]
+        Why the cert was revoked (i.e. 'keyCompromise'), if the responder said
+
+    this_update : Optional[datetime.datetime]
+        When the responder last knew the status was correct, in UTC
+
+    next_update : Optional[datetime.datetime]
+        When the responder will have newer information, in UTC (the status is cached until then, or an OCSPCache's max_age)
+
+    responder : Optional[str]
+        The URL of the responder that was asked
+
+    error : Optional[str]
+        Why the status couldn't be checked, when status is 'error'
+    """
+    __slots__ = ("status", "revoked_at", "reason", "this_update", "next_update", "responder", "error")
+
+    def __init__(self, status:str, revoked_at:Optional[datetime]=None, reason:Optional[str]=None, this_update:Optional[datetime]=None, next_update:Optional[datetime]=None, responder:Optional[str]=None, error:Optional[str]=None):
+        self.status = status
+        self.revoked_at = revoked_at
+        self.reason = reason
+        self.this_update = this_update
+        self.next_update = next_update
+        self.responder = responder
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"OCSPStatus(status={self.status!r}, revoked_at={self.revoked_at}, reason={self.reason!r}, next_update={self.next_update}, responder={self.responder!r}, error={self.error!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, OCSPStatus):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        """The status as a JSON serializable dictionary"""
+        return {
+            "status": self.status,
+            "revoked_at": self.revoked_at and self.revoked_at.isoformat(),
+            "reason": self.reason,
+            "this_update": self.this_update and self.this_update.isoformat(),
+            "next_update": self.next_update and self.next_update.isoformat(),
+            "responder": self.responder,
+            "error": self.error,
+        }
+
+
+class OCSPCache:
+    """A cache of OCSP statuses keyed on the cert they're for, each kept until the responder's nextUpdate (or max_age, whichever comes first)
+
+    Attributes
+    ----------
+    max_age : float
+        The longest (in seconds) a status is kept, so a revocation is noticed within max_age even if the responder's nextUpdate is far off
+
+    max_size : int
+        The maximum number of statuses held in memory, the least recently used status is evicted past this
+
+    path : Optional[str]
+        The path to a SQLite file that statuses are persisted to, or None to only cache in memory
+
+    hits : int
+        How many lookups were answered from the cache
+
+    misses : int
+        How many lookups were not in the cache (or had expired)
+
+    Notes
+    -----
+    - Statuses that are errors aren't cached, so they're retried on the next check
+    - Only statuses from responses whose signature OCSPChecker verified are ever returned by it, so only those are cached
+    - A single cache can safely be shared between threads, and between checkers
+
+    Examples
+    --------
+    ### Checking the same certs every few minutes, while only asking the responder when it has newer information
+    ```
+    from sws.ssl_utilities import OCSPCache, OCSPChecker, probe_tls
+
+    with OCSPCache(path="ocsp_cache.sqlite") as cache:
+        checker = OCSPChecker(cache=cache)
+        print(checker.check([probe_tls("kieranwood.ca")])[0].status) # good
+    ```
+    """
+    def __init__(self, max_age:float=OCSP_CACHE_MAX_AGE, max_size:int=OCSP_CACHE_SIZE, path:Optional[str]=None):
+        self.max_age = max_age
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._statuses = OrderedDict() # cert ID -> (expires, status)
+        self._lock = threading.Lock()
+        self._database = None
+        if path:
+            logging.info(f"Opening OCSP cache database at {path}")
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._database = sqlite3.connect(path, check_same_thread=False)
+            self._database.execute("CREATE TABLE IF NOT EXISTS ocsp_statuses (cert_id TEXT PRIMARY KEY, expires REAL, status TEXT, revoked_at REAL, reason TEXT, this_update REAL, next_update REAL, responder TEXT)")
+            self._database.execute("DELETE FROM ocsp_statuses WHERE expires <= ?", (time.time(),))
+            self._database.commit()
+
+    def __len__(self) -> int:
+        return len(self._statuses)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_details):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"OCSPCache(max_age={self.max_age}, max_size={self.max_size}, path={self.path}) with {len(self)} statuses, {self.hits} hits and {self.misses} misses"
+
+    def get(self, cert_id:str) -> Optional[OCSPStatus]:
+        """Looks up the status of a cert by it's ID (see OCSPChecker), or None if there isn't one that can still be used"""
+        with self._lock:
+            entry = self._statuses.get(cert_id)
+            if entry is None and self._database is not None:
+                row = self._database.execute("SELECT expires, status, revoked_at, reason, this_update, next_update, responder FROM ocsp_statuses WHERE cert_id = ?", (cert_id,)).fetchone()
+                if row:
+                    revoked_at, this_update, next_update = (None if value is None else datetime.fromtimestamp(value, tz=timezone.utc) for value in (row[2], row[4], row[5]))
+                    entry = (row[0], OCSPStatus(row[1], revoked_at, row[3], this_update, next_update, row[6]))
+                    self._remember(cert_id, entry)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return None
+            self._statuses.move_to_end(cert_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, cert_id:str, status:OCSPStatus):
+        """Caches the status of a cert until it's next_update (or max_age if that's sooner, or it doesn't have one), error statuses aren't cached"""
+        if status.status == "error":
+            return
+        expires = time.time() + self.max_age
+        if status.next_update:
+            expires = min(expires, status.next_update.timestamp())
+        if expires <= time.time():
+            return
+        with self._lock:
+            self._remember(cert_id, (expires, status))
+            if self._database is not None:
+                timestamps = (None if value is None else value.timestamp() for value in (status.revoked_at, status.this_update, status.next_update))
+                revoked_at, this_update, next_update = timestamps
+                self._database.execute("INSERT OR REPLACE INTO ocsp_statuses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (cert_id, expires, status.status, revoked_at, status.reason, this_update, next_update, status.responder))
+                self._database.commit()
+
+    def clear(self):
+        """Removes every status from the cache (including any persisted statuses)"""
+        with self._lock:
+            self._statuses.clear()
+            if self._database is not None:
+                self._database.execute("DELETE FROM ocsp_statuses")
+                self._database.commit()
+
+    def close(self):
+        """Closes the cache database if there is one, the in-memory statuses are still usable"""
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
+    def _remember(self, cert_id:str, entry:Tuple[float, OCSPStatus]):
+        """Stores an entry in memory and evicts the least recently used entries past max_size, must hold self._lock"""
+        self._statuses[cert_id] = entry
+        self._statuses.move_to_end(cert_id)
+        while len(self._statuses) > self.max_size:
+            self._statuses.popitem(last=False)
+
+
+class OCSPChecker:
+    """Checks whether certs have been revoked with their issuer's OCSP responder, batching certs from the same issuer and responder into one request
+
+    Attributes
+    ----------
+    context : ssl.SSLContext
+        The context whose CA certs are used to find each cert's issuer (issuers that aren't in it are downloaded from the cert's caIssuers URL)
+
+    cache : Optional[OCSPCache]
+        A cache of statuses, so certs are only checked again once the responder has newer information
+
+    responder : Optional[str]
+        A responder URL to send every request to instead of each cert's OCSP URL (i.e. a local OCSP proxy)
+
+    timeout : float
+        How long (in seconds) to wait for each responder request, or caIssuers download
+
+    batch_size : int
+        The most certs asked about in one request, responders that reject multi-cert requests are asked about each cert on it's own
+
+    max_workers : int
+        The maximum number of requests in flight at once
+
+    requests : int
+        How many requests have been sent to responders
+
+    Notes
+    -----
+    - Every response's signature is verified, it has to be signed by the cert's issuer, or by a responder cert the issuer signed for OCSP 
+    signing (that's in the response). Responses that don't verify make the status of their certs an error
+    - Each cert's issuer has to have signed the cert, whether it's one of the context's CA certs or was downloaded from caIssuers
+    - Each status is matched to the exact cert (issuer name, issuer key and serial) that was asked about
+    - Requests don't have a nonce, so responders (and caches in front of them) can answer from pre-signed responses; they're still signed, 
+    and only trusted until their nextUpdate
+
+    Examples
+    --------
+    ### Checking whether kieranwood.ca's cert has been revoked
+    ```
+    from sws.ssl_utilities import OCSPChecker, probe_tls
+
+    status = OCSPChecker().check([probe_tls("kieranwood.ca")])[0]
+    print(status.status, status.next_update) # good 2022-01-10 09:00:00+00:00
+    ```
+
+    ### Checking the revocation status of many hostnames at once
+    ```
+    from sws.ssl_utilities import OCSPCache, OCSPChecker, bulk_ssl_certs
+
+    with OCSPCache(path="ocsp_cache.sqlite") as cache:
+        for result in bulk_ssl_certs(["kieranwood.ca", "google.ca"], ocsp=OCSPChecker(cache=cache)):
+            print(result["hostname"], result["ocsp"]["status"] if result["ocsp"] else result["error"]) # kieranwood.ca good
+    ```
+    """
+    def __init__(self, context:Optional[ssl.SSLContext]=None, cache:Optional[OCSPCache]=None, responder:Optional[str]=None, timeout:float=OCSP_TIMEOUT, batch_size:int=OCSP_BATCH_SIZE, max_workers:int=OCSP_MAX_WORKERS):
+        self.context = context or get_ssl_context()
+        self.cache = cache
+        self.responder = responder
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.requests = 0
+        self._issuers = None # The issuer's name (DER) -> Certificate, of every known issuer
+        self._issuer_certs = {} # Certificate -> it's cryptography x509.Certificate, to verify responses with
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"OCSPChecker(context={self.context}, cache={self.cache}, responder={self.responder}, timeout={self.timeout}, batch_size={self.batch_size}, max_workers={self.max_workers})"
+
+    def check(self, certificates:Iterable[Union[TLSProfile, Certificate]]) -> List[OCSPStatus]:
+        """Checks the revocation status of certs, sending one request per batch_size certs with the same issuer and responder
+
+        Parameters
+        ----------
+        certificates : Iterable[Union[TLSProfile, Certificate]]
+            The certs to check (or the results of probe_tls())
+
+        Returns
+        -------
+        List[OCSPStatus]
+            The status of each cert, in the same order as certificates
+        """
+        logging.info(f"Entering OCSPChecker.check(certificates={certificates})")
+        certificates = [certificate.certificate if isinstance(certificate, TLSProfile) else certificate for certificate in certificates]
+        statuses = [None] * len(certificates)
+        pending = {} # (responder, issuer key hash) -> cert ID -> (cert ID DER, [indexes of the certs it's for], issuer)
+        for index, certificate in enumerate(certificates):
+            try:
+                issuer = self._issuer(certificate)
+                cert_id = _ocsp_cert_id(certificate, issuer)
+                responder = self.responder or next(iter(certificate.ocsp_urls), None)
+                if responder is None:
+                    raise ValueError("The cert doesn't have an OCSP responder")
+            except Exception as e:
+                logging.info(f"Can't check the OCSP status of {certificate} because {repr(e)}")
+                statuses[index] = OCSPStatus("error", error=repr(e))
+                continue
+            key = _ocsp_cert_id_key(cert_id)
+            status = None if self.cache is None else self.cache.get(key)
+            if status is not None:
+                statuses[index] = status
+                continue
+            requests = pending.setdefault((responder, cert_id[-2]), {}) # Grouped by the issuer key hash in the cert ID
+            requests.setdefault(key, (cert_id, [], issuer))[1].append(index)
+        batches = []
+        for (responder, _), requests in pending.items():
+            cert_ids = list(requests.values())
+            batches.extend((responder, cert_ids[start:start + self.batch_size]) for start in range(0, len(cert_ids), self.batch_size))
+        for (responder, batch), future in imap_unordered(lambda batch: self._query(*batch), batches, self.max_workers):
+            try:
+                answers = future.result()
+            except Exception as e:
+                logging.info(f"Querying OCSP responder {responder} failed with {repr(e)}")
+                answers = {}
+                error = OCSPStatus("error", responder=responder, error=repr(e))
+            else:
+                error = OCSPStatus("error", responder=responder, error="The responder didn't return a status for the cert")
+            for cert_id, indexes, _ in batch:
+                key = _ocsp_cert_id_key(cert_id)
+                status = answers.get(key, error)
+                if self.cache is not None:
+                    self.cache.put(key, status)
+                for index in indexes:
+                    statuses[index] = status
+        logging.info(f"Exiting OCSPChecker.check() and returning {statuses}")
+        return statuses
+
+    def _query(self, responder:str, batch:List[Tuple[tuple, List[int], Certificate]]) -> Dict[str, OCSPStatus]:
+        """Asks a responder about a batch of certs (that share an issuer), falling back to one request per cert if it won't answer for the whole batch"""
+        response_status, answers = self._post(responder, [cert_id for cert_id, _, _ in batch], batch[0][2])
+        if response_status == 0:
+            return answers
+        if len(batch) > 1:
+            logging.info(f"OCSP responder {responder} refused a batch of {len(batch)} certs ({OCSP_RESPONSE_STATUSES.get(response_status, response_status)}), asking about each on it's own")
+            answers = {}
+            for entry in batch:
+                answers.update(self._query(responder, [entry]))
+            return answers
+        raise ValueError(f"OCSP responder {responder} refused the request ({OCSP_RESPONSE_STATUSES.get(response_status, response_status)})")
+
+    def _post(self, responder:str, cert_ids:List[tuple], issuer:Certificate) -> Tuple[int, Dict[str, OCSPStatus]]:
+        """Sends one request to a responder, returning the response status and the status of each cert that was in it once the response is verified"""
+        with self._lock:
+            self.requests += 1
+        logging.info(f"Asking OCSP responder {responder} about {len(cert_ids)} certs")
+        response = requests.post(responder, data=_ocsp_request(cert_ids), headers={"Content-Type": "application/ocsp-request"}, timeout=self.timeout)
+        response.raise_for_status()
+        return _parse_ocsp_response(response.content, self._issuer_certs[issuer], responder)
 
+    def _issuer(self, certificate:Certificate) -> Certificate:
+        """Finds the cert that issued (and signed) certificate, in the context's CA certs or from it's caIssuers URL"""
+        issuer_name = certificate._field_der(2)
+        with self._lock:
+            if self._issuers is None:
+                self._issuers = {}
+                for der in self.context.get_ca_certs(binary_form=True):
+                    ca = Certificate(der)
+                    self._issuers[ca._field_der(4)] = ca
+            issuer = self._issuers.get(issuer_name)
+        if issuer is not None and self._signed_by(certificate, issuer):
+            return issuer
+        for url in certificate.ca_issuers:
+            logging.info(f"Downloading the issuer of {certificate} from {url}")
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            der = ssl.PEM_cert_to_DER_cert(response.text) if response.content.startswith(b"-----BEGIN") else response.content
+            issuer = Certificate(der)
+            if issuer._field_der(4) == issuer_name and self._signed_by(certificate, issuer): # Downloaded over HTTP, so only trusted once it's key checks out
+                with self._lock:
+                    self._issuers[issuer_name] = issuer
+                return issuer
+        raise ValueError("The cert's issuer couldn't be found")
 
-def check_ssl_expiry(hostname: str) -> str:
+    def _signed_by(self, certificate:Certificate, issuer:Certificate) -> bool:
+        """Whether issuer's key signed certificate, remembering the issuer's parsed cert for verifying responses"""
+        with self._lock:
+            issuer_cert = self._issuer_certs.get(issuer)
+        if issuer_cert is None:
+            issuer_cert = x509.load_der_x509_certificate(issuer.der)
+        try:
+            x509.load_der_x509_certificate(certificate.der).verify_directly_issued_by(issuer_cert)
+        except (InvalidSignature, ValueError, TypeError) as e:
+            logging.info(f"{certificate} wasn't signed by {issuer}: {repr(e)}")
+            return False
+        with self._lock:
+            self._issuer_certs[issuer] = issuer_cert
+        return True
+
+
+def check_ssl_expiry(hostname: str, cache: Optional[SSLCache] = None) -> str:
     """Allows you to check the SSL expiry for a FQDN;
     More specifically it will return the notAfter for the SSL cert associated with the FQDN.
 
@@ -81,6 +1116,9 @@ def check_ssl_expiry(hostname: str) -> str:
     hostname : str
         A string of a FQDN (root URL with no protocol) for example 'kieranwood.ca'.
 
+    cache : Optional[SSLCache]
+        A cache to reuse a recent probe of hostname from, and store the new probe in, by default None
+
     Returns
     -------
     str:
@@ -100,20 +1138,15 @@ def check_ssl_expiry(hostname: str) -> str:
     print(check_ssl_expiry('kieranwood.ca')) # prints: 'Oct  9 12:00:00 2020 GMT'
     ```
     """
-    logging.info(f"check_ssl_expiry(hostname={hostname})")
-    try:
-        logging.info(f"Getting cert info for {hostname}")
-        cert = get_ssl_cert(hostname)
-    except socket.gaierror:
-        raise ValueError(f"Unable to connect to {hostname}")
-
-    expiry_date = cert["notAfter"]
+    logging.info(f"check_ssl_expiry(hostname={hostname}, cache={cache})")
+    logging.info(f"Getting cert info for {hostname}")
+    expiry_date = probe_tls(hostname, cache=cache).cert["notAfter"]
 
     logging.info(f"exiting check_ssl_expiry() and returning {expiry_date}")
     return expiry_date
 
 
-def get_ssl_cert(hostname: str) -> dict:
+def get_ssl_cert(hostname: str, cache: Optional[SSLCache] = None) -> dict:
     """Returns all available SSL information, such as notAfter, commonName etc.
 
     Arguments
@@ -121,6 +1154,9 @@ def get_ssl_cert(hostname: str) -> dict:
     hostname : str
         A string of a FQDN (root URL with no protocol) for example 'kieranwood.ca'
 
+    cache : Optional[SSLCache]
+        A cache to reuse a recent probe of hostname from, and store the new probe in, by default None
+
     Raises
     ------
     ValueError:
@@ -166,28 +1202,15 @@ def get_ssl_cert(hostname: str) -> dict:
     '''
     ```
     """
-    logging.info(f"get_ssl_cert(hostname={hostname})")
-    # Strip protocols from hostname if they exist
-    if hostname.startswith("https://"):
-        logging.info(f"Stripping https:// protocol from {hostname}")
-        hostname = hostname.replace("https://", "")
-    elif hostname.startswith("http://"):
-        logging.info(f"Stripping http:// protocol from {hostname}")
-        hostname = hostname.replace("http://", "")
-
-    try:
-        logging.info("Making SSL socket connection to retrieve info")
-        context_socket = _get_ssl_socket(hostname)
-        context_socket.connect((hostname, 443))  # Connects to the host over a socket
-        cert = context_socket.getpeercert()  # Dictionary containing all the certificate information
-    except socket.gaierror:
-        raise ValueError(f"Unable to connect to {hostname}")
+    logging.info(f"get_ssl_cert(hostname={hostname}, cache={cache})")
+    logging.info("Making SSL socket connection to retrieve info")
+    cert = probe_tls(hostname, cache=cache).cert  # Dictionary containing all the certificate information
 
     logging.info(f"exiting get_ssl_cert() and returning {cert}")
     return cert
 
 
-def get_ssl_issuer(hostname: str) -> Union[list, bool]:
+def get_ssl_issuer(hostname: str, cache: Optional[SSLCache] = None) -> Union[list, bool]:
     """Get's the details for the issuer of the hostname's SSL cert
 
     Parameters
@@ -195,6 +1218,9 @@ def get_ssl_issuer(hostname: str) -> Union[list, bool]:
     hostname : str
         The hostname you want to get the issuer for
 
+    cache : Optional[SSLCache]
+        A cache to reuse a recent probe of hostname from, and store the new probe in, by default None
+
     Raises
     ------
     ValueError:
@@ -222,18 +1248,8 @@ def get_ssl_issuer(hostname: str) -> Union[list, bool]:
     get_ssl_issuer("kieranwood.com") # Returns False
     ```
     """
-    logging.info(f"get_ssl_issuer(hostname={hostname})")
-    # Strip protocols from hostname if they exist
-    if hostname.startswith("https://"):
-        logging.info(f"Stripping https:// protocol from {hostname}")
-        hostname = hostname.replace("https://", "")
-    elif hostname.startswith("http://"):
-        logging.info(f"Stripping http:// protocol from {hostname}")
-        hostname = hostname.replace("http://", "")
-    try:
-        cert = get_ssl_cert(hostname)
-    except socket.gaierror:
-        raise ValueError(f"Unable to connect to {hostname}")
+    logging.info(f"get_ssl_issuer(hostname={hostname}, cache={cache})")
+    cert = probe_tls(hostname, cache=cache).cert
     if cert["issuer"]:
         issuer = [data[0] for data in cert["issuer"]]
         logging.info(f"exiting get_ssl_issuer() and returning {issuer}")
@@ -243,37 +1259,917 @@ def get_ssl_issuer(hostname: str) -> Union[list, bool]:
         return False
 
 
-def _get_ssl_socket(hostname: str) -> ssl.SSLSocket:
-    """Get's the context for a host over SSL
+def probe_tls(hostname:str, port:int=443, timeout:Optional[float]=SSL_TIMEOUT, context:Optional[ssl.SSLContext]=None, cache:Optional[SSLCache]=None, refresh:bool=False, address:Optional[str]=None, server_name:Optional[str]=None, connect_timeout:float=SSL_CONNECT_TIMEOUT, handshake_timeout:float=SSL_HANDSHAKE_TIMEOUT, lazy:bool=False, starttls:Optional[str]=None, resume:bool=False) -> TLSProfile:
+    """Does a single TLS handshake with a host, and returns everything learned from it
 
     Parameters
     ----------
-    hostname: (str)
-        The hostname to instantiate a SSL socket context to
+    hostname : str
+        The hostname to probe, protocols are stripped
+
+    port : int, optional
+        The port to connect to, by default 443
+
+    timeout : Optional[float], optional
+        The overall deadline (in seconds) for the probe to connect, handshake and close, or None for no deadline, by default SSL_TIMEOUT
+
+    context : Optional[ssl.SSLContext], optional
+        The context to handshake with, by default None which uses get_ssl_context()
+
+    cache : Optional[SSLCache], optional
+        A cache to reuse a recent probe of the host (with the same SNI, STARTTLS protocol and verification) from, and store the new probe in 
+        (not used when address is set), by default None
+
+    refresh : bool, optional
+        Whether to always probe the host (and update the cache) even if there's a reusable result cached, by default False
+
+    address : Optional[str], optional
+        The IP address (or hostname) to connect to, by default None which connects to hostname
+
+    server_name : Optional[str], optional
+        The name to send as SNI and verify the cert against, by default None which uses hostname
+
+    connect_timeout : float, optional
+        How long (in seconds) to wait for the TCP connection, by default SSL_CONNECT_TIMEOUT
+
+    handshake_timeout : float, optional
+        How long (in seconds) to wait for the TLS handshake once connected, by default SSL_HANDSHAKE_TIMEOUT
+
+    lazy : bool, optional
+        Whether to only fetch the cert's DER and parse it's fields as they're read, instead of building the full cert dict up front, by default False
+
+    starttls : Optional[str], optional
+        The plaintext protocol ('smtp', 'imap' or 'pop3') to upgrade the connection over with STARTTLS before the handshake, by default None which handshakes straight away
+
+    resume : bool, optional
+        Whether to resume the last TLS session with the same name at the same address (and keep this one for the next probe), by default False. 
+        A resumed session reports the cert of the handshake it came from, so only resume when the cert isn't what's being checked
+
+    Returns
+    -------
+    TLSProfile
+        The cert (parsed and DER), negotiated protocol and cipher of the handshake
 
     Raises
     ------
-    ValueError:
-        If hostname is not a valid domain
+    ValueError
+        If hostname is not a valid domain, starttls isn't a supported protocol, or the server refused to start TLS
+
+    TimeoutError
+        If connecting or the handshake (including STARTTLS) took longer than their timeout, or the overall deadline passed
+
+    Notes
+    -----
+    - The socket is always closed before probe_tls() returns or raises, so probes can run at high concurrency without leaking file descriptors
+    - Looking up hostname's address is done by the system resolver and isn't bound by the timeouts, pass address to skip it
+    - When context doesn't verify certs, the cert's details are parsed from it's DER (as if lazy was True)
+    - Sessions are kept per context, name, address and port, so a session is never resumed with a different node behind the same name
+
+    Examples
+    --------
+    ### Checking the expiry and protocol of kieranwood.ca with one handshake
+    ```
+    from sws.ssl_utilities import probe_tls
+
+    profile = probe_tls("kieranwood.ca")
+    print(profile.expiry, profile.days_remaining, profile.protocol) # 2022-06-24 23:59:59+00:00 241 TLSv1.3
+    ```
+
+    ### Checking the cert one server behind a load balancer serves for kieranwood.ca on port 8443
+    ```
+    from sws.ssl_utilities import probe_tls
+
+    profile = probe_tls("kieranwood.ca", port=8443, address="203.0.113.10", connect_timeout=1, timeout=3)
+    print(profile.address, profile.expiry) # 203.0.113.10 2022-06-24 23:59:59+00:00
+    ```
+
+    ### Checking the cert of a mail server's submission port
+    ```
+    from sws.ssl_utilities import probe_tls
+
+    profile = probe_tls("smtp.gmail.com", port=587, starttls="smtp")
+    print(profile.expiry, profile.subject["commonName"]) # 2022-01-03 03:09:02+00:00 smtp.gmail.com
+    ```
+    """
+    logging.info(f"Entering probe_tls(hostname={hostname}, port={port}, timeout={timeout}, context={context}, cache={cache}, refresh={refresh}, address={address}, server_name={server_name}, connect_timeout={connect_timeout}, handshake_timeout={handshake_timeout}, lazy={lazy}, starttls={starttls}, resume={resume})")
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if starttls is not None and starttls not in SSL_STARTTLS_PROTOCOLS:
+        raise ValueError(f"{starttls} is not a supported STARTTLS protocol, use one of {', '.join(SSL_STARTTLS_PROTOCOLS)}")
+    hostname = _strip_protocol(hostname)
+    server_name = server_name or hostname
+    if address is not None: # The cache only holds results for a host's usual address
+        cache = None
+    context = context or get_ssl_context()
+    verified = context.verify_mode != ssl.CERT_NONE
+    if cache is not None and not refresh:
+        profile = cache.get(hostname, port, server_name, starttls, verified)
+        if profile is not None:
+            logging.info(f"Exiting probe_tls() and returning cached {profile}")
+            return profile
+    try:
+        connection = socket.create_connection((address or hostname, port), timeout=_time_left(connect_timeout, deadline))
+        with connection:
+            connection.settimeout(_time_left(handshake_timeout, deadline))
+            if starttls is not None:
+                _negotiate_starttls(connection, starttls, hostname)
+            peer_address = connection.getpeername()[0]
+            session = _cached_session(context, server_name, peer_address, port) if resume else None
+            with context.wrap_socket(connection, server_hostname=server_name, session=session) as tls_connection:
+                cert = None if lazy else tls_connection.getpeercert() # Empty for unverified certs, so they're always parsed from the DER
+                profile = TLSProfile(hostname, port, cert, tls_connection.getpeercert(binary_form=True), tls_connection.version(), tls_connection.cipher()[0], peer_address)
+                if resume: # Only wait for a session ticket when it'll be used
+                    _remember_session(tls_connection, server_name, peer_address, port, _time_left(SSL_SESSION_TICKET_WAIT, deadline, raise_on_timeout=False))
+    except socket.gaierror:
+        raise ValueError(f"Unable to connect to {hostname}")
+    except socket.timeout as e: # Only an alias of TimeoutError from python 3.10, before that it's an OSError
+        if isinstance(e, TimeoutError):
+            raise
+        raise TimeoutError(f"Probing {hostname}:{port} timed out ({e})") from e
+    if cache is not None:
+        cache.put(profile, server_name, starttls, verified)
+    logging.info(f"Exiting probe_tls() and returning {profile}")
+    return profile
+
+
+def bulk_ssl_certs(hostnames:Iterable[str], port:int=443, max_workers:int=SSL_MAX_WORKERS, timeout:float=SSL_TIMEOUT, context:Optional[ssl.SSLContext]=None, cache:Optional[SSLCache]=None, strict:bool=False, resolver:Optional[DNSResolver]=None, ocsp:Optional[OCSPChecker]=None) -> Generator[Dict[str, Union[str, list, dict, None]], None, None]:
+    """Fetches the SSL certs of many hostnames at once, yielding each hostname's result as soon as it's handshake finishes
+
+    Notes
+    -----
+    - hostnames is consumed lazily, only max_workers of them are in flight at any time so memory stays flat for huge inputs
+    - Results are yielded in the order hostnames finish, not the order they were passed in
+    - A hostname can include a port (i.e. 'kieranwood.ca:8443') to override port for just that hostname
+    - Only each cert's DER is fetched, and only the expiry, issuer and subject alt names are parsed out of it (see probe_tls(lazy=True))
+    - Unless strict is True, hostnames are grouped by the address they resolve to; once a handshake with an address finishes, any other hostname on 
+    that address (and port) that the cert's subject alt names cover (including wildcards) uses that cert instead of doing it's own handshake. 
+    This assumes the server would pick the same cert for each of those names, use strict if it might not
+    - When ocsp is passed, results are held back until ocsp.batch_size * ocsp.max_workers of them have finished (or hostnames runs out), so 
+    their revocation status can be checked in batches
+
+    Parameters
+    ----------
+    hostnames : Iterable[str]
+        The hostnames to get the certs for, protocols are stripped
+
+    port : int, optional
+        The port to connect to, by default 443
+
+    max_workers : int, optional
+        The maximum number of handshakes in flight at once, by default SSL_MAX_WORKERS
+
+    timeout : float, optional
+        The overall deadline (in seconds) for each hostname's probe to connect and handshake, by default SSL_TIMEOUT
+
+    context : Optional[ssl.SSLContext], optional
+        The context to handshake with, by default None which uses get_ssl_context()
+
+    cache : Optional[SSLCache], optional
+        A cache shared by every hostname's probe, by default None
+
+    strict : bool, optional
+        Whether to do a handshake (with it's own SNI) for every hostname instead of reusing certs between hostnames on the same address, by default False
+
+    resolver : Optional[DNSResolver], optional
+        The resolver used to look up the address of each hostname, by default None which uses the system resolver
+
+    ocsp : Optional[OCSPChecker], optional
+        The checker used to check whether each cert has been revoked, by default None which doesn't check
+
+    Yields
+    ------
+    Dict[str, Union[str, list, dict, None]]
+        A dictionary per hostname with the keys 'hostname', 'expiry' (the notAfter of the cert), 'issuer' (a dict of the issuer's details), 
+        'subject_alt_names' (a list of the DNS names and IP's the cert is valid for), 'shared_from' (the hostname whose handshake the cert came from, 
+        or None if the hostname had it's own), 'ocsp' (the cert's OCSPStatus.as_dict(), or None if ocsp wasn't passed), and 'error' (None, or a 
+        description of why the hostname failed, in which case the other keys are None)
+
+    Examples
+    --------
+    ### Printing the expiry of each hostname in a file as they finish
+    ```
+    from sws.ssl_utilities import bulk_ssl_certs
+
+    with open("hostnames.txt") as hostnames:
+        for result in bulk_ssl_certs(hostname.strip() for hostname in hostnames):
+            print(result["hostname"], result["expiry"] or result["error"]) # kieranwood.ca Oct  9 12:00:00 2020 GMT
+    ```
+    """
+    logging.info(f"Entering bulk_ssl_certs(hostnames={hostnames}, port={port}, max_workers={max_workers}, timeout={timeout}, context={context}, cache={cache}, strict={strict}, resolver={resolver})")
+    context = context or get_ssl_context()
+    targets = (_split_port(_strip_protocol(hostname), port) for hostname in hostnames)
+    shared_handshakes = _SharedHandshakes(timeout, context, cache, resolver, strict)
+    unchecked = [] # (result, cert) of the results waiting for their OCSP status
+    for (hostname, hostname_port), future in imap_unordered(shared_handshakes.probe, targets, max_workers):
+        if hostname_port != port:
+            hostname = f"{hostname}:{hostname_port}"
+        try:
+            profile, shared_from = future.result()
+        except Exception as e:
+            logging.info(f"Fetching cert for {hostname} failed with {repr(e)}")
+            yield {"hostname": hostname, "expiry": None, "issuer": None, "subject_alt_names": None, "shared_from": None, "ocsp": None, "error": repr(e)}
+            continue
+        result = {"hostname": hostname, "expiry": _cert_time(profile.expiry), "issuer": profile.issuer, "subject_alt_names": profile.subject_alt_names, "shared_from": shared_from, "ocsp": None, "error": None}
+        if ocsp is None:
+            yield result
+            continue
+        unchecked.append((result, profile.certificate))
+        if len(unchecked) >= ocsp.batch_size * ocsp.max_workers:
+            yield from _check_revocations(ocsp, unchecked)
+            unchecked = []
+    if unchecked:
+        yield from _check_revocations(ocsp, unchecked)
+    logging.info(f"Exiting bulk_ssl_certs() after {shared_handshakes.handshakes} handshakes, {shared_handshakes.shared} hostnames used the cert from another hostname's handshake")
+
+
+class _SharedHandshakes:
+    """Probes hostnames for bulk_ssl_certs(), reusing the cert from an earlier handshake with the same address when it covers the hostname
+
+    Notes
+    -----
+    - The first hostname on an (address, port) does a handshake, the rest wait for it to finish and only do their own if it failed or the cert doesn't cover them
+    - Each hostname's timeout covers the wait as well as it's own handshake, so hostnames on a blackholed address time out together
+    - One copy of each distinct cert is kept per (address, port) for the life of the scan
+    - When strict is True every hostname does it's own handshake
+    """
+    def __init__(self, timeout:float, context:ssl.SSLContext, cache:Optional[SSLCache], resolver:Optional[DNSResolver], strict:bool=False):
+        self.timeout = timeout
+        self.context = context
+        self.cache = cache
+        self.resolver = resolver
+        self.strict = strict
+        self.handshakes = 0
+        self.shared = 0
+        self._endpoints = {} # (address, port) -> (an Event set once the first handshake finishes, [(hostname, profile)] per distinct cert)
+        self._lock = threading.Lock()
+
+    def probe(self, target:Tuple[str, int]) -> Tuple[TLSProfile, Optional[str]]:
+        """Returns the profile for a (hostname, port) and the hostname whose handshake it came from (None if it's own)"""
+        hostname, port = target
+        deadline = time.monotonic() + self.timeout # Waiting for another hostname's handshake counts towards the timeout
+        if self.cache is not None:
+            profile = self.cache.get(hostname, port, verified=self.context.verify_mode != ssl.CERT_NONE)
+            if profile is not None:
+                return profile, None
+        address = min(_resolve_addresses(hostname, port, self.resolver), key=_address_key) # The lowest address, so names with the same addresses group together
+        if self.strict:
+            return self._handshake(hostname, port, address, deadline), None
+        with self._lock:
+            endpoint = self._endpoints.get((address, port))
+            first = endpoint is None
+            if first:
+                endpoint = self._endpoints[(address, port)] = (threading.Event(), [])
+        if first:
+            try:
+                profile = self._handshake(hostname, port, address, deadline)
+            finally:
+                endpoint[0].set()
+        else:
+            endpoint[0].wait(_time_left(self.timeout, deadline))
+            with self._lock:
+                served = list(endpoint[1])
+            for source, profile in served:
+                if _cert_covers(profile.certificate, hostname):
+                    logging.info(f"Using the cert from {source}'s handshake with {address} for {hostname}")
+                    profile = TLSProfile(hostname, port, profile._cert, profile.der, profile.protocol, profile.cipher, profile.address)
+                    with self._lock:
+                        self.shared += 1
+                    if self.cache is not None:
+                        self.cache.put(profile, verified=self.context.verify_mode != ssl.CERT_NONE)
+                    return profile, source
+            profile = self._handshake(hostname, port, address, deadline)
+        with self._lock:
+            if all(existing.der != profile.der for _, existing in endpoint[1]):
+                endpoint[1].append((hostname, profile))
+        return profile, None
+
+    def _handshake(self, hostname:str, port:int, address:str, deadline:float) -> TLSProfile:
+        """Probes hostname at address with the time left until deadline, and caches the result"""
+        profile = probe_tls(hostname, port, _time_left(self.timeout, deadline), self.context, lazy=True, address=address)
+        with self._lock:
+            self.handshakes += 1
+        if self.cache is not None:
+            self.cache.put(profile, verified=self.context.verify_mode != ssl.CERT_NONE)
+        return profile
+
+
+def _check_revocations(ocsp:OCSPChecker, unchecked:List[Tuple[dict, Certificate]]) -> Generator[dict, None, None]:
+    """Adds the OCSP status of each cert to it's bulk_ssl_certs() result, and yields the results"""
+    for (result, _), status in zip(unchecked, ocsp.check(certificate for _, certificate in unchecked)):
+        result["ocsp"] = status.as_dict()
+        yield result
+
+
+def check_ssl_consistency(hostname:str, port:int=443, addresses:Optional[Iterable[str]]=None, max_workers:int=SSL_MAX_WORKERS, timeout:float=SSL_TIMEOUT, context:Optional[ssl.SSLContext]=None, resolver:Optional[DNSResolver]=None) -> Dict[str, Any]:
+    """Handshakes with every address of a hostname at once (with the same SNI), and compares the certs they serve
+
+    Notes
+    -----
+    - Useful behind load balancers and CDN's, where a single probe only ever sees one node and a stale cert on another goes unnoticed
+    - An address that can't be probed makes the hostname inconsistent, but isn't counted as a mismatch
+
+    Parameters
+    ----------
+    hostname : str
+        The hostname to check, protocols are stripped
+
+    port : int, optional
+        The port to connect to, by default 443
+
+    addresses : Optional[Iterable[str]], optional
+        The IP addresses to probe, by default None which probes every A/AAAA address resolver returns for hostname
+
+    max_workers : int, optional
+        The maximum number of handshakes in flight at once, by default SSL_MAX_WORKERS
+
+    timeout : float, optional
+        The overall deadline (in seconds) for each address's probe to connect and handshake, by default SSL_TIMEOUT
+
+    context : Optional[ssl.SSLContext], optional
+        The context to handshake with, by default None which uses get_ssl_context()
+
+    resolver : Optional[DNSResolver], optional
+        The resolver used to look up the addresses of hostname (when addresses isn't set), by default None which uses the system resolver
 
     Returns
     -------
-    SSLSocket:
-        A socket that can be used to connect to the hostname
+    Dict[str, Any]
+        A dictionary with the keys 'hostname', 'port', 'consistent' (whether every address served the same cert), 'fingerprints' 
+        (the SHA-256 fingerprint of each cert served -> the addresses serving it), 'mismatched' (the addresses not serving the most common cert, or the latest expiring cert on a tie), 
+        and 'endpoints' (a list of dicts per address, sorted by address, with the keys 'address', 'fingerprint', 'expiry' (the notAfter of the cert), 
+        'days_remaining' and 'error' (None, or a description of why the address failed, in which case the other keys are None))
+
+    Raises
+    ------
+    ValueError
+        If hostname doesn't resolve to any addresses
 
     Examples
     --------
+    ### Finding the nodes behind kieranwood.ca that serve a different cert
     ```
-    context_socket = _get_ssl_context(hostname)
+    from sws.ssl_utilities import check_ssl_consistency
 
-    context_socket.connect((hostname, 443)) # Connects to the host over a socket
+    report = check_ssl_consistency("kieranwood.ca")
+    if not report["consistent"]:
+        for endpoint in report["endpoints"]:
+            print(endpoint["address"], endpoint["fingerprint"], endpoint["expiry"] or endpoint["error"]) # 104.21.51.76 9f2c...e1 Jun 24 23:59:59 2022 GMT
     ```
     """
-    # Strip protocols from hostname if they exist
-    if hostname.startswith("http://"):
-        hostname = hostname.replace("http://", "")
-    elif hostname.startswith("https://"):
+    logging.info(f"Entering check_ssl_consistency(hostname={hostname}, port={port}, addresses={addresses}, max_workers={max_workers}, timeout={timeout}, context={context}, resolver={resolver})")
+    hostname = _strip_protocol(hostname)
+    addresses = _resolve_addresses(hostname, port, resolver) if addresses is None else list(dict.fromkeys(addresses))
+    if not addresses:
+        raise ValueError(f"Unable to connect to {hostname}")
+    context = context or get_ssl_context()
+    endpoints = []
+    fingerprints = {}
+    expiries = {}
+    for address, future in imap_unordered(lambda address: probe_tls(hostname, port, timeout, context, address=address, lazy=True), addresses, max_workers):
+        try:
+            profile = future.result()
+        except Exception as e:
+            logging.info(f"Probing {hostname} at {address} failed with {repr(e)}")
+            endpoints.append({"address": address, "fingerprint": None, "expiry": None, "days_remaining": None, "error": repr(e)})
+            continue
+        fingerprint = profile.certificate.fingerprint
+        fingerprints.setdefault(fingerprint, []).append(address)
+        expiries[fingerprint] = profile.expiry
+        endpoints.append({"address": address, "fingerprint": fingerprint, "expiry": _cert_time(profile.expiry), "days_remaining": profile.days_remaining, "error": None})
+    endpoints.sort(key=lambda endpoint: _address_key(endpoint["address"]))
+    for served_by in fingerprints.values():
+        served_by.sort(key=_address_key)
+    most_common = max(fingerprints, key=lambda fingerprint: (len(fingerprints[fingerprint]), expiries[fingerprint]), default=None) # Ties go to the newest cert
+    mismatched = sorted((address for fingerprint, served_by in fingerprints.items() if fingerprint != most_common for address in served_by), key=_address_key)
+    report = {
+        "hostname": hostname,
+        "port": port,
+        "consistent": len(fingerprints) == 1 and all(endpoint["error"] is None for endpoint in endpoints),
+        "fingerprints": fingerprints,
+        "mismatched": mismatched,
+        "endpoints": endpoints,
+    }
+    logging.info(f"Exiting check_ssl_consistency() and returning {report}")
+    return report
+
+
+def scan_tls_ports(hostname:str, ports:Iterable[Union[int, str]]=SSL_SCAN_PORTS, max_workers:int=SSL_MAX_WORKERS, timeout:float=SSL_TIMEOUT, context:Optional[ssl.SSLContext]=None, cache:Optional[SSLCache]=None) -> Dict[str, Any]:
+    """Checks the certs a hostname serves on many ports at once (using STARTTLS where the port needs it), merged into one report
+
+    Notes
+    -----
+    - STARTTLS is used on the ports in SSL_STARTTLS_PORTS (SMTP on 25 and 587, IMAP on 143, POP3 on 110), every other port is probed with implicit TLS
+    - A port can be given as 'port/protocol' (i.e. '2525/smtp') to pick the STARTTLS protocol, or 'port/tls' for implicit TLS
+    - Closed and filtered ports are reported with an error, they don't stop the other ports being checked
+
+    Parameters
+    ----------
+    hostname : str
+        The hostname to check, protocols are stripped
+
+    ports : Iterable[Union[int, str]], optional
+        The ports to check, by default SSL_SCAN_PORTS
+
+    max_workers : int, optional
+        The maximum number of handshakes in flight at once, by default SSL_MAX_WORKERS
+
+    timeout : float, optional
+        The overall deadline (in seconds) for each port's probe to connect, negotiate STARTTLS and handshake, by default SSL_TIMEOUT
+
+    context : Optional[ssl.SSLContext], optional
+        The context to handshake with, by default None which uses get_ssl_context()
+
+    cache : Optional[SSLCache], optional
+        A cache shared by every port's probe, by default None
+
+    Returns
+    -------
+    Dict[str, Any]
+        A dictionary with the keys 'hostname', 'expiry' and 'days_remaining' (of the cert that expires first across all ports, or None if no port could be checked), 
+        and 'ports' (a list of dicts per port, sorted by port, with the keys 'port', 'starttls' (the protocol used, or None for implicit TLS), 'protocol' (the negotiated TLS version), 
+        'expiry' (the notAfter of the cert), 'days_remaining', 'fingerprint' (the cert's SHA-256 fingerprint), and 'error' (None, or a description of why the port failed, 
+        in which case the other keys are None))
+
+    Raises
+    ------
+    ValueError
+        If a port isn't a number, or it's protocol isn't 'tls' or one of SSL_STARTTLS_PROTOCOLS
+
+    Examples
+    --------
+    ### Checking the certs of a mail server
+    ```
+    from sws.ssl_utilities import scan_tls_ports
+
+    report = scan_tls_ports("mail.example.com", ports=[25, 465, 587, 993, 995])
+    print(report["expiry"], report["days_remaining"]) # Jun 24 23:59:59 2022 GMT 241
+    for result in report["ports"]:
+        print(result["port"], result["starttls"], result["expiry"] or result["error"]) # 587 smtp Jun 24 23:59:59 2022 GMT
+    ```
+    """
+    logging.info(f"Entering scan_tls_ports(hostname={hostname}, ports={ports}, max_workers={max_workers}, timeout={timeout}, context={context}, cache={cache})")
+    hostname = _strip_protocol(hostname)
+    targets = list(dict.fromkeys(_parse_port(port) for port in ports))
+    context = context or get_ssl_context()
+    results = []
+    for (port, starttls), future in imap_unordered(lambda target: probe_tls(hostname, target[0], timeout, context, cache, lazy=True, starttls=target[1]), targets, max_workers):
+        try:
+            profile = future.result()
+        except Exception as e:
+            logging.info(f"Probing {hostname}:{port} failed with {repr(e)}")
+            results.append({"port": port, "starttls": starttls, "protocol": None, "expiry": None, "days_remaining": None, "fingerprint": None, "error": repr(e)})
+            continue
+        results.append({"port": port, "starttls": starttls, "protocol": profile.protocol, "expiry": profile.expiry, "days_remaining": profile.days_remaining, "fingerprint": profile.certificate.fingerprint, "error": None})
+    results.sort(key=lambda result: (result["port"], result["starttls"] or ""))
+    first_expiry = min((result for result in results if result["error"] is None), key=lambda result: result["expiry"], default=None)
+    for result in results:
+        if result["expiry"] is not None:
+            result["expiry"] = _cert_time(result["expiry"])
+    report = {
+        "hostname": hostname,
+        "expiry": first_expiry and first_expiry["expiry"],
+        "days_remaining": first_expiry and first_expiry["days_remaining"],
+        "ports": results,
+    }
+    logging.info(f"Exiting scan_tls_ports() and returning {report}")
+    return report
+
+
+def get_ssl_context(cafile:Optional[str]=None, verify:bool=True, minimum_version:ssl.TLSVersion=SSL_MINIMUM_VERSION) -> ssl.SSLContext:
+    """Returns the process-wide SSL context for a configuration, so the CA bundle is only loaded once
+
+    Notes
+    -----
+    - Contexts are cached per set of arguments, so every call with the same arguments returns the same context
+    - TLS sessions are cached per context, so probing a host again with the same context (and resume=True) resumes the session instead of doing a full handshake
+    - The returned context is shared, so don't modify it (call get_ssl_context() with different arguments instead)
+
+    Parameters
+    ----------
+    cafile : Optional[str], optional
+        The path to a PEM bundle of CA certs to trust, by default None which uses the system's CA certs
+
+    verify : bool, optional
+        Whether to verify the cert and hostname (if False the cert's details are still parsed, but aren't trustworthy), by default True
+
+    minimum_version : ssl.TLSVersion, optional
+        The oldest TLS version to negotiate, by default SSL_MINIMUM_VERSION
+
+    Returns
+    -------
+    ssl.SSLContext
+        The shared context for the configuration
+
+    Examples
+    --------
+    ### Checking certs issued by an internal CA
+    ```
+    from sws.ssl_utilities import bulk_ssl_certs, get_ssl_context
+
+    context = get_ssl_context(cafile="/etc/pki/internal-ca.pem")
+    for result in bulk_ssl_certs(["intranet.example.com"], context=context):
+        print(result["hostname"], result["expiry"]) # intranet.example.com Oct  9 12:00:00 2030 GMT
+    ```
+    """
+    return _build_ssl_context(cafile, verify, minimum_version)
+
+
+@lru_cache(maxsize=None)
+def _build_ssl_context(cafile:Optional[str], verify:bool, minimum_version:ssl.TLSVersion) -> ssl.SSLContext:
+    """Builds the context for get_ssl_context(), cached by argument"""
+    logging.info(f"Building SSL context (cafile={cafile}, verify={verify}, minimum_version={minimum_version})")
+    context = ssl.create_default_context(cafile=cafile)
+    context.minimum_version = minimum_version
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def clear_ssl_sessions():
+    """Forgets every cached TLS session, so the next probe of each host does a full handshake"""
+    with _sessions_lock:
+        _sessions.clear()
+
+
+def _profile_key(hostname:str, port:int, server_name:Optional[str], starttls:Optional[str], verified:bool) -> Tuple[str, int, str, str, bool]:
+    """The SSLCache key of a probe, empty strings stand in for None so the key works as a SQLite primary key"""
+    return (hostname.lower(), port, (server_name or hostname).lower(), starttls or "", verified)
+
+
+def _cached_session(context:ssl.SSLContext, hostname:str, address:str, port:int) -> Optional[ssl.SSLSession]:
+    """Returns the last TLS session with a host at an address made through context, if there is one"""
+    with _sessions_lock:
+        session = _sessions.get((context, hostname, address, port))
+        if session is not None:
+            _sessions.move_to_end((context, hostname, address, port))
+        return session
+
+
+def _remember_session(tls_connection:ssl.SSLSocket, hostname:str, address:str, port:int, ticket_wait:float=SSL_SESSION_TICKET_WAIT):
+    """Caches the TLS session of a finished handshake so the next connection to the host at the same address can resume it"""
+    if tls_connection.version() == "TLSv1.3" and not tls_connection.session.has_ticket:
+        # TLS 1.3 tickets are sent after the handshake, so they have to be read before the session is resumable
+        if ticket_wait <= 0:
+            return
+        timeout = tls_connection.gettimeout()
+        tls_connection.settimeout(ticket_wait)
+        try:
+            tls_connection.recv(1)
+        except (OSError, ssl.SSLError):
+            ...  # No ticket (or data) arrived in time
+        tls_connection.settimeout(timeout)
+        if not tls_connection.session.has_ticket:
+            return
+    with _sessions_lock:
+        _sessions[(tls_connection.context, hostname, address, port)] = tls_connection.session
+        _sessions.move_to_end((tls_connection.context, hostname, address, port))
+        if len(_sessions) > SSL_SESSION_CACHE_SIZE:
+            _sessions.popitem(last=False)
+
+
+def _negotiate_starttls(connection:socket.socket, protocol:str, hostname:str):
+    """Has the plaintext SMTP, IMAP or POP3 conversation that asks a server to start TLS, leaving the connection ready for the handshake"""
+    if protocol == "smtp":
+        _starttls_reply(connection, hostname, None, "220", lambda line: line[3:4] != "-") # Replies can span lines, the last has a space after the code
+        capabilities = _starttls_reply(connection, hostname, b"EHLO sws.localhost\r\n", "250", lambda line: line[3:4] != "-")
+        if "STARTTLS" not in capabilities.upper():
+            raise ValueError(f"{hostname} doesn't offer STARTTLS over {protocol}")
+        _starttls_reply(connection, hostname, b"STARTTLS\r\n", "220", lambda line: line[3:4] != "-")
+    elif protocol == "imap":
+        _starttls_reply(connection, hostname, None, "* OK", lambda line: True)
+        _starttls_reply(connection, hostname, b"sws1 STARTTLS\r\n", "sws1 OK", lambda line: line.startswith("sws1 ")) # Skips untagged replies
+    elif protocol == "pop3":
+        _starttls_reply(connection, hostname, None, "+OK", lambda line: True)
+        _starttls_reply(connection, hostname, b"STLS\r\n", "+OK", lambda line: True)
+
+
+def _starttls_reply(connection:socket.socket, hostname:str, command:Optional[bytes], expected:str, is_last_line) -> str:
+    """Sends a plaintext command (if there is one) and reads lines until is_last_line, raising ValueError if the last line doesn't start with expected"""
+    if command is not None:
+        connection.sendall(command)
+    reply = b""
+    while True:
+        chunk = connection.recv(4096)
+        if not chunk:
+            raise ValueError(f"{hostname} hung up while negotiating STARTTLS")
+        reply += chunk
+        if len(reply) > SSL_STARTTLS_MAX_REPLY:
+            raise ValueError(f"{hostname} sent too much while negotiating STARTTLS")
+        if reply.endswith(b"\n"): # Servers wait for the next command after a whole reply, so it always ends a read
+            last_line = reply.decode("utf-8", "replace").splitlines()[-1]
+            if is_last_line(last_line):
+                break
+    if not last_line.startswith(expected):
+        raise ValueError(f"{hostname} refused to start TLS: {last_line.strip()}")
+    return reply.decode("utf-8", "replace")
+
+
+def _parse_port(port:Union[int, str]) -> Tuple[int, Optional[str]]:
+    """Splits a port (i.e. 587, '993' or '2525/smtp') into the port number and STARTTLS protocol to use on it"""
+    number, _, protocol = str(port).partition("/")
+    if not number.strip().isdigit():
+        raise ValueError(f"{port} is not a valid port")
+    number = int(number)
+    protocol = protocol.strip().lower()
+    if not protocol:
+        return number, SSL_STARTTLS_PORTS.get(number)
+    if protocol == "tls":
+        return number, None
+    if protocol not in SSL_STARTTLS_PROTOCOLS:
+        raise ValueError(f"{protocol} is not a supported STARTTLS protocol, use one of tls, {', '.join(SSL_STARTTLS_PROTOCOLS)}")
+    return number, protocol
+
+
+def _time_left(limit:float, deadline:Optional[float], raise_on_timeout:bool=True) -> float:
+    """The smaller of limit and the time until deadline (a time.monotonic() value), raising TimeoutError if the deadline has passed"""
+    if deadline is None:
+        return limit
+    remaining = deadline - time.monotonic()
+    if remaining <= 0 and raise_on_timeout:
+        raise TimeoutError("The probe's deadline passed")
+    return max(0.0, min(limit, remaining))
+
+
+def _resolve_addresses(hostname:str, port:int, resolver:Optional[DNSResolver]=None) -> List[str]:
+    """Every (A and AAAA) address of a hostname from resolver (or the system resolver if it's None), in the order they're returned"""
+    if resolver is None:
+        try:
+            results = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            raise ValueError(f"Unable to connect to {hostname}")
+        return list(dict.fromkeys(result[4][0] for result in results))
+    if _address_key(hostname)[0] != 7: # Already an IP address
+        return [hostname]
+    addresses = []
+    for record_type in ("A", "AAAA"):
+        try:
+            addresses.extend(str(record) for record in resolver.resolve(hostname, record_type))
+        except dns.exception.DNSException as e:
+            logging.info(f"Looking up the {record_type} records of {hostname} failed with {repr(e)}")
+    if not addresses:
+        raise ValueError(f"Unable to connect to {hostname}")
+    return list(dict.fromkeys(addresses))
+
+
+def _cert_covers(certificate:Certificate, hostname:str) -> bool:
+    """Whether a cert's subject alt names cover hostname, where a * can only stand in for the whole leftmost label (like hostname verification)"""
+    hostname = hostname.lower().rstrip(".")
+    is_address = _address_key(hostname)[0] != 7
+    for kind, value in certificate.subject_alt_names:
+        if is_address:
+            if kind == "IP Address" and ipaddress.ip_address(value) == ipaddress.ip_address(hostname):
+                return True
+        elif kind == "DNS":
+            pattern = value.lower().rstrip(".")
+            if pattern == hostname or (pattern.startswith("*.") and hostname.partition(".")[2] == pattern[2:] and hostname.partition(".")[0]):
+                return True
+    return False
+
+
+def _address_key(address:str) -> Tuple[int, Union[int, str]]:
+    """Sorts IPv4 addresses before IPv6 addresses, numerically, and anything that isn't an IP after both"""
+    try:
+        parsed = ipaddress.ip_address(address)
+    except ValueError:
+        return 7, address
+    return parsed.version, int(parsed)
+
+
+def _split_port(hostname:str, default_port:int) -> Tuple[str, int]:
+    """Splits an optional :port off of a hostname"""
+    host, separator, port = hostname.rpartition(":")
+    if separator and port.isdigit() and ":" not in host:
+        return host, int(port)
+    return hostname, default_port
+
+
+def _strip_protocol(hostname:str) -> str:
+    """Strips a leading http:// or https:// from a hostname"""
+    if hostname.startswith("https://"):
+        logging.info(f"Stripping https:// protocol from {hostname}")
         hostname = hostname.replace("https://", "")
-    context = ssl.create_default_context()
-    context_socket = context.wrap_socket(socket.socket(), server_hostname=hostname)
-    return context_socket
+    elif hostname.startswith("http://"):
+        logging.info(f"Stripping http:// protocol from {hostname}")
+        hostname = hostname.replace("http://", "")
+    return hostname
+
+
+def _tuplify(value:Any) -> Any:
+    """Converts the lists in a JSON decoded cert back into the tuples getpeercert() returns"""
+    if isinstance(value, list):
+        return tuple(_tuplify(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _tuplify(item) for key, item in value.items()}
+    return value
+
+
+# The names getpeercert() gives the attributes of a cert's subject and issuer
+_NAME_ATTRIBUTES = {
+    "2.5.4.3": "commonName",
+    "2.5.4.4": "surname",
+    "2.5.4.5": "serialNumber",
+    "2.5.4.6": "countryName",
+    "2.5.4.7": "localityName",
+    "2.5.4.8": "stateOrProvinceName",
+    "2.5.4.9": "streetAddress",
+    "2.5.4.10": "organizationName",
+    "2.5.4.11": "organizationalUnitName",
+    "2.5.4.12": "title",
+    "2.5.4.15": "businessCategory",
+    "2.5.4.17": "postalCode",
+    "2.5.4.42": "givenName",
+    "2.5.4.97": "organizationIdentifier",
+    "0.9.2342.19200300.100.1.25": "domainComponent",
+    "1.2.840.113549.1.9.1": "emailAddress",
+    "1.3.6.1.4.1.311.60.2.1.1": "jurisdictionLocalityName",
+    "1.3.6.1.4.1.311.60.2.1.2": "jurisdictionStateOrProvinceName",
+    "1.3.6.1.4.1.311.60.2.1.3": "jurisdictionCountryName",
+}
+
+
+def _der_element(der:bytes, offset:int) -> Tuple[int, int, int]:
+    """Reads the header of the DER element at offset, returning it's (tag, content start, content end)"""
+    tag = der[offset]
+    length = der[offset + 1]
+    offset += 2
+    if length & 0x80: # Long form, the low bits are how many bytes the length takes
+        size = length & 0x7F
+        length = int.from_bytes(der[offset:offset + size], "big")
+        offset += size
+    if offset + length > len(der):
+        raise ValueError("Truncated DER element")
+    return tag, offset, offset + length
+
+
+def _der_children(der:bytes, start:int, end:int) -> List[Tuple[int, int, int]]:
+    """The (tag, content start, content end) of each element between start and end"""
+    children = []
+    while start < end:
+        child = _der_element(der, start)
+        children.append(child)
+        start = child[2]
+    return children
+
+
+def _der_integer(content:bytes) -> int:
+    return int.from_bytes(content, "big", signed=True)
+
+
+def _der_oid(content:bytes) -> str:
+    """Decodes the content of an OBJECT IDENTIFIER into dotted form"""
+    arcs = []
+    value = 0
+    for byte in content:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+    first = min(arcs[0] // 40, 2)
+    return ".".join(str(arc) for arc in [first, arcs[0] - first * 40] + arcs[1:])
+
+
+def _der_string(tag:int, content:bytes) -> str:
+    """Decodes the content of any of the ASN.1 string types"""
+    if tag == 0x1E: # BMPString
+        return content.decode("utf-16-be", "replace")
+    if tag == 0x1C: # UniversalString
+        return content.decode("utf-32-be", "replace")
+    if tag == 0x14: # TeletexString
+        return content.decode("latin-1")
+    return content.decode("utf-8", "replace")
+
+
+def _der_time(tag:int, content:bytes) -> datetime:
+    """Decodes a UTCTime or GeneralizedTime into a UTC datetime"""
+    text = content.decode("ascii").rstrip("Z")
+    if tag == 0x17: # UTCTime has a 2 digit year, 50-99 are 1900's
+        year = int(text[:2])
+        text = str(1900 + year if year >= 50 else 2000 + year) + text[2:]
+    return datetime(int(text[0:4]), int(text[4:6]), int(text[6:8]), int(text[8:10]), int(text[10:12]), int(text[12:14]), tzinfo=timezone.utc)
+
+
+def _der_name(der:bytes, start:int, end:int) -> tuple:
+    """Decodes the content of a Name into ((name, value),) tuples like getpeercert()"""
+    name = []
+    for _, set_start, set_end in _der_children(der, start, end):
+        attributes = []
+        for _, attribute_start, attribute_end in _der_children(der, set_start, set_end):
+            (_, oid_start, oid_end), (value_tag, value_start, value_end) = _der_children(der, attribute_start, attribute_end)[:2]
+            oid = _der_oid(der[oid_start:oid_end])
+            attributes.append((_NAME_ATTRIBUTES.get(oid, oid), _der_string(value_tag, der[value_start:value_end])))
+        name.append(tuple(attributes))
+    return tuple(name)
+
+
+def _der_general_name(der:bytes, tag:int, start:int, end:int) -> Optional[Tuple[str, str]]:
+    """Decodes a GeneralName into the (type, value) form getpeercert() uses, or None for types it doesn't include"""
+    content = der[start:end]
+    if tag == 0x82:
+        return "DNS", content.decode("ascii", "replace")
+    if tag == 0x87: # IP addresses are formatted like OpenSSL does
+        if len(content) == 4:
+            return "IP Address", ".".join(str(byte) for byte in content)
+        return "IP Address", ":".join(f"{int.from_bytes(content[index:index + 2], 'big'):X}" for index in range(0, len(content), 2))
+    if tag == 0x81:
+        return "email", content.decode("ascii", "replace")
+    if tag == 0x86:
+        return "URI", content.decode("ascii", "replace")
+    if tag == 0xA4: # directoryName wraps a Name
+        _, name_start, name_end = _der_element(der, start)
+        return "DirName", _der_name(der, name_start, name_end)
+    return None
+
+
+def _der_uris(der:bytes, start:int, end:int) -> Generator[str, None, None]:
+    """Finds every URI GeneralName nested anywhere between start and end (i.e. in CRL distribution points)"""
+    for tag, child_start, child_end in _der_children(der, start, end):
+        if tag == 0x86:
+            yield der[child_start:child_end].decode("ascii", "replace")
+        elif tag & 0x20: # Constructed, so look inside
+            yield from _der_uris(der, child_start, child_end)
+
+
+def _cert_time(moment:datetime) -> str:
+    """Formats a datetime like the notBefore/notAfter of getpeercert() (i.e. 'Oct  9 12:00:00 2020 GMT')"""
+    return f"{moment.strftime('%b')} {moment.day:>2} {moment.strftime('%H:%M:%S %Y')} GMT"
+
+
+def _der_encode(tag:int, content:bytes) -> bytes:
+    """Encodes a DER element"""
+    length = len(content)
+    if length < 0x80:
+        return bytes((tag, length)) + content
+    size = (length.bit_length() + 7) // 8
+    return bytes((tag, 0x80 | size)) + length.to_bytes(size, "big") + content
+
+
+def _ocsp_cert_id(certificate:Certificate, issuer:Certificate) -> Tuple[bytes, bytes, bytes]:
+    """The (issuer name hash, issuer key hash, serial number) that identify a cert to an OCSP responder, hashed with SHA-1 like every responder accepts"""
+    return hashlib.sha1(certificate._field_der(2)).digest(), hashlib.sha1(issuer._public_key_bits()).digest(), certificate._field_der(0)
+
+
+def _ocsp_cert_id_key(cert_id:Tuple[bytes, bytes, bytes]) -> str:
+    """A cert ID as text, to key caches and responses on"""
+    return ":".join(part.hex() for part in cert_id)
+
+
+def _ocsp_request(cert_ids:List[Tuple[bytes, bytes, bytes]]) -> bytes:
+    """Builds an (unsigned, nonce-less) OCSPRequest for a list of cert IDs"""
+    requests = b"".join(_der_encode(0x30, _der_encode(0x30, _OCSP_SHA1 + _der_encode(0x04, name_hash) + _der_encode(0x04, key_hash) + serial)) for name_hash, key_hash, serial in cert_ids)
+    return _der_encode(0x30, _der_encode(0x30, _der_encode(0x30, requests)))
+
+
+def _parse_ocsp_response(der:bytes, issuer:x509.Certificate, responder:Optional[str]=None) -> Tuple[int, Dict[str, OCSPStatus]]:
+    """Reads the response status and the status of each cert (keyed by _ocsp_cert_id_key()) out of an OCSPResponse, once it's signature is verified
+
+    Raises a ValueError if the response isn't signed by issuer, or by a responder cert in the response that issuer authorised for OCSP signing
+    """
+    response = ocsp.load_der_ocsp_response(der)
+    if response.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+        return response.response_status.value, {}
+    _verify_ocsp_response(response, issuer)
+    statuses = {}
+    for single in response.responses:
+        if not isinstance(single.hash_algorithm, hashes.SHA1): # Not a cert ID that was asked about
+            continue
+        serial = single.serial_number.to_bytes(single.serial_number.bit_length() // 8 + 1, "big", signed=True)
+        status = OCSPStatus(single.certificate_status.name.lower(), this_update=single.this_update_utc, next_update=single.next_update_utc, responder=responder)
+        if single.certificate_status == ocsp.OCSPCertStatus.REVOKED:
+            status.revoked_at = single.revocation_time_utc
+            status.reason = single.revocation_reason and single.revocation_reason.value
+        statuses[_ocsp_cert_id_key((single.issuer_name_hash, single.issuer_key_hash, _der_encode(0x02, serial)))] = status
+    return 0, statuses
+
+
+def _verify_ocsp_response(response:ocsp.OCSPResponse, issuer:x509.Certificate):
+    """Raises a ValueError unless a successful OCSPResponse is signed by issuer, or by a responder cert (in the response) that issuer signed for OCSP signing"""
+    signer = None
+    for candidate in [issuer, *response.certificates]:
+        if response.responder_name is not None and response.responder_name == candidate.subject:
+            signer = candidate
+        elif response.responder_key_hash is not None and response.responder_key_hash == x509.SubjectKeyIdentifier.from_public_key(candidate.public_key()).digest:
+            signer = candidate
+        if signer is not None:
+            break
+    if signer is None:
+        raise ValueError("The OCSP response isn't signed by the cert's issuer, or a responder it authorised")
+    if signer is not issuer: # A delegated responder, the issuer has to have signed it's cert for OCSP signing
+        try:
+            signer.verify_directly_issued_by(issuer)
+            usages = signer.extensions.get_extension_for_class(x509.ExtendedKeyUsage).value
+        except (InvalidSignature, ValueError, TypeError, x509.ExtensionNotFound):
+            raise ValueError("The OCSP response isn't signed by the cert's issuer, or a responder it authorised")
+        if x509.oid.ExtendedKeyUsageOID.OCSP_SIGNING not in usages:
+            raise ValueError("The OCSP response isn't signed by the cert's issuer, or a responder it authorised")
+    key = signer.public_key()
+    try:
+        if isinstance(key, rsa.RSAPublicKey):
+            key.verify(response.signature, response.tbs_response_bytes, padding.PKCS1v15(), response.signature_hash_algorithm)
+        elif isinstance(key, ec.EllipticCurvePublicKey):
+            key.verify(response.signature, response.tbs_response_bytes, ec.ECDSA(response.signature_hash_algorithm))
+        elif isinstance(key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)):
+            key.verify(response.signature, response.tbs_response_bytes)
+        else:
+            raise ValueError(f"OCSP responses signed with {type(key).__name__} keys aren't supported")
+    except InvalidSignature:
+        raise ValueError("The OCSP response's signature is invalid")
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Regenerates the test CA and leaf certificates used by the stand-in TLS servers in tests/conftest.py
+set -e
+cd "$(dirname "$0")"
+
+openssl req -x509 -newkey rsa:2048 -nodes -keyout ca.key -out ca.pem -days 36500 -subj "/C=CA/O=sws/CN=sws Test CA" \
+    -addext "basicConstraints=critical,CA:TRUE" -addext "keyUsage=critical,keyCertSign,cRLSign"
+
+openssl req -newkey rsa:2048 -nodes -keyout localhost.key -out localhost.csr -subj "/C=CA/O=sws/CN=localhost"
+openssl x509 -req -in localhost.csr -CA ca.pem -CAkey ca.key -set_serial 0x1001 -days 36500 -sha256 -extfile leaf.ext -out localhost.pem
+
+openssl req -newkey rsa:2048 -nodes -keyout other.key -out other.csr -subj "/C=CA/O=sws/CN=other.test"
+openssl x509 -req -in other.csr -CA ca.pem -CAkey ca.key -set_serial 0x1002 -days 3650 -sha256 -extfile other.ext -out other.pem
+
+rm -f localhost.csr other.csr
+
+# A signed OCSP response from the test CA for both leaves (localhost.pem is good, other.pem is revoked), and the request for it
+printf 'V\t21260923061711Z\t\t1001\tunknown\t/C=CA/O=sws/CN=localhost\nR\t20361014061712Z\t260101000000Z,keyCompromise\t1002\tunknown\t/C=CA/O=sws/CN=other.test\n' > index.txt
+openssl ocsp -issuer ca.pem -cert localhost.pem -cert other.pem -no_nonce -reqout ocsp_request.der
+openssl ocsp -index index.txt -rsigner ca.pem -rkey ca.key -CA ca.pem -reqin ocsp_request.der -respout ocsp_response.der -ndays 36500
+rm -f index.txt
@@ -0,0 +1,37 @@
+"""Testing the functionality of sws.concurrency"""
+
+import time
+import threading
+
+import pytest
+from sws.concurrency import *
+
+
+def test_imap_unordered():
+    started = []
+    results = dict((item, future.result()) for item, future in imap_unordered(lambda item: started.append(item) or item * 2, range(20), max_workers=4))
+    assert results == {item: item * 2 for item in range(20)}
+
+    # Exceptions stay in their future
+    futures = dict(imap_unordered(lambda item: 1 / item, [0, 1], max_workers=2))
+    assert isinstance(futures[0].exception(), ZeroDivisionError) and futures[1].result() == 1
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=20, burst=5)
+
+    # Bursts are let straight through, then calls are spaced out to the rate (from any number of threads)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(15)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 0.45 <= time.monotonic() - start < 1 # 10 calls past the burst at 20 a second
+
+    # Pausing empties the bucket and holds every caller back
+    bucket.pause(0.3)
+    assert bucket.acquire() >= 0.3
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
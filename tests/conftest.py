@@ -0,0 +1,644 @@
+"""Local stand-in servers used to test sws without relying on the public internet"""
+
+# Standard lib dependencies
+import os
+import json
+import ssl
+import time
+import socket
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Third party dependencies
+import pytest
+import dns.flags
+import dns.rcode
+import dns.rrset
+import dns.message
+import dns.resolver
+import dns.rdatatype
+
+# The test CA and the certs it signed, see certs/generate.sh
+CERTS_DIR = os.path.join(os.path.dirname(__file__), "certs")
+CA_CERT = os.path.join(CERTS_DIR, "ca.pem")
+LOCALHOST_CERT = (os.path.join(CERTS_DIR, "localhost.pem"), os.path.join(CERTS_DIR, "localhost.key"))
+OTHER_CERT = (os.path.join(CERTS_DIR, "other.pem"), os.path.join(CERTS_DIR, "other.key"))
+OCSP_REQUEST = os.path.join(CERTS_DIR, "ocsp_request.der") # Asks about both leaves
+OCSP_RESPONSE = os.path.join(CERTS_DIR, "ocsp_response.der") # localhost.pem is good, other.pem was revoked for keyCompromise
+
+# The zone served by the stand-in DNS server, records are name->record_type->values
+DNS_ZONE = {
+    "example.test.": {
+        "A": ["127.0.0.1", "127.0.0.2"],
+        "AAAA": ["::1"],
+        "NS": ["ns1.example.test.", "ns2.example.test."],
+        "SOA": ["ns1.example.test. admin.example.test. 1 7200 3600 1209600 300"],
+        "MX": ["10 mail.example.test."],
+        "TXT": ['"v=spf1 -all"'],
+    },
+    "mail.example.test.": {
+        "A": ["127.0.0.3"],
+    },
+    "www.example.test.": {
+        "A": ["127.0.0.1"],
+    },
+    "api.example.test.": {
+        "A": ["127.0.0.1"],
+    },
+    "deep.api.example.test.": {
+        "A": ["127.0.0.1"],
+    },
+    "0.0.127.in-addr.arpa.": {
+        "SOA": ["ns1.example.test. admin.example.test. 1 7200 3600 1209600 300"],
+    },
+    "1.0.0.127.in-addr.arpa.": {
+        "PTR": ["example.test."],
+    },
+    "3.0.0.127.in-addr.arpa.": {
+        "PTR": ["mail.example.test.", "smtp.example.test."],
+    },
+}
+
+
+class StandInDNSServer:
+    """A tiny authoritative DNS server (UDP and TCP) that answers from a dict of records
+
+    Parameters
+    ----------
+    records : dict
+        A name->record_type->list of values mapping of the records to serve
+
+    delay : float, optional
+        How long (in seconds) to wait before answering each query, by default 0.0
+
+    ttl : int, optional
+        The TTL to serve on every record, by default 300
+
+    Attributes
+    ----------
+    port : int
+        The port the server is listening on (both UDP and TCP)
+
+    queries : list[tuple[str, str]]
+        Every (name, record_type) the server has been asked for
+
+    connections : int
+        How many TCP connections the server has accepted
+    """
+    def __init__(self, records: dict = DNS_ZONE, delay: float = 0.0, ttl: int = 300):
+        self.records = records
+        self.delay = delay
+        self.ttl = ttl
+        self.queries = []
+        self.connections = 0
+        self._running = False
+
+    def start(self):
+        """Binds the UDP and TCP sockets and starts serving on background threads"""
+        while True: # The TCP port has to match the ephemeral UDP port, so retry if it's taken
+            self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp.bind(("127.0.0.1", 0))
+            self.port = self._udp.getsockname()[1]
+            self._tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                self._tcp.bind(("127.0.0.1", self.port))
+                break
+            except OSError:
+                self._udp.close()
+                self._tcp.close()
+        self._tcp.listen(64)
+        self._running = True
+        threading.Thread(target=self._serve_udp, daemon=True).start()
+        threading.Thread(target=self._serve_tcp, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening sockets"""
+        self._running = False
+        self._udp.close()
+        self._tcp.close()
+
+    def answer(self, wire: bytes) -> bytes:
+        """Builds the wire-format response to a wire-format query"""
+        query = dns.message.from_wire(wire)
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA
+        question = query.question[0]
+        name = question.name.to_text().lower()
+        record_type = dns.rdatatype.to_text(question.rdtype)
+        self.queries.append((name, record_type))
+        if self.delay:
+            time.sleep(self.delay)
+
+        zone = self.records.get(name)
+        if zone is None:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif record_type in zone:
+            response.answer.append(dns.rrset.from_text(name, self.ttl, "IN", record_type, *zone[record_type]))
+            return response.to_wire()
+        apex = name
+        while apex and "SOA" not in self.records.get(apex, {}): # Walk up to the closest zone apex
+            apex = apex.split(".", 1)[-1]
+        if apex:
+            response.authority.append(dns.rrset.from_text(apex, self.ttl, "IN", "SOA", *self.records[apex]["SOA"]))
+        return response.to_wire()
+
+    def _serve_udp(self):
+        while self._running:
+            try:
+                wire, address = self._udp.recvfrom(65535)
+            except OSError:
+                return
+            threading.Thread(target=self._reply_udp, args=(wire, address), daemon=True).start()
+
+    def _reply_udp(self, wire: bytes, address: tuple):
+        try:
+            self._udp.sendto(self.answer(wire), address)
+        except OSError:
+            ...  # Server was stopped mid-reply
+
+    def _serve_tcp(self):
+        while self._running:
+            try:
+                connection, _ = self._tcp.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._reply_tcp, args=(connection,), daemon=True).start()
+
+    def _reply_tcp(self, connection: socket.socket):
+        with connection:
+            while self._running:
+                header = _receive_exactly(connection, 2)
+                if not header:
+                    return
+                wire = _receive_exactly(connection, struct.unpack("!H", header)[0])
+                response = self.answer(wire)
+                connection.sendall(struct.pack("!H", len(response)) + response)
+
+
+class StandInTLSServer:
+    """A TLS server that completes handshakes with a test cert and then waits for the client to hang up
+
+    Parameters
+    ----------
+    cert : tuple[str, str]
+        The paths to the PEM cert and key to serve, by default LOCALHOST_CERT
+
+    host : str, optional
+        The address to listen on, by default "127.0.0.1"
+
+    handshake : bool, optional
+        Whether to handshake at all, when False connections are accepted and then ignored (a blackholed host), by default True
+
+    port : int, optional
+        The port to listen on, by default 0 which picks a free port (pass another server's port to serve two addresses on one port)
+
+    starttls : str, optional
+        The plaintext protocol ('smtp', 'imap' or 'pop3') clients have to ask to start TLS over, by default None which handshakes straight away
+
+    offer_starttls : bool, optional
+        Whether an SMTP server advertises STARTTLS in it's EHLO reply (and accepts it), by default True
+
+    Attributes
+    ----------
+    port : int
+        The port the server is listening on
+
+    connections : int
+        How many TCP connections the server has accepted
+
+    handshakes : int
+        How many handshakes the server has completed
+
+    resumptions : int
+        How many of the handshakes resumed an earlier TLS session
+    """
+    def __init__(self, cert: tuple = LOCALHOST_CERT, host: str = "127.0.0.1", handshake: bool = True, port: int = 0, starttls: str = None, offer_starttls: bool = True):
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(*cert)
+        self.host = host
+        self.handshake = handshake
+        self.port = port
+        self.starttls = starttls
+        self.offer_starttls = offer_starttls
+        self.connections = 0
+        self.handshakes = 0
+        self.resumptions = 0
+        self._open = []
+        self._running = False
+
+    def start(self):
+        """Binds the listening socket and starts serving on a background thread"""
+        self._listener = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # So a stopped server's port can be reused straight away
+        self._listener.bind((self.host, self.port))
+        self._listener.listen(128)
+        self.port = self._listener.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening socket and any open connections"""
+        self._running = False
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR) # Wakes the accept() so the port is released when it's closed
+        except OSError:
+            ...  # Not supported on every platform
+        self._listener.close()
+        for connection in self._open:
+            connection.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._open.append(connection)
+            if self.handshake:
+                threading.Thread(target=self._reply, args=(connection,), daemon=True).start()
+
+    def _reply(self, connection: socket.socket):
+        try:
+            if self.starttls and not self._negotiate_starttls(connection):
+                return
+            with self.context.wrap_socket(connection, server_side=True) as tls_connection:
+                self.handshakes += 1
+                self.resumptions += tls_connection.session_reused
+                while tls_connection.recv(1024):
+                    ...
+        except (OSError, ssl.SSLError):
+            ...  # Client hung up or failed verification
+
+    def _negotiate_starttls(self, connection: socket.socket) -> bool:
+        """Plays the server side of a STARTTLS conversation, returns whether the client asked to start TLS"""
+        greetings = {"smtp": b"220 localhost ESMTP stand-in\r\n", "imap": b"* OK [CAPABILITY IMAP4rev1 STARTTLS] stand-in ready\r\n", "pop3": b"+OK stand-in ready\r\n"}
+        connection.sendall(greetings[self.starttls])
+        while True:
+            words = _receive_line(connection).decode("latin-1").split()
+            if not words:  # Client hung up
+                return False
+            tag, command = (words[0], words[-1].upper()) if self.starttls == "imap" else ("", words[0].upper())  # IMAP commands are tagged
+            if self.starttls == "smtp" and command in ("EHLO", "HELO"):
+                connection.sendall(b"250-localhost\r\n250-PIPELINING\r\n" + (b"250 STARTTLS\r\n" if self.offer_starttls else b"250 8BITMIME\r\n"))
+            elif self.starttls == "smtp" and command == "STARTTLS" and self.offer_starttls:
+                connection.sendall(b"220 Ready to start TLS\r\n")
+                return True
+            elif self.starttls == "imap" and command == "STARTTLS":
+                connection.sendall(b"* OK untagged noise\r\n" + tag.encode() + b" OK Begin TLS negotiation now\r\n")
+                return True
+            elif self.starttls == "pop3" and command == "STLS":
+                connection.sendall(b"+OK Begin TLS negotiation\r\n")
+                return True
+            elif self.starttls == "imap":
+                connection.sendall(tag.encode() + b" BAD unknown command\r\n")
+            else:
+                connection.sendall(b"502 unknown command\r\n" if self.starttls == "smtp" else b"-ERR unknown command\r\n")
+
+
+class StandInOCSPResponder:
+    """An HTTP OCSP responder that answers every request with the same response
+
+    Parameters
+    ----------
+    response : bytes
+        The DER OCSPResponse to answer with, by default the contents of OCSP_RESPONSE
+
+    single_only : bool, optional
+        Whether to refuse requests that ask about more than one cert (with an unauthorized response) like some responders do, by default False
+
+    Attributes
+    ----------
+    url : str
+        The URL to send requests to
+
+    requests : list[bytes]
+        The body of every request the responder has received
+
+    cert_ids : list[int]
+        How many certs each request asked about
+    """
+    def __init__(self, response: bytes = None, single_only: bool = False):
+        if response is None:
+            with open(OCSP_RESPONSE, "rb") as response_file:
+                response = response_file.read()
+        self.response = response
+        self.single_only = single_only
+        self.requests = []
+        self.cert_ids = []
+
+    def start(self):
+        """Binds the listening socket and starts serving on a background thread"""
+        responder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                responder.requests.append(body)
+                cert_ids = body.count(bytes.fromhex("300906052b0e03021a0500")) # The SHA-1 AlgorithmIdentifier starts each cert ID
+                responder.cert_ids.append(cert_ids)
+                response = bytes.fromhex("30030a0106") if responder.single_only and cert_ids > 1 else responder.response
+                self.send_response(200)
+                self.send_header("Content-Type", "application/ocsp-response")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                ...  # Keep test output quiet
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening socket"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# The responses served by the stand-in WHOIS server, keyed by query; 'test' is what IANA is asked about the .test TLD
+WHOIS_RESPONSES = {
+    "test": "% IANA WHOIS server\n\ndomain:       TEST\n\nrefer:        127.0.0.1\n\nwhois:        127.0.0.1\nstatus:       ACTIVE\n",
+    "example.test": (
+        "Domain Name: EXAMPLE.TEST\n"
+        "Registry Domain ID: 1234_DOMAIN_TEST\n"
+        "Registrar WHOIS Server: 127.0.0.2\n"
+        "Updated Date: 2021-01-08T08:09:44Z\n"
+        "Creation Date: 2018-11-06T05:09:47Z\n"
+        "Registrar Registration Expiration Date: 2121-11-06T05:09:47Z\n"
+        "Registrar: Stand-in Registrar, Inc.\n"
+        "Name Server: NS1.EXAMPLE.TEST\n"
+        "Name Server: NS2.EXAMPLE.TEST\n"
+        "DNSSEC: unsigned\n"
+    ),
+    "available.test": "No match for \"AVAILABLE.TEST\".\n",
+    "error.test": "Invalid query syntax\n",
+}
+
+
+class StandInWHOISServer:
+    """A WHOIS (port 43 protocol) server that answers from a dict of responses, and hangs up after each one
+
+    Parameters
+    ----------
+    responses : dict
+        A query->response mapping, queries that aren't in it get a one line 'not found' response, by default WHOIS_RESPONSES
+
+    host : str, optional
+        The address to listen on, by default "127.0.0.1"
+
+    port : int, optional
+        The port to listen on, by default 0 which picks a free port (pass another server's port to serve two addresses on one port)
+
+    delay : float, optional
+        How long (in seconds) to wait before answering each query, by default 0.0
+
+    throttled : int, optional
+        How many queries to answer with a rate limit message before answering normally, by default 0
+
+    Attributes
+    ----------
+    port : int
+        The port the server is listening on
+
+    queries : list[str]
+        Every query the server has received
+
+    times : list[float]
+        When (from time.monotonic()) each query was received
+    """
+    def __init__(self, responses: dict = WHOIS_RESPONSES, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0, throttled: int = 0):
+        self.responses = responses
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.throttled = throttled
+        self.queries = []
+        self.times = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """Binds the listening socket and starts serving on a background thread"""
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.host, self.port))
+        self._listener.listen(128)
+        self.port = self._listener.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening socket"""
+        self._running = False
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            ...  # Not supported on every platform
+        self._listener.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._reply, args=(connection,), daemon=True).start()
+
+    def _reply(self, connection: socket.socket):
+        with connection:
+            query = _receive_line(connection).decode("latin-1").strip()
+            with self._lock:
+                self.queries.append(query)
+                self.times.append(time.monotonic())
+                throttled = len(self.queries) <= self.throttled
+            if self.delay:
+                time.sleep(self.delay)
+            response = "Query rate limit exceeded, try again later\n" if throttled else self.responses.get(query.lower(), "not found\n")
+            try:
+                connection.sendall(response.encode())
+            except OSError:
+                ...  # Client hung up
+
+
+# The domains served by the stand-in RDAP server, keyed by domain
+RDAP_RESPONSES = {
+    "example.test": {
+        "objectClassName": "domain",
+        "ldhName": "EXAMPLE.TEST",
+        "status": ["active"],
+        "events": [
+            {"eventAction": "registration", "eventDate": "2018-11-06T05:09:47Z"},
+            {"eventAction": "expiration", "eventDate": "2121-11-06T05:09:47.000Z"},
+            {"eventAction": "last changed", "eventDate": "2021-01-08T03:09:44-05:00"},
+        ],
+        "nameservers": [
+            {"objectClassName": "nameserver", "ldhName": "NS1.EXAMPLE.TEST"},
+            {"objectClassName": "nameserver", "ldhName": "ns2.example.test."},
+        ],
+        "entities": [
+            {
+                "objectClassName": "entity",
+                "roles": ["registrar"],
+                "vcardArray": ["vcard", [["version", {}, "text", "4.0"], ["fn", {}, "text", "Stand-in Registrar, Inc."]]],
+                "entities": [{"objectClassName": "entity", "roles": ["abuse"], "vcardArray": ["vcard", [["fn", {}, "text", "Abuse Desk"]]]}],
+            },
+            {
+                "objectClassName": "entity",
+                "roles": ["registrant"],
+                "vcardArray": ["vcard", [["fn", {}, "text", "REDACTED FOR PRIVACY"], ["adr", {"cc": "CA"}, "text", ["", "", "", "", "ON", "", ""]]]],
+            },
+        ],
+    },
+}
+
+
+class StandInRDAPServer:
+    """An HTTP server that serves an RDAP bootstrap registry (at /dns.json) pointing .test at itself, and RDAP domain queries (at /rdap/domain/<domain>)
+
+    Parameters
+    ----------
+    responses : dict
+        A domain->JSON response mapping, domains that aren't in it get a 404, by default RDAP_RESPONSES
+
+    Attributes
+    ----------
+    url : str
+        The server's base URL
+
+    bootstrap_url : str
+        The URL of the bootstrap registry
+
+    paths : list[str]
+        The path of every request the server has received
+
+    connections : int
+        How many connections clients have opened
+    """
+    def __init__(self, responses: dict = RDAP_RESPONSES):
+        self.responses = responses
+        self.paths = []
+        self.connections = 0
+
+    def start(self):
+        """Binds the listening socket and starts serving on a background thread"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # So clients can keep connections alive
+
+            def setup(self):
+                server.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                server.paths.append(self.path)
+                if self.path == "/dns.json":
+                    status, body = 200, {"version": "1.0", "services": [[["test"], [f"{server.url}rdap/"]]]}
+                elif self.path.startswith("/rdap/domain/") and self.path[len("/rdap/domain/"):] in server.responses:
+                    status, body = 200, server.responses[self.path[len("/rdap/domain/"):]]
+                else:
+                    status, body = 404, {"errorCode": 404, "title": "Not Found"}
+                body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/rdap+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                ...  # Keep test output quiet
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+        self.bootstrap_url = f"{self.url}dns.json"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the listening socket"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _receive_line(connection: socket.socket) -> bytes:
+    """Reads one line a byte at a time, so nothing after it (i.e. a TLS handshake) is consumed, or b'' if the peer closed it"""
+    line = b""
+    while not line.endswith(b"\n"):
+        try:
+            byte = connection.recv(1)
+        except OSError:
+            return b""
+        if not byte:
+            return b""
+        line += byte
+    return line
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes:
+    """Reads exactly size bytes from a stream socket, or returns b'' if the peer closed it"""
+    data = b""
+    while len(data) < size:
+        try:
+            chunk = connection.recv(size - len(data))
+        except OSError:
+            return b""
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+@pytest.fixture
+def dns_server():
+    """Starts a StandInDNSServer and points dnspython's default resolver at it"""
+    server = StandInDNSServer().start()
+    resolver = dns.resolver.Resolver(configure=False)
+    resolver.nameservers = ["127.0.0.1"]
+    resolver.port = server.port
+    previous_resolver = dns.resolver.default_resolver
+    dns.resolver.default_resolver = resolver
+    yield server
+    dns.resolver.default_resolver = previous_resolver
+    server.stop()
+
+
+@pytest.fixture
+def tls_server():
+    """Starts a StandInTLSServer with the localhost cert, use the test CA (CA_CERT) to verify it"""
+    server = StandInTLSServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def ocsp_responder():
+    """Starts a StandInOCSPResponder with the test CA's response, pass it's url as an OCSPChecker's responder"""
+    responder = StandInOCSPResponder().start()
+    yield responder
+    responder.stop()
+
+
+@pytest.fixture
+def whois_server():
+    """Starts a StandInWHOISServer that acts as IANA and the .test registry, use it's port for a WHOISClient with iana_server='127.0.0.1'"""
+    server = StandInWHOISServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def rdap_server():
+    """Starts a StandInRDAPServer, pass it's bootstrap_url to an RDAPClient"""
+    server = StandInRDAPServer().start()
+    yield server
+    server.stop()
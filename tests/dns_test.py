@@ -1,8 +1,18 @@
 """Testing the functionality of sws.dns_utilities"""
 
+import io
+import copy
+import time
+import threading
+import itertools
+
 import pytest
+import dns.resolver
+import dns.exception
 from sws.dns_utilities import *
 
+from conftest import DNS_ZONE, StandInDNSServer
+
 # NOTE: Due to the dynamic nature of domains I have chosen to test wih kieranwood.ca (my site) because I can be relatively sure it will be stable,
 # if this test file fails check the domain DNS is still valid
 
@@ -103,3 +113,317 @@ def test_invalid_domain_dict():
     # Nonexistent subdomain
     with pytest.raises(ValueError):
         get_dns_records("https://yeet.kieranwood.ca", as_dict=True)
+
+
+def test_concurrent_sweep(dns_server):
+    dns_server.delay = 0.05 # A serial sweep of every record type would take several seconds
+
+    start = time.monotonic()
+    records = get_dns_records("example.test", as_dict=True)
+    assert time.monotonic() - start < 2
+
+    assert sorted(records["A"]) == ["127.0.0.1", "127.0.0.2"]
+    assert records["SOA"] == "ns1.example.test. admin.example.test. 1 7200 3600 1209600 300"
+    assert records["MX"] == "10 mail.example.test."
+    assert list(records)[:3] == ["A", "NS", "SOA"] # Ordered by RECORD_TYPES
+
+    records = get_dns_records("https://example.test")
+    assert sorted(records[:2]) == ["A: 127.0.0.1", "A: 127.0.0.2"]
+    assert records[2].startswith("NS: ")
+
+
+def test_sweep_deadline(dns_server):
+    dns_server.delay = 2 # Every query is slower than the deadline
+
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        get_dns_records("example.test", max_workers=4, timeout=0.5)
+    assert time.monotonic() - start < 1.5
+
+
+def test_bulk_dns_records(dns_server):
+    results = {result["domain"]: result for result in bulk_dns_records(["example.test", "http://mail.example.test", "missing.test"])}
+
+    assert sorted(results["example.test"]["records"]["A"]) == ["127.0.0.1", "127.0.0.2"]
+    assert results["example.test"]["error"] is None
+    assert results["mail.example.test"]["records"] == {"A": "127.0.0.3"}
+    assert results["missing.test"]["records"] is None
+    assert results["missing.test"]["error"]
+
+    # Domains are pulled lazily, so an endless input still streams results
+    endless_domains = itertools.cycle(["example.test", "mail.example.test"])
+    assert len(list(itertools.islice(bulk_dns_records(endless_domains, as_dict=False, max_domains=2), 5))) == 5
+
+
+def test_dns_cache(dns_server, tmp_path):
+    cache = DNSCache()
+    first = get_dns_records("example.test", as_dict=True, cache=cache)
+    queries = len(dns_server.queries)
+    assert cache.misses and not cache.hits
+
+    assert get_dns_records("example.test", as_dict=True, cache=cache) == first
+    assert len(dns_server.queries) == queries # Everything was answered from the cache
+    assert cache.hits == len(cache)
+
+    # Negative answers are cached with the SOA minimum
+    with pytest.raises(ValueError):
+        get_dns_records("nope.example.test", cache=cache)
+    assert cache.get("nope.example.test", "A") == ((), True)
+    assert cache.get("example.test", "CAA") == ((), False)
+
+    # Expired answers are misses
+    cache.put("short.example.test", "A", ["127.0.0.9"], ttl=0.1)
+    assert cache.get("short.example.test", "A") == (("127.0.0.9",), False)
+    time.sleep(0.2)
+    assert cache.get("short.example.test", "A") is None
+
+    # Least recently used answers are evicted past max_size
+    small_cache = DNSCache(max_size=2)
+    small_cache.put("one.test", "A", ["127.0.0.1"], ttl=300)
+    small_cache.put("two.test", "A", ["127.0.0.2"], ttl=300)
+    small_cache.get("one.test", "A")
+    small_cache.put("three.test", "A", ["127.0.0.3"], ttl=300)
+    assert len(small_cache) == 2
+    assert small_cache.get("two.test", "A") is None
+    assert small_cache.get("one.test", "A") == (("127.0.0.1",), False)
+
+    # Answers persist between processes when a path is given
+    path = str(tmp_path / "dns_cache.sqlite")
+    with DNSCache(path=path) as persistent_cache:
+        get_dns_records("example.test", cache=persistent_cache)
+    queries = len(dns_server.queries)
+    with DNSCache(path=path) as persistent_cache:
+        get_dns_records("example.test", cache=persistent_cache)
+        assert persistent_cache.hits == len(persistent_cache)
+    assert len(dns_server.queries) == queries
+
+
+def test_nxdomain_short_circuit(dns_server):
+    dns_server.delay = 0.05
+    with pytest.raises(ValueError):
+        get_dns_records("nope.example.test", max_workers=4)
+
+    # Only the first batch of in-flight queries went out before the sweep stopped
+    assert len(dns_server.queries) <= 8
+
+
+def test_record_profiles(dns_server):
+    assert get_dns_records("example.test", as_dict=True, profile="mail") == {"MX": "10 mail.example.test.", "TXT": '"v=spf1 -all"'}
+    assert {record_type for _, record_type in dns_server.queries} <= set(RECORD_PROFILES["mail"])
+
+    assert list(get_dns_records("example.test", as_dict=True, profile=["mx", "A"])) == ["A", "MX"]
+    assert list(get_dns_records("example.test", as_dict=True, profile="NS,SOA")) == ["NS", "SOA"]
+
+    for unqueryable_type in ("AXFR", "IXFR", "MD", "MF", "MAILA", "OPT"):
+        assert unqueryable_type not in RECORD_PROFILES["all"]
+
+    with pytest.raises(ValueError):
+        get_dns_records("example.test", profile="not-a-profile")
+
+
+def test_dns_resolver(dns_server):
+    # Unreachable nameservers are skipped, and the answering nameserver is reported
+    resolver = DNSResolver(nameservers=["127.0.0.9", "127.0.0.1"], port=dns_server.port, timeout=0.5)
+    answer = resolver.resolve("mail.example.test", "A")
+    assert [record.to_text() for record in answer] == ["127.0.0.3"]
+    assert answer.nameserver == "127.0.0.1"
+    with pytest.raises(dns.resolver.NXDOMAIN):
+        resolver.resolve("nope.example.test", "A")
+    with pytest.raises(dns.resolver.NoAnswer):
+        resolver.resolve("mail.example.test", "MX")
+
+    # Persistent TCP connections are reused across sweeps
+    with DNSResolver(nameservers=["127.0.0.1"], port=dns_server.port, tcp=True) as resolver:
+        for _ in range(3):
+            assert get_dns_records("example.test", as_dict=True, profile="web", max_workers=4, resolver=resolver)["NS"]
+        assert 0 < dns_server.connections <= 4 # 30 queries over at most one connection per worker
+
+    # Without persistence every query opens a new connection
+    dns_server.connections = 0
+    with DNSResolver(nameservers=["127.0.0.1"], port=dns_server.port, tcp=True, persistent=False) as resolver:
+        get_dns_records("example.test", profile="web", max_workers=4, resolver=resolver)
+    assert dns_server.connections == len(RECORD_PROFILES["web"])
+
+    # A slow nameserver times out on a reused connection, instead of reconnecting and waiting again
+    dns_server.connections = 0
+    with DNSResolver(nameservers=["127.0.0.1"], port=dns_server.port, tcp=True) as resolver:
+        resolver.resolve("example.test", "A")
+        dns_server.delay = 0.5
+        start = time.monotonic()
+        with pytest.raises(dns.exception.Timeout):
+            resolver.resolve("example.test", "A", lifetime=0.3)
+        assert time.monotonic() - start < 0.45 and dns_server.connections == 1
+    dns_server.delay = 0.0
+
+
+def test_dns_result_table():
+    table = dns_result_table("https://example.test", {"A": ["127.0.0.1", "127.0.0.2"], "NS": "ns1.example.test."})
+
+    assert "DNS records for example.test" in table
+    assert "| A           | 127.0.0.1         |\n|             | 127.0.0.2         |\n| NS          | ns1.example.test. |" in table
+
+    # Long values are truncated and pipes escaped so they can't break the layout
+    table = dns_result_table("example.test", {"TXT": "a|b" + "c" * 200}, max_width=20)
+    assert "| TXT         | a\\|bccccccccccccc... |" in table
+
+    assert "A            127.0.0.1" in dns_result_table("example.test", {"A": "127.0.0.1"}, style="plain")
+    with pytest.raises(ValueError):
+        dns_result_table("example.test", {"A": "127.0.0.1"}, style="html")
+
+
+def test_streaming_dns_table():
+    consumed = []
+    def results():
+        for index in range(1000):
+            consumed.append(index)
+            yield f"domain{index}.test", [RecordSet("A", 300, ["127.0.0.1", "127.0.0.2"])]
+
+    # With fixed widths rows are rendered as results arrive
+    lines = iter_dns_table(results(), widths=(16, 11, 12))
+    assert next(lines) == "| Domain           | Record Type | Record Value |"
+    next(lines)
+    assert next(lines) == "| domain0.test     | A           | 127.0.0.1    |"
+    assert next(lines) == "|                  |             | 127.0.0.2    |"
+    assert len(consumed) == 1
+
+    output = io.StringIO()
+    write_dns_table(results(), output, style="plain")
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 2002
+    assert lines[0] == "Domain          Record Type  Record Value"
+    assert lines[-2] == "domain999.test  A            127.0.0.1"
+
+
+def test_record_sets(dns_server):
+    cache = DNSCache() # Keeps RRset ordering stable between the calls being compared
+    record_sets = get_record_sets("example.test", profile="A,NS,MX", cache=cache)
+
+    assert [record_set.rdtype for record_set in record_sets] == ["A", "NS", "MX"]
+    assert record_sets[2] == RecordSet("MX", 300, ["10 mail.example.test."])
+    assert not hasattr(record_sets[0], "__dict__") # Stays compact
+
+    # Compatibility views match get_dns_records()
+    assert {record_set.rdtype: record_set.value for record_set in record_sets} == get_dns_records("example.test", as_dict=True, profile="A,NS,MX", cache=cache)
+    assert record_sets[2].as_lines() == ["MX: 10 mail.example.test."]
+    assert RecordSet.from_value("A", ["127.0.0.1", "127.0.0.2"]).value == ["127.0.0.1", "127.0.0.2"]
+
+    # Tables render the same from either shape
+    assert dns_result_table("example.test", record_sets[2:]) == dns_result_table("example.test", {"MX": "10 mail.example.test."})
+
+    # Cached record sets count down their TTL
+    get_record_sets("example.test", profile="MX", cache=cache)
+    assert 0 < get_record_sets("example.test", profile="MX", cache=cache)[0].ttl <= 300
+
+    result = next(bulk_dns_records(["mail.example.test"], as_record_sets=True))
+    assert result["records"] == [RecordSet("A", 300, ["127.0.0.3"])]
+
+
+def test_dns_watcher():
+    zone = copy.deepcopy(DNS_ZONE)
+    server = StandInDNSServer(zone, ttl=1).start()
+    resolver = DNSResolver(nameservers=["127.0.0.1"], port=server.port, timeout=0.2)
+    try:
+        watcher = DNSWatcher(["example.test", "missing.example.test"], profile="A,MX", resolver=resolver, min_interval=0.5)
+        assert watcher.poll() == [] # The first answers are only the baseline
+        assert watcher.records[("example.test", "A")] == {"127.0.0.1", "127.0.0.2"}
+        assert watcher.records[("missing.example.test", "A")] == frozenset()
+
+        # Nothing is re-queried until it's TTL runs out
+        queries = len(server.queries)
+        assert watcher.poll() == []
+        assert len(server.queries) == queries
+        assert 0 < watcher.seconds_until_due() <= 1
+
+        zone["example.test."]["A"] = ["127.0.0.1", "127.0.0.9"]
+        del zone["example.test."]["MX"]
+        time.sleep(1.05) # Let every TTL run out
+        changes = sorted(watcher.poll(), key=lambda change: change.rdtype)
+        assert changes == [
+            RecordChange("example.test", "A", ["127.0.0.9"], ["127.0.0.2"]),
+            RecordChange("example.test", "MX", [], ["10 mail.example.test."]),
+        ]
+        assert changes[0].as_dict() == {"domain": "example.test", "rdtype": "A", "added": ["127.0.0.9"], "removed": ["127.0.0.2"]}
+
+        # The initial records can be emitted as additions
+        stop = threading.Event()
+        with DNSWatcher(["mail.example.test"], profile="A", resolver=resolver, emit_initial=True) as initial_watcher:
+            for change in initial_watcher.watch(stop):
+                assert change == RecordChange("mail.example.test", "A", ["127.0.0.3"], [])
+                stop.set()
+
+        # There has to be something to watch (i.e. not an empty --input file)
+        with pytest.raises(ValueError):
+            DNSWatcher([], resolver=resolver)
+
+        # A failing nameserver isn't reported as the records disappearing
+        server.stop()
+        time.sleep(1.05)
+        assert watcher.poll() == []
+        assert watcher.records[("example.test", "A")] == {"127.0.0.1", "127.0.0.9"}
+    finally:
+        resolver.close()
+        server.stop()
+
+
+def test_reverse_dns_sweep(dns_server):
+    results = list(reverse_dns_sweep("127.0.0.0/30"))
+    assert sorted((result["address"], sorted(result["names"])) for result in results) == [
+        ("127.0.0.1", ["example.test."]),
+        ("127.0.0.3", ["mail.example.test.", "smtp.example.test."]),
+    ]
+    assert all(result["error"] is None for result in results)
+    assert len(dns_server.queries) == 4 # Every address was queried once
+
+    missing = list(reverse_dns_sweep("127.0.0.2", include_missing=True))
+    assert missing == [{"address": "127.0.0.2", "names": [], "error": None}]
+
+    # Ranges are expanded lazily with bounded in-flight queries
+    sweep = reverse_dns_sweep("127.0.0.0/8", max_workers=4)
+    assert next(sweep)["address"] in ("127.0.0.1", "127.0.0.3")
+    sweep.close()
+    assert len(dns_server.queries) < 4 + 1 + 16
+
+    # Negative answers are cached
+    cache = DNSCache()
+    list(reverse_dns_sweep("127.0.0.0/30", cache=cache))
+    queries = len(dns_server.queries)
+    list(reverse_dns_sweep("127.0.0.0/30", cache=cache))
+    assert len(dns_server.queries) == queries
+
+    # IPv6 addresses are queried under ip6.arpa
+    assert list(reverse_dns_sweep("::1/128", include_missing=True)) == [{"address": "::1", "names": [], "error": None}]
+    assert dns_server.queries[-1] == ("1." + "0." * 31 + "ip6.arpa.", "PTR")
+
+    with pytest.raises(ValueError):
+        next(reverse_dns_sweep("127.0.0.0/33"))
+
+
+def test_query_stats(dns_server):
+    stats = DNSStats(buckets=(0.001, 1.0))
+    events = []
+    resolver = DNSResolver(hooks=[stats], timeout=0.3, retries=0)
+    resolver.add_hook(events.append)
+    resolver.add_hook(lambda event: 1 / 0) # A broken hook doesn't break queries
+    get_dns_records("example.test", profile="A,MX,SRV", resolver=resolver)
+    with pytest.raises(ValueError):
+        get_dns_records("missing.example.test", profile="A", resolver=resolver)
+
+    assert sorted((event.rdtype, event.outcome) for event in events) == [("A", "nxdomain"), ("A", "success"), ("MX", "success"), ("SRV", "noanswer")]
+    assert all(event.nameserver == "127.0.0.1" and event.latency > 0 for event in events)
+    assert stats.outcomes["A"] == {"success": 1, "nxdomain": 1}
+    assert sum(stats.latencies["A"]) == 2 and len(stats.latencies["A"]) == 3
+    assert stats.nameservers["127.0.0.1"] == {"success": 2, "nxdomain": 1, "noanswer": 1}
+    assert len(stats) == 4
+    assert 0 < stats.percentile("A", 50) <= 1.0
+
+    # Timeouts are counted against the nameserver that didn't answer
+    dns_server.delay = 0.5
+    with pytest.raises(dns.exception.Timeout):
+        resolver.resolve("example.test", "TXT")
+    assert events[-1].outcome == "timeout" and events[-1].nameserver == "127.0.0.1"
+    assert stats.as_dict()["record_types"]["TXT"]["outcomes"] == {"timeout": 1}
+    summary = stats.summary().splitlines()
+    assert summary[0].split() == ["Record", "Type", "Queries", "Mean", "ms", "p95", "ms", "Max", "ms", "success", "nxdomain", "noanswer", "timeout", "error"]
+    assert summary[1].split()[0] == "TXT" # Slowest first
+    assert summary[-1].split() == ["127.0.0.1", "2", "1", "1", "1", "0"]
+    resolver.close()
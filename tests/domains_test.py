@@ -1,9 +1,16 @@
 """Testing the functionality of sws.domains"""
 
+import time
+import socket
+from datetime import datetime, timedelta
+
 import pytest
 from sws.domains import *
 from sws.domains import _install_whois
 
+from sws.dns_utilities import DNSResolver
+from conftest import WHOIS_RESPONSES, StandInRDAPServer, StandInWHOISServer
+
 # NOTE: Due to the dynamic nature of domains I have chosen to test wih kieranwood.ca (my site) because I can be relatively sure it will be stable,
 # if this test file fails check the domain is still valid
 
@@ -78,3 +85,248 @@ def test_invalid_domains():
     # Subdomain
     with pytest.raises(ValueError):
         domain_details = get_domain_info('profile.kieranwood.ca')
+
+
+def test_whois_client(whois_server):
+    client = WHOISClient(iana_server="127.0.0.1", port=whois_server.port)
+
+    # Each TLD's server is found through IANA once, then queried directly
+    assert client.server_for("TEST") == "127.0.0.1"
+    assert "Registrar: Stand-in Registrar, Inc." in client.query("Example.Test.")
+    assert "No match" in client.query("available.test")
+    assert whois_server.queries == ["test", "example.test", "available.test"]
+    assert client.queries == 3
+
+    # Servers can be seeded to skip IANA, and unknown TLD's are a ValueError
+    assert WHOISClient(port=whois_server.port, servers={"test": "127.0.0.1"}).query("example.test").startswith("Domain Name: EXAMPLE.TEST")
+    with pytest.raises(ValueError):
+        client.server_for("yeet")
+    with pytest.raises(ValueError):
+        client.query("example.test/yeet")
+
+    # Registrar referrals are followed when asked to
+    registrar = StandInWHOISServer({"example.test": "Domain Name: EXAMPLE.TEST\nRegistrant Country: CA\n"}, host="127.0.0.2", port=whois_server.port).start()
+    try:
+        client.follow_referrals = True
+        response = client.query("example.test")
+        assert response.startswith("Domain Name: EXAMPLE.TEST") and response.endswith("Registrant Country: CA\n")
+        assert registrar.queries == ["example.test"]
+    finally:
+        registrar.stop()
+
+    # Unreachable and slow servers are an OSError
+    with pytest.raises(OSError):
+        WHOISClient(port=1, servers={"test": "127.0.0.1"}).query("example.test")
+    slow = StandInWHOISServer(delay=1).start()
+    try:
+        start = time.monotonic()
+        with pytest.raises(socket.timeout):
+            WHOISClient(port=slow.port, timeout=0.2, servers={"test": "127.0.0.1"}).query("example.test")
+        assert time.monotonic() - start < 1
+    finally:
+        slow.stop()
+
+
+def test_native_domain_info(whois_server):
+    client = WHOISClient(iana_server="127.0.0.1", port=whois_server.port)
+
+    domain_details = get_domain_info("https://example.test", client=client)
+    assert domain_details == {
+        "name": "example.test",
+        "registrar": "Stand-in Registrar, Inc.",
+        "registrant_cc": "",
+        "creation_date": datetime(2018, 11, 6, 5, 9, 47),
+        "expiration_date": datetime(2121, 11, 6, 5, 9, 47),
+        "last_updated": datetime(2021, 1, 8, 8, 9, 44),
+        "name_servers": {"ns1.example.test", "ns2.example.test"},
+    }
+    assert domain_availability(domain_details) == ("Domain example.test unavailable until 6/November/2121", False)
+
+    domain_details = get_domain_info("available.test", client=client)
+    assert domain_details["name"] == "available.test" and domain_details["registrar"] == False
+    assert domain_availability(domain_details)[1] == True
+    assert whois_server.queries.count("test") == 1 # IANA is only asked about .test once
+
+    # Responses that can't be parsed (and don't say the domain isn't registered) raise, instead of the domain being reported as available
+    with pytest.raises(WHOISParseError):
+        get_domain_info("error.test", client=client)
+
+    # Subdomains, URL's and unknown TLD's are still a ValueError
+    for domain in ("profile.example.test", "example.test/yeet", "example.yeet"):
+        with pytest.raises(ValueError):
+            get_domain_info(domain, client=client)
+
+    # Unreachable servers raise unless falling back to an installed whois binary
+    with pytest.raises(OSError):
+        get_domain_info("example.test", client=WHOISClient(port=1, servers={"test": "127.0.0.1"}))
+    with pytest.raises(OSError): # Including IANA, when asked for the TLD's server
+        get_domain_info("example.test", client=WHOISClient(iana_server="127.0.0.1", port=1), fallback=False)
+
+
+def test_whois_cache(whois_server, tmp_path):
+    client = WHOISClient(iana_server="127.0.0.1", port=whois_server.port)
+    path = str(tmp_path / "whois.sqlite")
+
+    with WHOISCache(path=path) as cache:
+        details = get_domain_info("example.test", client=client, cache=cache)
+        details["name_servers"].add("changed.example.test") # Callers can't change what's cached
+        assert get_domain_info("https://EXAMPLE.test", client=client, cache=cache)["name_servers"] == {"ns1.example.test", "ns2.example.test"}
+        assert get_domain_info("available.test", client=client, cache=cache)["registrar"] == False
+        assert get_domain_info("available.test", client=client, cache=cache)["registrar"] == False # Unregistered domains are cached too
+        assert whois_server.queries.count("example.test") == 1 and whois_server.queries.count("available.test") == 1
+        assert (cache.hits, cache.misses) == (2, 2) and cache.hit_rate == 0.5
+
+        # Responses that can't be parsed (and don't say the domain isn't registered) raise, and aren't cached
+        for _ in range(2):
+            with pytest.raises(WHOISParseError):
+                get_domain_info("error.test", client=client, cache=cache)
+        assert whois_server.queries.count("error.test") == 2 and cache.get("error.test") is None
+
+        # refresh bypasses the cache, but still updates it
+        get_domain_info("example.test", client=client, cache=cache, refresh=True)
+        assert whois_server.queries.count("example.test") == 2 and cache.age("example.test") < 1
+
+    # Results survive between processes, with their datetimes and name servers intact
+    with WHOISCache(path=path) as cache:
+        assert get_domain_info("example.test", client=WHOISClient(port=1, servers={"test": "127.0.0.1"}), cache=cache) == get_domain_info("example.test", client=client)
+
+    # Unregistered domains and domains close to expiring are only reused for a short time
+    cache = WHOISCache(max_age=60, negative_max_age=0.1, expiring_max_age=0.1, expiry_margin=30 * 24 * 60 * 60)
+    registered = get_domain_info("example.test", client=client)
+    expiring = dict(registered, name="expiring.test", expiration_date=datetime.now() + timedelta(days=5))
+    for domain, details in (("example.test", registered), ("expiring.test", expiring), ("available.test", get_domain_info("available.test", client=client))):
+        cache.put(domain, details)
+    time.sleep(0.2)
+    assert cache.get("example.test") == registered
+    assert cache.get("expiring.test") is None and cache.get("available.test") is None
+
+
+def test_whois_rate_limits():
+    # Throttled queries are retried with backoff, until the retries run out
+    throttling = StandInWHOISServer(throttled=2).start()
+    try:
+        client = WHOISClient(port=throttling.port, servers={"test": "127.0.0.1"}, retries=2, backoff=0.1)
+        start = time.monotonic()
+        assert client.query("example.test").startswith("Domain Name: EXAMPLE.TEST")
+        assert client.queries == 3 and time.monotonic() - start >= 0.3 # Paused for 0.1 then 0.2 seconds
+        throttling.throttled = 10
+        with pytest.raises(WHOISRateLimitError):
+            WHOISClient(port=throttling.port, servers={"test": "127.0.0.1"}, retries=1, backoff=0.01).query("example.test")
+    finally:
+        throttling.stop()
+
+
+def test_bulk_domain_availability(whois_server):
+    client = WHOISClient(iana_server="127.0.0.1", port=whois_server.port, rate_limit=(20, 5))
+    domains = ["example.test"] + [f"free{index}.test" for index in range(14)] + ["example.test/yeet", "profile.example.test"]
+
+    start = time.monotonic()
+    results = {result["domain"]: result for result in bulk_domain_availability(domains, max_workers=16, client=client)}
+    assert len(results) == 17
+    assert results["example.test"] == {"domain": "example.test", "available": False, "message": "Domain example.test unavailable until 6/November/2121", "expiration_date": "2121-11-06T05:09:47", "tier": "whois", "error": None}
+    assert all(results[f"free{index}.test"]["available"] == True for index in range(14))
+    assert results["example.test/yeet"]["available"] is None and results["example.test/yeet"]["error"].startswith("ValueError")
+
+    # The server's rate limit holds no matter how many workers there are (the IANA lookup and the first 4 domains are the burst)
+    assert time.monotonic() - start >= 0.45
+    times = whois_server.times[5:]
+    assert len(times) == 11 and times[-1] - times[0] >= 0.45 # Spaced 1/20th of a second apart
+
+    # Results come from the cache when there is one
+    cache = WHOISCache()
+    list(bulk_domain_availability(["example.test", "free0.test"], client=client, cache=cache))
+    assert [result["available"] for result in bulk_domain_availability(["example.test"], client=client, cache=cache)] == [False]
+    assert cache.hits == 1
+
+    # A response that can't be parsed is an error, not an available domain
+    result = next(bulk_domain_availability(["error.test"], client=client, cache=cache))
+    assert result["available"] is None and result["error"].startswith("WHOISParseError")
+
+
+def test_bulk_domain_availability_prefilter(dns_server):
+    # hold.test is registered but not delegated, so it's NXDOMAIN in DNS
+    responses = {**WHOIS_RESPONSES, "hold.test": WHOIS_RESPONSES["example.test"].replace("EXAMPLE", "HOLD")}
+    whois_server = StandInWHOISServer(responses).start()
+    try:
+        client = WHOISClient(iana_server="127.0.0.1", port=whois_server.port, rate_limit=(100, 10))
+        resolver = DNSResolver(nameservers=["127.0.0.1"], port=dns_server.port)
+        domains = ["example.test", "https://example.test", "hold.test", "example.test/yeet"] + [f"free{index}.test" for index in range(5)]
+        results = {result["domain"]: result for result in bulk_domain_availability(domains, max_workers=2, client=client, prefilter=True, resolver=resolver)}
+        assert len(results) == 9
+
+        # Delegated domains are decided by DNS, without a WHOIS query
+        assert results["example.test"] == {"domain": "example.test", "available": False, "message": "Domain example.test is registered, it has NS records", "expiration_date": None, "tier": "dns", "error": None}
+        assert results["https://example.test"]["tier"] == "dns"
+        assert "example.test" not in whois_server.queries
+
+        # Everything else escalates to WHOIS
+        assert results["hold.test"]["available"] == False and results["hold.test"]["tier"] == "whois"
+        assert results["hold.test"]["expiration_date"] == "2121-11-06T05:09:47"
+        assert all(results[f"free{index}.test"]["available"] == True and results[f"free{index}.test"]["tier"] == "whois" for index in range(5))
+        assert results["example.test/yeet"]["available"] is None and results["example.test/yeet"]["error"].startswith("ValueError")
+        assert sorted(whois_server.queries) == sorted(["test", "hold.test"] + [f"free{index}.test" for index in range(5)])
+    finally:
+        whois_server.stop()
+
+
+def test_rdap_client(rdap_server, tmp_path):
+    bootstrap_path = str(tmp_path / "rdap_bootstrap.json")
+    with RDAPClient(bootstrap_url=rdap_server.bootstrap_url, bootstrap_path=bootstrap_path) as client:
+        assert client.server_for("TEST") == f"{rdap_server.url}rdap/"
+        with pytest.raises(ValueError):
+            client.server_for("nordap")
+        assert client.query("Example.test")["ldhName"] == "EXAMPLE.TEST"
+        assert client.query("available.test") is None # 404 means it isn't registered
+
+        # Queries share pooled connections, and the bootstrap registry is only downloaded once
+        for _ in range(5):
+            client.query("example.test")
+        assert rdap_server.connections == 1
+        assert rdap_server.paths.count("/dns.json") == 1
+
+    # The cached bootstrap registry is used by new clients until it's too old, or refreshed
+    with RDAPClient(bootstrap_url=rdap_server.bootstrap_url, bootstrap_path=bootstrap_path) as client:
+        client.server_for("test")
+        assert rdap_server.paths.count("/dns.json") == 1
+        client.refresh_bootstrap()
+        assert rdap_server.paths.count("/dns.json") == 2
+    with RDAPClient(bootstrap_url=rdap_server.bootstrap_url, bootstrap_path=bootstrap_path, bootstrap_max_age=0) as client:
+        client.server_for("test")
+        assert rdap_server.paths.count("/dns.json") == 3
+
+    # An out of date cached copy is used if the registry can't be downloaded
+    with RDAPClient(bootstrap_url="http://127.0.0.1:9/dns.json", bootstrap_path=bootstrap_path, bootstrap_max_age=0, timeout=2) as client:
+        assert client.server_for("test") == f"{rdap_server.url}rdap/"
+    with RDAPClient(bootstrap_url="http://127.0.0.1:9/dns.json", bootstrap_path=None, timeout=2) as client:
+        with pytest.raises(OSError):
+            client.server_for("test")
+
+
+def test_rdap_domain_info(rdap_server, whois_server):
+    client = RDAPClient(bootstrap_url=rdap_server.bootstrap_url, bootstrap_path=None)
+    domain_details = get_domain_info("https://example.test", client=client)
+    assert domain_details == {"name": "example.test",
+                              "registrar": "Stand-in Registrar, Inc.",
+                              "registrant_cc": "ca",
+                              "creation_date": datetime(2018, 11, 6, 5, 9, 47),
+                              "expiration_date": datetime(2121, 11, 6, 5, 9, 47),
+                              "last_updated": datetime(2021, 1, 8, 8, 9, 44),
+                              "name_servers": {"ns1.example.test", "ns2.example.test"}}
+
+    # The same keys (and values) as parsing the WHOIS response
+    whois_details = get_domain_info("example.test", client=WHOISClient(iana_server="127.0.0.1", port=whois_server.port))
+    assert set(whois_details) == set(domain_details)
+    assert {key: whois_details[key] for key in ("name", "registrar", "expiration_date", "name_servers")} == {key: domain_details[key] for key in ("name", "registrar", "expiration_date", "name_servers")}
+
+    assert get_domain_info("available.test", client=client)["expiration_date"] == False
+    assert domain_availability(get_domain_info("available.test", client=client)) == ("Domain available", True)
+    with pytest.raises(ValueError, match="No RDAP server"):
+        get_domain_info("example.nordap", client=client)
+
+    # Results are cached, and bulk lookups work the same way
+    cache = WHOISCache()
+    get_domain_info("example.test", client=client, cache=cache)
+    assert get_domain_info("example.test", client=client, cache=cache) == domain_details and cache.hits == 1
+    results = {result["domain"]: result for result in bulk_domain_availability(["example.test", "free0.test"], client=client)}
+    assert results["example.test"]["expiration_date"] == "2121-11-06T05:09:47" and results["free0.test"]["available"] == True
+    client.close()
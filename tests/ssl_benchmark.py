@@ -0,0 +1,67 @@
+"""Micro-benchmark of the CPU cost of a TLS probe, against a local stand-in TLS server
+
+Compares the old way of probing (a new default SSL context and a full handshake every time) with 
+a shared context from get_ssl_context() and TLS session resumption. The server runs in it's own 
+process so only the client's CPU time is measured.
+
+Run with ```python tests/ssl_benchmark.py [probes]```
+"""
+
+import os
+import sys
+import ssl
+import time
+import socket
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # So sws can be imported from a checkout
+
+from sws.ssl_utilities import clear_ssl_sessions, get_ssl_context, probe_tls
+from conftest import CA_CERT, StandInTLSServer
+
+
+def probe_with_new_context(port: int):
+    """Probes the way sws did before get_ssl_context(), building a context (and loading the CA bundle) for each probe"""
+    context = ssl.create_default_context(cafile=CA_CERT)
+    with socket.create_connection(("localhost", port), timeout=5) as connection:
+        with context.wrap_socket(connection, server_hostname="localhost") as tls_connection:
+            return tls_connection.getpeercert()
+
+
+def probe_with_shared_context(port: int):
+    """Probes with the shared context and session cache"""
+    return probe_tls("localhost", port, 5, get_ssl_context(cafile=CA_CERT), resume=True)
+
+
+def serve(ports: multiprocessing.Queue):
+    """Runs a StandInTLSServer until the process is terminated"""
+    server = StandInTLSServer().start()
+    ports.put(server.port)
+    while True:
+        time.sleep(60)
+
+
+def measure(probe, port: int, probes: int) -> tuple:
+    """Returns the CPU time and wall time (in milliseconds) per probe"""
+    probe(port)  # Warm up
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(probes):
+        probe(port)
+    return (time.process_time() - cpu_start) * 1000 / probes, (time.perf_counter() - wall_start) * 1000 / probes
+
+
+if __name__ == "__main__":
+    probes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(ports,), daemon=True)
+    server.start()
+    try:
+        port = ports.get(timeout=10)
+        print(f"{'Probe':<40}  {'CPU ms':>8}  {'Wall ms':>8}")
+        print(f"{'New context, full handshake':<40}  {'%8.3f  %8.3f' % measure(probe_with_new_context, port, probes)}")
+        print(f"{'  (of which building the context)':<40}  {'%8.3f  %8.3f' % measure(lambda port: ssl.create_default_context(cafile=CA_CERT), port, probes)}")
+        print(f"{'  (building with the system CA bundle)':<40}  {'%8.3f  %8.3f' % measure(lambda port: ssl.create_default_context(), port, probes)}")
+        clear_ssl_sessions()
+        print(f"{'Shared context, session resumption':<40}  {'%8.3f  %8.3f' % measure(probe_with_shared_context, port, probes)}")
+    finally:
+        server.terminate()
@@ -1,8 +1,24 @@
 """Testing the functionality of sws.ssl_utilities"""
 
+import os
+import ssl
+import json
+import time
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from cryptography import x509
+from cryptography.x509 import ocsp
+from cryptography.hazmat.primitives import hashes, serialization
 from sws.ssl_utilities import *
 
+from sws.ssl_utilities import _cached_session, _cert_covers
+from sws.dns_utilities import DNSResolver
+
+from conftest import CA_CERT, LOCALHOST_CERT, OTHER_CERT, OCSP_REQUEST, OCSP_RESPONSE, StandInDNSServer, StandInOCSPResponder, StandInTLSServer
+
 # NOTE: Due to the dynamic nature of domains I have chosen to test wih kieranwood.ca (my site) because I can be relatively sure it will be stable,
 # if this test file fails check the domain SSL cert is still valid manually
 
@@ -57,3 +73,402 @@ def test_invalid_ssl_certs():
         assert type(check_ssl_expiry("mail.asdfhkjgaeoiruyfgasadf.com")) == str
     with pytest.raises(ValueError):
         assert type(get_ssl_issuer("mail.asdfhkjgaeoiruyfgasadf.com")) == list
+
+
+def wait_until(condition, timeout:float=2) -> bool:
+    """Waits for the stand-in servers' threads to catch up, returning whether condition became true"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_bulk_ssl_certs(tls_server):
+    blackhole = StandInTLSServer(handshake=False).start()
+    try:
+        hostnames = [f"localhost:{tls_server.port}", f"https://127.0.0.1:{tls_server.port}", f"localhost:{blackhole.port}", "localhost"]
+        results = {result["hostname"]: result for result in bulk_ssl_certs(hostnames, port=1, timeout=0.5, context=get_ssl_context(cafile=CA_CERT))}
+
+        assert results[f"localhost:{tls_server.port}"] == {
+            "hostname": f"localhost:{tls_server.port}",
+            "expiry": "Sep 23 06:17:11 2126 GMT",
+            "issuer": {"countryName": "CA", "organizationName": "sws", "commonName": "sws Test CA"},
+            "subject_alt_names": ["localhost", "example.test", "*.example.test", "127.0.0.1", "127.0.0.2"],
+            "shared_from": results[f"localhost:{tls_server.port}"]["shared_from"],
+            "ocsp": None,
+            "error": None,
+        }
+        assert results[f"127.0.0.1:{tls_server.port}"]["error"] is None # Protocols are stripped
+        # Both are on 127.0.0.1 and the cert covers both, so only one of them does a handshake
+        assert sorted(map(str, (results[f"localhost:{tls_server.port}"]["shared_from"], results[f"127.0.0.1:{tls_server.port}"]["shared_from"]))) in (["127.0.0.1", "None"], ["None", "localhost"])
+        assert results[f"localhost:{blackhole.port}"]["error"].startswith("TimeoutError") # Blackholed hosts only stall their own worker
+        assert results["localhost"]["expiry"] is None and results["localhost"]["error"] # Nothing listening on the default port
+        assert blackhole.connections == 1
+
+        # Handshakes run concurrently, so a sweep takes about as long as the slowest host
+        start = time.monotonic()
+        assert sum(1 for _ in bulk_ssl_certs([f"localhost:{blackhole.port}"] * 8, timeout=0.5, context=get_ssl_context(cafile=CA_CERT))) == 8
+        assert time.monotonic() - start < 2
+    finally:
+        blackhole.stop()
+
+
+def test_bulk_ssl_certs_share_handshakes(tls_server):
+    dns_server = StandInDNSServer().start()
+    resolver = DNSResolver(nameservers=["127.0.0.1"], port=dns_server.port)
+    context = get_ssl_context(cafile=CA_CERT)
+    try:
+        # Every name is on 127.0.0.1 and covered by the cert (example.test, *.example.test), so only one handshake is needed
+        hostnames = ["example.test", "www.example.test", "api.example.test", "WWW.example.test."] * 4
+        results = list(bulk_ssl_certs(hostnames, port=tls_server.port, context=context, resolver=resolver, max_workers=8))
+        assert len(results) == 16 and all(result["error"] is None for result in results)
+        assert wait_until(lambda: tls_server.connections == 1)
+        assert sum(result["shared_from"] is None for result in results) == 1
+        assert len({result["expiry"] for result in results}) == 1
+
+        # Names the cert doesn't cover (a wildcard only covers one label) do their own handshake, which fails verification
+        results = list(bulk_ssl_certs(["api.example.test", "deep.api.example.test"], port=tls_server.port, context=context, resolver=resolver, max_workers=1))
+        assert wait_until(lambda: tls_server.connections == 3)
+        assert results[1]["shared_from"] is None and "CERTIFICATE_VERIFY_FAILED" in results[1]["error"]
+
+        # Strict scans handshake with every name
+        results = list(bulk_ssl_certs(["example.test", "www.example.test", "api.example.test"], port=tls_server.port, context=context, resolver=resolver, strict=True))
+        assert all(result["error"] is None and result["shared_from"] is None for result in results)
+        assert wait_until(lambda: tls_server.connections == 6)
+
+        # Names that don't resolve fail on their own
+        assert next(bulk_ssl_certs(["missing.example.test"], context=context, resolver=resolver))["error"].startswith("ValueError")
+    finally:
+        resolver.close()
+        dns_server.stop()
+
+    certificate = probe_tls("localhost", tls_server.port, context=context).certificate
+    assert all(_cert_covers(certificate, name) for name in ("localhost", "Example.Test.", "a.example.test", "127.0.0.2"))
+    assert not any(_cert_covers(certificate, name) for name in ("example.testing", "a.b.example.test", ".example.test", "127.0.0.3", "test"))
+
+
+def test_ssl_context_and_session_reuse(tls_server):
+    context = get_ssl_context(cafile=CA_CERT)
+    assert get_ssl_context(cafile=CA_CERT) is context # Built (and the CA bundle loaded) once
+    assert get_ssl_context(cafile=CA_CERT, minimum_version=ssl.TLSVersion.TLSv1_3).minimum_version == ssl.TLSVersion.TLSv1_3
+
+    # Probing the same host again with resume=True resumes the TLS session instead of doing a full handshake
+    clear_ssl_sessions()
+    results = [probe_tls("localhost", tls_server.port, context=context, resume=True) for _ in range(3)]
+    assert wait_until(lambda: tls_server.handshakes == 3) and tls_server.resumptions == 2
+    assert results[0].cert == results[2].cert # Resumed sessions still have the cert details
+
+    # Sessions are kept per address, so another node behind the same name never gets this one
+    assert _cached_session(context, "localhost", "127.0.0.1", tls_server.port) is not None
+    assert _cached_session(context, "localhost", "127.0.0.2", tls_server.port) is None
+
+    clear_ssl_sessions()
+    probe_tls("localhost", tls_server.port, context=context, resume=True)
+    assert wait_until(lambda: tls_server.handshakes == 4) and tls_server.resumptions == 2
+
+    # Probes that read the cert (the default, and every bulk probe) never resume
+    hostname = f"localhost:{tls_server.port}"
+    result = next(bulk_ssl_certs([hostname], context=context))
+    assert wait_until(lambda: tls_server.handshakes == 5) and tls_server.resumptions == 2
+
+    # Sessions are only resumed with the context they came from, and unverified certs are still parsed from their DER
+    probe_tls("localhost", tls_server.port, context=get_ssl_context(verify=False), resume=True)
+    assert wait_until(lambda: tls_server.handshakes == 6) and tls_server.resumptions == 2
+    assert next(bulk_ssl_certs([hostname], context=get_ssl_context(verify=False))) == result
+
+    # Untrusted certs fail verification
+    assert "CERTIFICATE_VERIFY_FAILED" in next(bulk_ssl_certs([hostname]))["error"]
+
+
+def test_probe_tls(tls_server):
+    context = get_ssl_context(cafile=CA_CERT)
+    profile = probe_tls("https://localhost", tls_server.port, context=context)
+
+    assert tls_server.connections == 1 # Everything comes from one handshake
+    assert (profile.hostname, profile.port) == ("localhost", tls_server.port)
+    assert profile.expiry == datetime(2126, 9, 23, 6, 17, 11, tzinfo=timezone.utc)
+    assert profile.days_remaining == (profile.expiry - datetime.now(timezone.utc)).days > 36000
+    assert profile.issuer == {"countryName": "CA", "organizationName": "sws", "commonName": "sws Test CA"}
+    assert profile.subject["commonName"] == "localhost"
+    assert profile.subject_alt_names == ["localhost", "example.test", "*.example.test", "127.0.0.1", "127.0.0.2"]
+    assert profile.protocol in ("TLSv1.2", "TLSv1.3") and profile.cipher
+    assert profile.cert["notAfter"] == "Sep 23 06:17:11 2126 GMT"
+    with open(LOCALHOST_CERT[0]) as cert_file:
+        assert profile.der == ssl.PEM_cert_to_DER_cert(cert_file.read())
+    assert json.loads(json.dumps(profile.as_dict()))["expiry"] == "2126-09-23T06:17:11+00:00"
+
+    with pytest.raises(ValueError):
+        probe_tls("asdfhkjgaeoiruyfgasadf.invalid", context=context)
+
+
+def test_lazy_cert_parsing(tls_server, tmp_path):
+    context = get_ssl_context(cafile=CA_CERT)
+    other_server = StandInTLSServer(cert=OTHER_CERT).start()
+    try:
+        for port in (tls_server.port, other_server.port):
+            eager = probe_tls("localhost", port, context=context)
+            lazy = probe_tls("localhost", port, context=context, lazy=True)
+            assert lazy._cert is None and lazy._certificate is None # Nothing is parsed until it's read
+            assert (lazy.expiry, lazy.issuer, lazy.subject_alt_names) == (eager.expiry, eager.issuer, eager.subject_alt_names)
+            assert lazy._cert is None # Reading fields doesn't build the cert dict
+            assert lazy.cert == eager.cert # The cert dict built from the DER matches getpeercert()
+    finally:
+        other_server.stop()
+
+    # Certs on disk parse the same, and the fields getpeercert() doesn't have are available
+    with open(CA_CERT) as cert_file:
+        certificate = Certificate(ssl.PEM_cert_to_DER_cert(cert_file.read()))
+    assert certificate.issuer == certificate.subject == {"countryName": "CA", "organizationName": "sws", "commonName": "sws Test CA"}
+    assert certificate.version == 3 and certificate.subject_alt_names == [] and certificate.ocsp_urls == ()
+    assert certificate.fingerprint == hashlib.sha256(certificate.der).hexdigest()
+    assert certificate.not_before < datetime.now(timezone.utc) < certificate.not_after
+    with open(LOCALHOST_CERT[0]) as cert_file:
+        certificate = Certificate(ssl.PEM_cert_to_DER_cert(cert_file.read()))
+    assert certificate.serial_number == "1001"
+    assert certificate.ocsp_urls == ("http://ocsp.example.test/",) and certificate.ca_issuers == ("http://ca.example.test/ca.pem",)
+    assert certificate.subject_alt_names[-1] == ("IP Address", "127.0.0.2")
+    with pytest.raises(ValueError):
+        Certificate(certificate.der[:200]).not_after
+
+    # Lazy results are cached as only their DER
+    path = str(tmp_path / "ssl_cache.sqlite")
+    with SSLCache(path=path) as cache:
+        next(bulk_ssl_certs([f"localhost:{tls_server.port}"], context=context, cache=cache))
+    with SSLCache(path=path) as cache:
+        profile = cache.get("localhost", tls_server.port)
+        assert profile._cert is None and profile.cert == probe_tls("localhost", tls_server.port, context=context).cert
+
+
+def test_check_ssl_consistency(tls_server):
+    context = get_ssl_context(cafile=CA_CERT)
+    clear_ssl_sessions()
+    second_node = StandInTLSServer(host="127.0.0.2", port=tls_server.port).start()
+    try:
+        report = check_ssl_consistency("example.test", tls_server.port, addresses=["127.0.0.2", "127.0.0.1"], context=context)
+        assert report["consistent"] and report["mismatched"] == []
+        assert [endpoint["address"] for endpoint in report["endpoints"]] == ["127.0.0.1", "127.0.0.2"]
+        assert len(report["fingerprints"]) == 1 and list(report["fingerprints"].values()) == [["127.0.0.1", "127.0.0.2"]]
+        assert report["endpoints"][0]["expiry"] == "Sep 23 06:17:11 2126 GMT" and report["endpoints"][0]["error"] is None
+        assert wait_until(lambda: tls_server.handshakes == 1 and second_node.handshakes == 1) # Each address gets it's own handshake
+    finally:
+        second_node.stop()
+
+    # A node serving a different (stale) cert is flagged, and an unreachable node makes the hostname inconsistent
+    stale_node = StandInTLSServer(cert=OTHER_CERT, host="127.0.0.2", port=tls_server.port).start()
+    try:
+        report = check_ssl_consistency("localhost", tls_server.port, addresses=["127.0.0.1", "127.0.0.2", "127.0.0.3"], context=context, timeout=2)
+    finally:
+        stale_node.stop()
+    assert not report["consistent"] and len(report["fingerprints"]) == 2
+    assert report["mismatched"] == ["127.0.0.2"] # One of each, so the one expiring first is the odd one out
+    assert report["endpoints"][1]["expiry"] == "Oct 14 06:17:12 2036 GMT"
+    assert report["endpoints"][2]["fingerprint"] is None and report["endpoints"][2]["error"].startswith("ConnectionRefusedError")
+
+    # Addresses come from the system resolver by default
+    report = check_ssl_consistency("localhost", tls_server.port, context=context)
+    assert "127.0.0.1" in [endpoint["address"] for endpoint in report["endpoints"]]
+    with pytest.raises(ValueError):
+        check_ssl_consistency("asdfhkjgaeoiruyfgasadf.invalid", context=context)
+
+
+def test_starttls_and_port_scans(tls_server):
+    context = get_ssl_context(cafile=CA_CERT)
+    servers = {protocol: StandInTLSServer(starttls=protocol).start() for protocol in SSL_STARTTLS_PROTOCOLS}
+    refusing = StandInTLSServer(starttls="smtp", offer_starttls=False).start()
+    try:
+        for protocol, server in servers.items():
+            profile = probe_tls("localhost", server.port, context=context, starttls=protocol)
+            assert profile.expiry == datetime(2126, 9, 23, 6, 17, 11, tzinfo=timezone.utc)
+        with pytest.raises(ValueError, match="doesn't offer STARTTLS"):
+            probe_tls("localhost", refusing.port, context=context, starttls="smtp")
+        with pytest.raises(ValueError, match="refused to start TLS"): # An IMAP server doesn't speak POP3
+            probe_tls("localhost", servers["imap"].port, context=context, starttls="pop3")
+        with pytest.raises(ValueError):
+            probe_tls("localhost", tls_server.port, context=context, starttls="ftp")
+
+        # Every port is checked at once and merged into one report, with the first expiry across ports
+        ports = [f"{servers['smtp'].port}/smtp", f"{servers['imap'].port}/imap", f"{servers['pop3'].port}/pop3", tls_server.port, refusing.port]
+        report = scan_tls_ports("https://localhost", ports, context=context, timeout=2)
+    finally:
+        for server in [refusing, *servers.values()]:
+            server.stop()
+    assert report["hostname"] == "localhost"
+    assert report["expiry"] == "Sep 23 06:17:11 2126 GMT" and report["days_remaining"] > 36000
+    results = {result["port"]: result for result in report["ports"]}
+    assert [result["port"] for result in report["ports"]] == sorted(results)
+    assert results[servers["smtp"].port]["starttls"] == "smtp" and results[servers["smtp"].port]["error"] is None
+    assert results[tls_server.port]["starttls"] is None and results[tls_server.port]["protocol"] in ("TLSv1.2", "TLSv1.3")
+    assert len({results[server.port]["fingerprint"] for server in servers.values()}) == 1
+    assert results[refusing.port]["expiry"] is None and results[refusing.port]["error"].startswith("SSLError") # Probed as implicit TLS, so the handshake fails
+
+    # Well known ports pick their protocol, and ports can be forced to implicit TLS
+    assert scan_tls_ports("localhost", [1], timeout=1)["ports"][0]["starttls"] is None
+    assert [result["starttls"] for result in scan_tls_ports("localhost", [587, 110, "143/tls"], timeout=1)["ports"]] == ["pop3", None, "smtp"]
+    with pytest.raises(ValueError):
+        scan_tls_ports("localhost", ["https"])
+
+
+def test_ssl_cache(tls_server, tmp_path):
+    context = get_ssl_context(cafile=CA_CERT)
+    path = str(tmp_path / "ssl_cache.sqlite")
+    with SSLCache(path=path) as cache:
+        profile = probe_tls("localhost", tls_server.port, context=context, cache=cache)
+        assert cache.age("localhost", tls_server.port) < 1
+        assert probe_tls("LOCALHOST", tls_server.port, context=context, cache=cache) is profile
+        assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, 0.5)
+        assert wait_until(lambda: tls_server.connections == 1)
+
+        probe_tls("localhost", tls_server.port, context=context, cache=cache, refresh=True) # Forced probes skip (but update) the cache
+        assert wait_until(lambda: tls_server.connections == 2) and cache.hits == 1
+
+        # Results are reused until max_age passes
+        cache.max_age = 0.2
+        probe_tls("localhost", tls_server.port, context=context, cache=cache, refresh=True)
+        time.sleep(0.3)
+        assert cache.age("localhost", tls_server.port) is None
+        assert cache.get("localhost", tls_server.port) is None
+
+        # Or until the cert is within expiry_margin of it's notAfter
+        cache.max_age, cache.expiry_margin = 3600, profile.expiry.timestamp() - time.time() - 0.2
+        cache.put(profile)
+        assert cache.get("localhost", tls_server.port) is profile
+        time.sleep(0.3)
+        assert cache.get("localhost", tls_server.port) is None
+        cache.expiry_margin = profile.expiry.timestamp()
+        cache.put(profile) # Already too close to expiring to cache
+        assert cache.get("localhost", tls_server.port) is None
+
+        cache.expiry_margin = 0
+        cache.put(profile)
+
+        # Results are keyed on how the host was probed, so unverified results are never served to probes that verify
+        unverified = probe_tls("localhost", tls_server.port, context=get_ssl_context(verify=False), cache=cache)
+        assert cache.get("localhost", tls_server.port, verified=False) is unverified
+        assert cache.get("localhost", tls_server.port) is profile
+        assert cache.get("localhost", tls_server.port, server_name="example.test") is None
+        cache.put(profile, starttls="smtp")
+        assert cache.get("localhost", tls_server.port, starttls="smtp") is profile and cache.get("localhost", tls_server.port, starttls="imap") is None
+
+    # Results survive between processes, with the same cert details
+    with SSLCache(path=path) as cache:
+        cached = cache.get("localhost", tls_server.port)
+        assert cached.cert == profile.cert and cached.der == profile.der and cached.protocol == profile.protocol
+        assert cached.expiry == profile.expiry
+        cache.clear()
+        assert cache.get("localhost", tls_server.port) is None
+
+    # Caches from before probes recorded the address gain the column in place
+    old_path = str(tmp_path / "old_ssl_cache.sqlite")
+    database = sqlite3.connect(old_path)
+    database.execute("CREATE TABLE tls_profiles (hostname TEXT, port INTEGER, server_name TEXT, starttls TEXT, verified INTEGER, probed_at REAL, expires REAL, cert TEXT, der BLOB, protocol TEXT, cipher TEXT, PRIMARY KEY (hostname, port, server_name, starttls, verified))")
+    database.close()
+    with SSLCache(path=old_path) as cache:
+        cache.put(profile)
+    with SSLCache(path=old_path) as cache:
+        assert cache.get("localhost", tls_server.port).address == profile.address
+
+
+def test_probe_timeouts_and_addressing(tls_server):
+    context = get_ssl_context(cafile=CA_CERT)
+    blackhole = StandInTLSServer(handshake=False).start()
+    try:
+        # Handshakes that never finish are bound by handshake_timeout, and by the overall deadline
+        for options in ({"handshake_timeout": 0.3}, {"timeout": 0.3}):
+            start = time.monotonic()
+            with pytest.raises(TimeoutError):
+                probe_tls("localhost", blackhole.port, context=context, **options)
+            assert time.monotonic() - start < 1
+
+        # Sockets are closed whether probes succeed or fail (the stand-in servers share the process, so they're stopped before counting)
+        open_files = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+        for _ in range(20):
+            probe_tls("localhost", tls_server.port, context=context)
+            with pytest.raises(TimeoutError):
+                probe_tls("localhost", blackhole.port, context=context, handshake_timeout=0.01)
+    finally:
+        blackhole.stop()
+    if open_files is not None:
+        assert wait_until(lambda: len(os.listdir("/proc/self/fd")) <= open_files - 1) # Less the blackhole's listener
+
+    # The connect address and SNI/verified name can be set separately from the hostname
+    profile = probe_tls("www.example.test", tls_server.port, context=context, address="127.0.0.1")
+    assert (profile.hostname, profile.address) == ("www.example.test", "127.0.0.1") # Matched by *.example.test
+    assert probe_tls("localhost", tls_server.port, context=context, address="127.0.0.1", server_name="example.test").hostname == "localhost"
+    with pytest.raises(ssl.SSLCertVerificationError):
+        probe_tls("localhost", tls_server.port, context=context, server_name="other.test")
+
+
+def test_ocsp(tls_server, ocsp_responder, tmp_path):
+    context = get_ssl_context(cafile=CA_CERT)
+    localhost, other = (Certificate(ssl.PEM_cert_to_DER_cert(open(cert).read())) for cert, _ in (LOCALHOST_CERT, OTHER_CERT))
+    assert localhost.ocsp_urls == ("http://ocsp.example.test/",) # Not resolvable, so every request goes to the stand-in
+
+    # Certs from the same issuer and responder are asked about in one request, duplicates are only asked about once
+    with OCSPCache(path=str(tmp_path / "ocsp.sqlite")) as cache:
+        checker = OCSPChecker(context=context, cache=cache, responder=ocsp_responder.url)
+        good, revoked, duplicate = checker.check([probe_tls("localhost", tls_server.port, context=context), other, localhost])
+        assert ocsp_responder.cert_ids == [2] and checker.requests == 1
+        with open(OCSP_REQUEST, "rb") as request:
+            assert ocsp_responder.requests[0] == request.read() # Byte for byte what openssl ocsp sends
+        assert good == duplicate and good.status == "good" and good.responder == ocsp_responder.url
+        assert good.next_update == datetime(2126, 9, 23, 6, 39, 29, tzinfo=timezone.utc)
+        assert (revoked.status, revoked.revoked_at, revoked.reason) == ("revoked", datetime(2026, 1, 1, tzinfo=timezone.utc), "keyCompromise")
+        assert revoked.as_dict()["revoked_at"] == "2026-01-01T00:00:00+00:00"
+
+        # Statuses are cached until their nextUpdate, in memory and on disk
+        assert checker.check([other, localhost]) == [revoked, good]
+        assert checker.requests == 1 and cache.hits == 2
+    with OCSPCache(path=str(tmp_path / "ocsp.sqlite")) as cache:
+        assert len(cache) == 0 # Nothing is loaded into memory until it's asked for
+        assert OCSPChecker(context=context, cache=cache, responder=ocsp_responder.url).check([other]) == [revoked]
+        assert len(ocsp_responder.requests) == 1
+
+    # Statuses expire after max_age even if their nextUpdate is later, and errors aren't cached
+    cache = OCSPCache(max_age=0.2)
+    cache.put("id", OCSPStatus("good"))
+    cache.put("later", OCSPStatus("good", next_update=datetime(2126, 1, 1, tzinfo=timezone.utc)))
+    cache.put("error", OCSPStatus("error", error="Timed out"))
+    assert cache.get("id") == OCSPStatus("good") and cache.get("error") is None
+    time.sleep(0.3)
+    assert cache.get("id") is None and cache.get("later") is None
+
+    # Responders that refuse batches are asked about each cert on it's own
+    single = StandInOCSPResponder(single_only=True).start()
+    try:
+        checker = OCSPChecker(context=context, responder=single.url)
+        assert [status.status for status in checker.check([localhost, other])] == ["good", "revoked"]
+        assert single.cert_ids == [2, 1, 1]
+    finally:
+        single.stop()
+
+    # Failures are reported per cert instead of raised
+    status = OCSPChecker(context=context, responder="http://127.0.0.1:1/", timeout=1).check([localhost])[0]
+    assert status.status == "error" and "Connection" in status.error
+    assert OCSPChecker(context=get_ssl_context(), responder=ocsp_responder.url, timeout=1).check([other])[0].error == "ValueError(\"The cert's issuer couldn't be found\")"
+
+    # Responses have to be signed by the issuer (or a responder it authorised), ones that aren't are errors and aren't cached
+    with open(OCSP_RESPONSE, "rb") as response_file:
+        response = response_file.read()
+    signature = ocsp.load_der_ocsp_response(response).signature
+    with open(CA_CERT, "rb") as ca_file, open(OTHER_CERT[0], "rb") as other_file, open(OTHER_CERT[1], "rb") as key_file:
+        ca, other_cert = x509.load_pem_x509_certificate(ca_file.read()), x509.load_pem_x509_certificate(other_file.read())
+        other_key = serialization.load_pem_private_key(key_file.read(), None)
+    now = datetime.now(timezone.utc)
+    unauthorised = (ocsp.OCSPResponseBuilder() # Signed by a leaf that isn't an OCSP responder
+        .add_response(x509.load_der_x509_certificate(localhost.der), ca, hashes.SHA1(), ocsp.OCSPCertStatus.GOOD, now, now + timedelta(days=1), None, None)
+        .responder_id(ocsp.OCSPResponderEncoding.HASH, other_cert).certificates([other_cert]).sign(other_key, hashes.SHA256())
+        .public_bytes(serialization.Encoding.DER))
+    for forged, error in ((response.replace(signature, bytes([signature[0] ^ 1]) + signature[1:]), "signature is invalid"), (unauthorised, "a responder it authorised")):
+        forger = StandInOCSPResponder(response=forged).start()
+        try:
+            cache = OCSPCache()
+            status = OCSPChecker(context=context, cache=cache, responder=forger.url).check([localhost])[0]
+            assert status.status == "error" and error in status.error and len(cache) == 0
+        finally:
+            forger.stop()
+
+    # Bulk scans check every cert in batches
+    checker = OCSPChecker(context=context, responder=ocsp_responder.url)
+    results = list(bulk_ssl_certs(["localhost", "127.0.0.1", "nothing.invalid"], port=tls_server.port, context=context, ocsp=checker))
+    assert sorted(str(result["ocsp"] and result["ocsp"]["status"]) for result in results) == ["None", "good", "good"]
+    assert checker.requests == 1